@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Send control commands to the AI server (PC1)
+
+Usage:
+    python scripts/ai_control.py swap obstacle models/obstacle_detector/new.pt
+    python scripts/ai_control.py swap product models/product_recognizer/new.pt
+    python scripts/ai_control.py status
+    python scripts/ai_control.py stats
+    python scripts/ai_control.py tune obstacle confidence=0.4 risk.pttc_warn_s=2.5
+    python scripts/ai_control.py tune product target_fps=8 trigger.min_frames=3
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from common.config import config
+from common.protocols import AIControl, Protocol
+from network.tcp_client import TCPClient
+
+
+def parse_params(items):
+    """key=value 목록 → dict (group.name=value 는 중첩 dict, 값은 JSON으로 해석)"""
+    params = {}
+    for item in items:
+        key, sep, raw = item.partition("=")
+        if not sep:
+            raise SystemExit(f"Invalid parameter (expected key=value): {item}")
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        group, dot, name = key.partition(".")
+        if dot:
+            params.setdefault(group, {})[name] = value
+        else:
+            params[key] = value
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+    swap = sub.add_parser("swap", help="Load a new model and swap it in")
+    swap.add_argument("target", choices=["obstacle", "product"])
+    swap.add_argument("weights")
+    sub.add_parser("status", help="Show model swap status")
+    sub.add_parser("stats", help="Show latency / fps / skip statistics")
+    tune = sub.add_parser("tune", help="Change thresholds and rates at runtime")
+    tune.add_argument("target", choices=["obstacle", "product"])
+    tune.add_argument("params", nargs="+", help="key=value or group.key=value")
+    args = parser.parse_args()
+
+    if args.command == "swap":
+        msg = Protocol.ai_control(
+            AIControl.SWAP_MODEL, {"target": args.target, "weights": args.weights}
+        )
+    elif args.command == "tune":
+        msg = Protocol.ai_control(
+            AIControl.TUNE,
+            {"target": args.target, "params": parse_params(args.params)},
+        )
+    elif args.command == "stats":
+        msg = Protocol.ai_control(AIControl.GET_STATS, {})
+    else:
+        msg = Protocol.ai_control(AIControl.MODEL_STATUS, {})
+
+    client = TCPClient(config.network.pc1_ai.ip, config.network.pc1_ai.control_port)
+    response = client.send_request(msg)
+    if response is None:
+        print("❌ No response from AI server")
+        return 1
+
+    payload = response.get("payload", {})
+    print(json.dumps(payload, indent=2, ensure_ascii=False))
+    return 0 if payload.get("status") else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
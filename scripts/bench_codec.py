@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON vs binary encoding of TCP control messages
+Builds representative messages for each hot message type and reports
+payload size and encode/decode time for both encodings.
+
+Usage:
+    python scripts/bench_codec.py [--iterations 2000] [--objects 8] [--items 12]
+"""
+
+import argparse
+import functools
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from common import codec
+from common.protocols import AIEvent, Protocol, UICommand
+
+
+def _obstacle_object(track_id: int) -> dict:
+    x1, y1 = random.randint(0, 500), random.randint(0, 300)
+    return {
+        "track_id": track_id,
+        "class": 0,
+        "class_name": "person",
+        "confidence": random.random(),
+        "box": [x1, y1, x1 + random.randint(20, 140), y1 + random.randint(40, 180)],
+        "risk_level": random.randint(0, 2),
+        "risk_name": "CAUTION",
+        "score": random.random(),
+        "pttc_s": random.uniform(0.5, 5.0),
+        "in_center": random.random() < 0.5,
+        "approaching": random.random() < 0.5,
+    }
+
+
+def sample_messages(n_objects: int, n_items: int) -> dict:
+    objects = [_obstacle_object(i) for i in range(n_objects)]
+    items = [
+        {
+            "item_id": 1000 + i,
+            "product_id": 1 + i,
+            "product_name": f"상품 {i}",
+            "price": random.choice([1200, 2500, 4800, 15900]),
+            "quantity": random.randint(1, 4),
+            "subtotal": random.randint(1200, 60000),
+        }
+        for i in range(n_items)
+    ]
+    return {
+        "AI_EVT obstacle": Protocol.ai_event(
+            AIEvent.OBSTACLE_DANGER,
+            {
+                "level": 1,
+                "danger_level": 0.62,
+                "objects": objects,
+                "highest_risk_object": objects[0] if objects else None,
+                "predicted": False,
+            },
+        ),
+        "AI_EVT product": Protocol.ai_event(
+            AIEvent.PRODUCT_DETECTED,
+            {
+                "product_id": 7,
+                "confidence": 0.913,
+                "quantity": 1,
+                "instance_ids": [3, 4],
+            },
+        ),
+        "UI_CMD update_cart": Protocol.ui_command(
+            UICommand.UPDATE_CART,
+            {"items": items, "total": sum(i["subtotal"] for i in items)},
+        ),
+        "UI_CMD show_alarm": Protocol.ui_command(
+            UICommand.SHOW_ALARM,
+            {"level": 2, "message": "전방 충돌 위험", "objects": objects[:1]},
+        ),
+    }
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--objects", type=int, default=8)
+    parser.add_argument("--items", type=int, default=12)
+    args = parser.parse_args()
+
+    random.seed(0)
+    messages = sample_messages(args.objects, args.items)
+
+    print(f"Binary decoder: {codec.backend()}")
+    print("=" * 86)
+    print(
+        f"{'message':<20} {'json B':>7} {'bin B':>7} {'size':>6}  "
+        f"{'enc json':>9} {'enc bin':>9}  {'dec json':>9} {'dec bin':>9}  (µs)"
+    )
+    for name, message in messages.items():
+        as_json = codec.encode(message)
+        as_bin = codec.encode(message, binary=True)
+        assert codec.decode(as_bin) == codec.decode(as_json)
+
+        n = args.iterations
+        enc_json = _time_per_call(functools.partial(codec.encode, message), n)
+        enc_bin = _time_per_call(
+            functools.partial(codec.encode, message, binary=True), n
+        )
+        dec_json = _time_per_call(functools.partial(codec.decode, as_json), n)
+        dec_bin = _time_per_call(functools.partial(codec.decode, as_bin), n)
+        print(
+            f"{name:<20} {len(as_json):>7} {len(as_bin):>7} "
+            f"{(len(as_bin) / len(as_json) - 1) * 100:>+5.0f}%  "
+            f"{enc_json:>9.1f} {enc_bin:>9.1f}  {dec_json:>9.1f} {dec_bin:>9.1f}"
+        )
+    print("=" * 86)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Run several AI server processes on this host (AI worker pool for the Main Hub)
+Each worker gets its own UDP/control ports (base port + 10 * index) and the
+matching pc2_main.ai_workers block is printed for configs/network_config.yaml.
+Each worker serves several carts (bounded-load hashing); kill a worker process
+(its PID is printed) to watch the hub move its carts to the other workers;
+Ctrl+C stops all workers.
+
+Usage:
+    python scripts/run_ai_pool.py [--workers 2] [--base-port 5000] [--host 127.0.0.1]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def worker_ports(base_port: int, index: int) -> dict:
+    base = base_port + 10 * index
+    return {
+        "udp_port_front": base,
+        "udp_port_cart": base + 1,
+        "control_port": base + 2,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--base-port", type=int, default=5000)
+    parser.add_argument("--host", default="127.0.0.1", help="Address the hub uses")
+    args = parser.parse_args()
+
+    procs = {}
+    print("pc2_main:\n  ai_workers:")
+    for i in range(args.workers):
+        name = f"ai-{i}"
+        ports = worker_ports(args.base_port, i)
+        cmd = [sys.executable, str(ROOT / "src" / "ai_server.py")]
+        for key, value in ports.items():
+            cmd += [f"--{key.replace('_', '-')}", str(value)]
+        procs[name] = subprocess.Popen(cmd, cwd=ROOT)
+        print(f"    - name: {name}  # pid {procs[name].pid}")
+        print(f'      ip: "{args.host}"')
+        for key, value in ports.items():
+            print(f"      {key}: {value}")
+
+    try:
+        while procs:
+            time.sleep(1.0)
+            for name, proc in list(procs.items()):
+                if proc.poll() is not None:
+                    print(f"Worker {name} exited with code {proc.returncode}")
+                    del procs[name]
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs.values():
+            proc.terminate()
+        for proc in procs.values():
+            proc.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
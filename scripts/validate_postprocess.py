@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Validate raw-output post-processing against the ultralytics Results path
+Runs both paths of ProductRecognizer on a directory of recorded frames
+and reports any frame whose boxes/classes/confidences differ.
+
+Usage:
+    python scripts/validate_postprocess.py <frames_dir> [--atol 1e-3]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from detectors.postprocess import RawYoloRunner, results_match
+from detectors.product_dl import ProductRecognizer, load_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("frames_dir", type=Path)
+    parser.add_argument("--atol", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames_dir)
+    if not frames:
+        print(f"❌ No frames found in {args.frames_dir}")
+        return 1
+
+    pr = ProductRecognizer()
+    # predict()보다 먼저 만들어 runner 자체의 장치 선택 / fuse를 검증
+    try:
+        runner = RawYoloRunner(pr.model, pr.preprocess.imgsz, device=pr.device)
+    except Exception as e:
+        print(f"❌ Raw post-processing is not available for this model: {e}")
+        return 1
+    print(f"Device: {runner.device}")
+
+    mismatches = 0
+    t_results = t_raw = 0.0
+    for name, frame in frames:
+        inp, letterbox = pr.preprocess(frame)
+
+        t0 = time.perf_counter()
+        ref = pr._predict_boxes(inp, letterbox)
+        t1 = time.perf_counter()
+        fast = pr._postprocess_raw(runner(inp), letterbox)
+        t2 = time.perf_counter()
+        t_results += t1 - t0
+        t_raw += t2 - t1
+
+        ref_n = 0 if ref is None else len(ref[1])
+        if ref is None:
+            same = len(fast[1]) == 0
+        else:
+            same = results_match(ref, fast, atol=args.atol)
+        if not same:
+            mismatches += 1
+            print(f"✗ {name}: results={ref_n} boxes, raw={len(fast[1])}")
+
+    n = len(frames)
+    print("=" * 60)
+    print(f"Frames: {n}, mismatches: {mismatches}")
+    print(
+        f"Avg time - Results path: {t_results / n * 1000:.2f} ms, "
+        f"raw path: {t_raw / n * 1000:.2f} ms"
+    )
+    return 0 if mismatches == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
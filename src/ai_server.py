@@ -1,21 +1,82 @@
 # ai_server.py
 # ai_server.py
+import argparse
+import gc
 import threading
 import time
 import cv2
 import numpy as np
+from typing import Dict, List, Optional, Tuple
 
 from network.udp_handler import UDPFrameReceiver
+from network.flow_control import CART_STREAM, FRONT_STREAM
 from network.tcp_client import TCPClient
+from network.tcp_server import TCPServer
+from common.alarm import ALARM_SENT, alarm_content
 from common.config import config
+from common.metrics import LoopStats
+from common.thread_budget import (
+    apply_process_budget,
+    apply_thread_budget,
+    format_thread_report,
+)
 from common.protocols import (
     Protocol,
     AIEvent,
+    AIControl,
     DangerLevel,
+    UICommand,
 )
 from detectors.obstacle_dl import ObstacleDetector
 from detectors.product_dl import ProductRecognizer
 
+MODEL_TARGETS = ("obstacle", "product")
+# target → 모델 클래스 (튜닝 값을 카트에 적용하기 전에 한 번 검증)
+MODEL_CLASSES = {"obstacle": ObstacleDetector, "product": ProductRecognizer}
+# 스트림 → 그 프레임을 처리하는 모델
+STREAM_TARGETS = {FRONT_STREAM: "obstacle", CART_STREAM: "product"}
+
+
+class CartPipeline:
+    """
+    AI 서버가 맡은 카트 하나의 추론 상태
+    - 카트마다 모델 인스턴스를 따로 둠 (추적 / 위험도 / 상품 트리거 상태가 섞이지 않음)
+    - 최신 프레임 버퍼, 세션, 장애물 알람 대상(UI), 추론 루프 통계
+    """
+
+    def __init__(self, cart_code: str, session_id=None) -> None:
+        self.cart_code = cart_code
+        self.session_id = session_id
+        self.models = {}  # 로드가 끝나면 {"obstacle": ..., "product": ...}
+        self.sources: Dict[str, int] = {}  # stream → Hub 송신 UDP 포트 (카트 구분)
+        self.alarm_client: Optional[TCPClient] = None
+        self.stats = {target: LoopStats() for target in MODEL_TARGETS}
+
+        # 최신 프레임 (jpeg_bytes, capture_ts), 추론 루프가 가져가지 않은 프레임 여부
+        self.frame_lock = threading.Lock()
+        self.latest: Dict[str, Optional[Tuple[bytes, Optional[float]]]] = {
+            FRONT_STREAM: None,
+            CART_STREAM: None,
+        }
+        self.frame_pending = {FRONT_STREAM: False, CART_STREAM: False}
+        self.credits_advertised = {FRONT_STREAM: 0, CART_STREAM: 0}
+
+        # 추론 스레드가 프레임 사이에 적용 (AIServer._control_lock으로 보호)
+        self.pending_resets = set()
+        self.pending_swaps = {}
+
+        self.threads: List[threading.Thread] = []
+        self.closed = False  # 배정 해제: 추론 루프 종료
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.models) and not self.closed
+
+    def clear_frame(self, stream: str) -> None:
+        with self.frame_lock:
+            self.latest[stream] = None
+            self.frame_pending[stream] = False
+
 
 class AIServer:
     """
@@ -24,40 +85,97 @@ class AIServer:
     - Receives frames via UDP from Main PC2.
     - Performs inference on frames.
     - Pushes events (e.g., product detected, obstacle detected) to Main PC2.
+    - Serves every cart the Main Hub assigns (ASSIGN_CART), each with its own
+      models and tracking state; frames are routed by the hub's UDP source port.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        udp_port_front: Optional[int] = None,
+        udp_port_cart: Optional[int] = None,
+        control_port: Optional[int] = None,
+    ):
+        """
+        Args:
+            udp_port_front / udp_port_cart / control_port: pc1_ai 설정 대신 사용할 포트
+                (한 호스트에서 AI worker 여러 개 실행, scripts/run_ai_pool.py)
+        """
         print("Initializing AI Server...")
         if config is None:
             raise RuntimeError("Configuration could not be loaded. Exiting.")
 
         # -------------------------
-        # Models
+        # Thread budget (모델 로드 전에 프로세스 공통 설정 적용)
         # -------------------------
-        self.obstacle_model = ObstacleDetector()
-        self.product_model = ProductRecognizer()
+        self._runtime_cfg = config.model.runtime or {}
+        self._process_threads = apply_process_budget(self._runtime_cfg)
+        self._thread_layout = []
+        self._layout_lock = threading.Lock()
 
         # -------------------------
-        # Latest frame buffers & Locks
+        # Model hot-swap (백그라운드 로드 → 추론 스레드가 프레임 사이에 교체)
         # -------------------------
-        self._latest_obstacle_bytes = None
-        self._obstacle_lock = threading.Lock()
+        self._control_lock = threading.Lock()
+        self.swap_status = {
+            "obstacle": {
+                "state": "idle",
+                "weights": config.model.obstacle_detector.weights,
+            },
+            "product": {
+                "state": "idle",
+                "weights": config.model.product_recognizer.weights,
+            },
+        }
+        # 새로 배정되는 카트가 로드할 가중치 / 적용할 런타임 튜닝 (target별로 합친 값)
+        self._weights = {
+            target: status["weights"] for target, status in self.swap_status.items()
+        }
+        self._tuning = {target: {} for target in MODEL_TARGETS}
 
-        self._latest_product_bytes = None
-        self._product_lock = threading.Lock()
+        # -------------------------
+        # Loop statistics & target rates (control 포트로 조회/변경)
+        # -------------------------
+        self._started_at = time.time()
+        target_fps = self._runtime_cfg.get("target_fps") or {}
+        self.target_fps = {
+            "obstacle": float(target_fps.get("obstacle", 20.0)),
+            "product": float(target_fps.get("product", 10.0)),
+        }
 
         # -------------------------
-        # UDP receivers for frame data
+        # Carts (Hub가 ASSIGN_CART로 맡길 카트를 알려줌, 카트마다 모델 / 세션)
+        # 배정을 받기 전에는 기본 카트가 모든 프레임을 처리 (단일 카트 구성)
         # -------------------------
-        self.obstacle_receiver = UDPFrameReceiver(
-            "0.0.0.0", config.network.pc1_ai.udp_port_front
-        )
-        self.product_receiver = UDPFrameReceiver(
-            "0.0.0.0", config.network.pc1_ai.udp_port_cart
-        )
-        print(
-            f"UDP receivers listening on ports {config.network.pc1_ai.udp_port_front} and {config.network.pc1_ai.udp_port_cart}"
+        self.idle_without_session = bool(
+            self._runtime_cfg.get("idle_without_session", False)
         )
+        self.default_cart = config.network.pc2_main.cart_code
+        self.carts: Dict[str, CartPipeline] = {}
+        self._routes: Dict[Tuple[str, int], CartPipeline] = {}  # (stream, 포트) → 카트
+        self._assigned = False
+        self._unrouted = {FRONT_STREAM: 0, CART_STREAM: 0}  # 맡지 않은 카트의 프레임
+
+        default = CartPipeline(self.default_cart)
+        self._load_cart_models(default)
+        self.carts[default.cart_code] = default
+
+        # -------------------------
+        # UDP receivers for frame data
+        # -------------------------
+        udp_port_front = udp_port_front or config.network.pc1_ai.udp_port_front
+        udp_port_cart = udp_port_cart or config.network.pc1_ai.udp_port_cart
+        self.receivers = {
+            FRONT_STREAM: UDPFrameReceiver("0.0.0.0", udp_port_front),
+            CART_STREAM: UDPFrameReceiver("0.0.0.0", udp_port_cart),
+        }
+        print(f"UDP receivers listening on ports {udp_port_front} and {udp_port_cart}")
+
+        # -------------------------
+        # Frame credits (Hub는 광고한 credit만큼만 전달, 설정이 없으면 광고하지 않음)
+        # -------------------------
+        credit_cfg = config.network.pc1_ai.frame_credits or {}
+        self.credit_window = int(credit_cfg.get("window", 1)) if credit_cfg else None
+        self.credit_interval_s = float(credit_cfg.get("interval_s", 0.5))
 
         # -------------------------
         # TCP client to push events to Main Hub
@@ -67,62 +185,593 @@ class AIServer:
         self.event_client = TCPClient(main_hub_ip, main_hub_port)
         print(f"Event client configured to connect to {main_hub_ip}:{main_hub_port}")
 
+        # -------------------------
+        # Obstacle alarm fast path (AI → UI 직접, Hub에는 기록용 이벤트만)
+        # 기본 카트는 pc3_ui, 배정된 카트는 Hub가 알려준 카트 UI
+        # -------------------------
+        self.ui_alarm_direct = bool(config.network.pc1_ai.ui_alarm_direct)
+        if self.ui_alarm_direct:
+            ui = config.network.pc3_ui
+            self._set_alarm_target(default, ui.ip, ui.ui_port)
+
+        # -------------------------
+        # TCP server for control commands (model swap / status)
+        # -------------------------
+        control_port = control_port or config.network.pc1_ai.control_port
+        self.control_server = (
+            TCPServer("0.0.0.0", control_port, self._handle_control)
+            if control_port
+            else None
+        )
+
+    def _apply_budget(self, name: str, threads_cfg) -> None:
+        """현재 스레드에 CPU affinity / torch 스레드 수 적용 후 레이아웃 기록"""
+        threads_cfg = threads_cfg or {}
+        entry = apply_thread_budget(
+            name,
+            torch_threads=threads_cfg.get("torch_threads"),
+            cpus=threads_cfg.get("cpus"),
+        )
+        with self._layout_lock:
+            self._thread_layout.append(entry)
+
+    def _ready_carts(self) -> List[CartPipeline]:
+        with self._control_lock:
+            return [cart for cart in self.carts.values() if cart.ready]
+
     # =========================
-    # UDP receive loops
+    # Model hot-swap
     # =========================
-    def _obstacle_udp_loop(self):
-        print("Obstacle UDP loop started.")
-        for jpeg_bytes in self.obstacle_receiver.receive_packets():
-            with self._obstacle_lock:
-                self._latest_obstacle_bytes = jpeg_bytes
-
-    def _product_udp_loop(self):
-        print("Product UDP loop started.")
-        packet_count = 0
-        for jpeg_bytes in self.product_receiver.receive_packets():
-            packet_count += 1
-            if packet_count % 30 == 0:  # Every 30 frames
-                print(
-                    f"[AI Server] Received {packet_count} product frames, latest size: {len(jpeg_bytes)} bytes"
+    def request_model_swap(self, target: str, weights: str):
+        """
+        새 모델 로드를 백그라운드에서 시작 (추론은 기존 모델로 계속)
+
+        Returns:
+            tuple: (accepted: bool, error: str | None)
+        """
+        if target not in MODEL_TARGETS:
+            return False, f"Unknown model target: {target}"
+        if not weights:
+            return False, "weights is required"
+        with self._control_lock:
+            if self.swap_status[target]["state"] in ("loading", "ready"):
+                return False, f"{target} swap already in progress"
+            self.swap_status[target] = {
+                "state": "loading",
+                "weights": weights,
+                "requested_at": time.time(),
+            }
+
+        threading.Thread(
+            target=self._load_model_worker,
+            args=(target, weights),
+            name=f"{target}-loader",
+            daemon=True,
+        ).start()
+        return True, None
+
+    def _load_model_worker(self, target: str, weights: str) -> None:
+        # 로더도 해당 모델의 CPU 안에서만 실행 (다른 추론 스레드 간섭 방지)
+        threads_cfg = {
+            "obstacle": config.model.obstacle_detector.threads,
+            "product": config.model.product_recognizer.threads,
+        }[target] or {}
+        apply_thread_budget(f"{target}_loader", cpus=threads_cfg.get("cpus"))
+        try:
+            t0 = time.time()
+            # 카트마다 새 모델 (추적 상태가 모델 인스턴스에 있으므로 공유하지 않음)
+            loaded = [
+                (cart, cart.models[target].load_model(weights))
+                for cart in self._ready_carts()
+            ]
+        except Exception as e:
+            print(f"[AI Server] Model load failed ({target}, {weights}): {e}")
+            with self._control_lock:
+                self.swap_status[target].update(state="failed", error=str(e))
+            return
+
+        with self._control_lock:
+            pending = 0
+            for cart, new_model in loaded:
+                if not cart.closed:
+                    cart.pending_swaps[target] = new_model
+                    pending += 1
+            self._weights[target] = weights  # 이후 배정되는 카트도 새 모델로 시작
+            self.swap_status[target].update(
+                state="ready",
+                load_s=time.time() - t0,
+                carts=pending,
+                pending_carts=pending,
+                state_kept=True,
+            )
+            if pending == 0:
+                # 교체할 카트가 없음: 새 가중치는 이후 배정되는 카트부터 사용
+                self.swap_status[target].update(state="swapped", swapped_at=time.time())
+        print(f"[AI Server] {target} model loaded and warmed up: {weights}")
+
+    def _swap_done_locked(self, target: str, state_kept: bool = True) -> None:
+        """
+        카트 하나의 교체 완료(또는 배정 해제로 취소) 반영 (_control_lock 안에서 호출)
+        - 남은 카트가 없을 때만 swapped (그 전에는 새 SWAP_MODEL을 받지 않음)
+        """
+        status = self.swap_status[target]
+        status["pending_carts"] -= 1
+        status["state_kept"] = status["state_kept"] and state_kept
+        if status["pending_carts"] <= 0:
+            status.update(state="swapped", swapped_at=time.time())
+
+    def _apply_pending_changes(self, cart: CartPipeline, target: str) -> None:
+        """추론 스레드에서 프레임 사이에 호출: 세션 전환 초기화, 준비된 새 모델로 교체"""
+        with self._control_lock:
+            reset = target in cart.pending_resets
+            cart.pending_resets.discard(target)
+            new_model = cart.pending_swaps.pop(target, None)
+
+        if reset:
+            cart.models[target].reset_tracking(compact=True)
+            if not self._product_active(cart) and target == "product":
+                self._release_model_memory()
+            print(
+                f"[AI Server] {cart.cart_code} {target} state reset "
+                f"(session: {cart.session_id})"
+            )
+
+        if new_model is None:
+            return
+
+        result = cart.models[target].swap_model(new_model)
+        del new_model
+        self._release_model_memory()
+
+        with self._control_lock:
+            self._swap_done_locked(target, result["state_kept"])
+        print(
+            f"[AI Server] {cart.cart_code} {target} model swapped to "
+            f"{self.swap_status[target]['weights']} (state kept: {result['state_kept']})"
+        )
+
+    @staticmethod
+    def _release_model_memory() -> None:
+        """교체된 이전 모델의 메모리 반환 (GPU 캐시 포함)"""
+        gc.collect()
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    # =========================
+    # Session lifecycle
+    # =========================
+    def _product_active(self, cart: CartPipeline) -> bool:
+        """상품 모델을 돌릴지 여부 (세션이 없고 idle 설정이면 유휴)"""
+        return cart.session_id is not None or not self.idle_without_session
+
+    def set_session(self, cart: CartPipeline, session_id) -> None:
+        """
+        카트의 세션 시작(session_id) / 종료(None) 통보 처리
+        - 이전 쇼핑객의 추적/위험도/상품 상태는 다음 프레임 전에 초기화
+        - 이전 세션에서 받은 상품 프레임은 버림
+        """
+        with self._control_lock:
+            cart.session_id = session_id
+            cart.pending_resets.update(MODEL_TARGETS)
+        cart.clear_frame(CART_STREAM)
+        state = f"started: {session_id}" if session_id is not None else "ended"
+        print(
+            f"[AI Server] {cart.cart_code} session {state} "
+            f"(product model {'active' if self._product_active(cart) else 'idle'})"
+        )
+
+    def assign_carts(self, assignments: list) -> None:
+        """
+        Hub(AI worker pool)의 카트 배정: 이 서버가 맡을 카트 전체 목록
+        [{cart_code, session_id, ui: [ip, port], sources: {stream: port}}, ...]
+        - 새 카트는 모델을 백그라운드에서 로드한 뒤 추론 시작
+        - 빠진 카트는 추론을 멈추고 모델 메모리 반환
+        - 계속 맡는 카트는 세션이 바뀐 경우에만 상태 초기화
+        """
+        wanted = {a["cart_code"]: a for a in assignments if a.get("cart_code")}
+        with self._control_lock:
+            self._assigned = True
+            removed = [c for code, c in self.carts.items() if code not in wanted]
+            for cart in removed:
+                del self.carts[cart.cart_code]
+                cart.closed = True
+                for target in list(cart.pending_swaps):
+                    del cart.pending_swaps[target]
+                    self._swap_done_locked(target)
+            added = []
+            for cart_code, spec in wanted.items():
+                cart = self.carts.get(cart_code)
+                if cart is None:
+                    cart = CartPipeline(cart_code, spec.get("session_id"))
+                    self.carts[cart_code] = cart
+                    added.append(cart)
+                cart.sources = {
+                    stream: int(port)
+                    for stream, port in (spec.get("sources") or {}).items()
+                }
+            self._routes = {
+                (stream, port): cart
+                for cart in self.carts.values()
+                for stream, port in cart.sources.items()
+            }
+
+        for cart in removed:
+            print(f"[AI Server] Released cart: {cart.cart_code}")
+            threading.Thread(target=self._close_cart, args=(cart,), daemon=True).start()
+        for cart_code, spec in wanted.items():
+            cart = self.carts.get(cart_code)
+            if cart is None:
+                continue
+            if spec.get("ui") and self.ui_alarm_direct:
+                self._set_alarm_target(cart, *spec["ui"])
+            if cart in added:
+                print(f"[AI Server] Assigned cart: {cart_code}")
+                threading.Thread(
+                    target=self._open_cart,
+                    args=(cart,),
+                    name=f"{cart_code}-loader",
+                    daemon=True,
+                ).start()
+            elif spec.get("session_id") != cart.session_id:
+                self.set_session(cart, spec.get("session_id"))
+
+    def _load_cart_models(self, cart: CartPipeline) -> None:
+        """
+        현재 가중치로 카트 전용 모델 로드 + 지금까지의 런타임 튜닝 적용
+        (튜닝 적용과 준비 완료를 같은 lock 안에서: 그 사이의 TUNE도 빠지지 않음)
+        """
+        models = {
+            target: cls(model_path=self._weights[target])
+            for target, cls in MODEL_CLASSES.items()
+        }
+        with self._control_lock:
+            for target, params in self._tuning.items():
+                if params:
+                    models[target].apply_tuning(params)
+            cart.models = models
+
+    def _open_cart(self, cart: CartPipeline) -> None:
+        """새로 배정된 카트: 모델 로드 후 추론 시작 (로드 중 받은 프레임은 버림)"""
+        try:
+            self._load_cart_models(cart)
+        except Exception as e:
+            print(f"[AI Server] Model load failed for cart {cart.cart_code}: {e}")
+            return
+        if cart.closed:
+            cart.models = {}
+            return
+        for thread in self._cart_threads(cart):
+            thread.start()
+
+    def _close_cart(self, cart: CartPipeline) -> None:
+        """배정 해제된 카트: 추론 루프가 끝나면 모델 / 알람 연결 정리"""
+        for thread in cart.threads:
+            thread.join()
+        cart.models = {}
+        if cart.alarm_client is not None:
+            cart.alarm_client.close()
+        self._release_model_memory()
+
+    def _cart_threads(self, cart: CartPipeline) -> List[threading.Thread]:
+        cart.threads = [
+            threading.Thread(
+                target=self._obstacle_inference_loop,
+                args=(cart,),
+                name=f"{cart.cart_code}-obstacle",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._product_inference_loop,
+                args=(cart,),
+                name=f"{cart.cart_code}-product",
+                daemon=True,
+            ),
+        ]
+        return cart.threads
+
+    def _set_alarm_target(self, cart: CartPipeline, ip: str, port: int) -> None:
+        client = cart.alarm_client
+        if client is not None and (client.host, client.port) == (ip, port):
+            return
+        cart.alarm_client = TCPClient(ip, port, timeout=1.0)
+        if client is not None:
+            client.close()
+        print(f"{cart.cart_code} obstacle alarms sent directly to UI at {ip}:{port}")
+
+    def _route(self, stream: str, source_port: int) -> Optional[CartPipeline]:
+        """프레임을 보낸 Hub 포트로 카트 찾기 (배정 전에는 기본 카트)"""
+        cart = self._routes.get((stream, source_port))
+        if cart is None and not self._assigned:
+            cart = self.carts.get(self.default_cart)
+        return cart
+
+    def _control_cart(self, cart_code) -> Optional[CartPipeline]:
+        """control 요청의 대상 카트 (cart_code가 없으면 하나뿐인 카트)"""
+        with self._control_lock:
+            if cart_code is None and len(self.carts) == 1:
+                return next(iter(self.carts.values()))
+            return self.carts.get(cart_code)
+
+    # =========================
+    # Control (Main PC2 / 운영 도구 → AI)
+    # =========================
+    def _handle_control(self, request: dict) -> dict:
+        try:
+            payload = request["payload"]
+            command = AIControl(payload["command"])
+            data = payload.get("data") or {}
+        except (KeyError, TypeError, ValueError) as e:
+            return Protocol.ai_response(
+                False, {}, error=f"Invalid control request: {e}"
+            )
+
+        # Hub가 알린 Protocol 버전 → 이벤트 전송 인코딩 선택 (바이너리 / JSON)
+        self.event_client.set_peer_version(request.get("header", {}).get("version"))
+
+        if command == AIControl.SWAP_MODEL:
+            accepted, error = self.request_model_swap(
+                data.get("target"), data.get("weights")
+            )
+            with self._control_lock:
+                status = {k: dict(v) for k, v in self.swap_status.items()}
+            return Protocol.ai_response(accepted, {"models": status}, error=error)
+
+        if command == AIControl.MODEL_STATUS:
+            with self._control_lock:
+                status = {k: dict(v) for k, v in self.swap_status.items()}
+            return Protocol.ai_response(True, {"models": status})
+
+        if command == AIControl.GET_STATS:
+            return Protocol.ai_response(True, self.get_stats())
+
+        if command in (AIControl.SESSION_START, AIControl.SESSION_END):
+            # 맡지 않은 카트의 세션 시작/종료는 거절 (다른 카트 상태를 초기화하지 않음)
+            cart = self._control_cart(data.get("cart_code"))
+            if cart is None:
+                return Protocol.ai_response(
+                    False,
+                    {"carts": sorted(self.carts)},
+                    error=f"Not serving cart {data.get('cart_code')}",
                 )
-            with self._product_lock:
-                self._latest_product_bytes = jpeg_bytes
+            if (
+                command == AIControl.SESSION_END
+                and data.get("session_id") is not None
+                and data["session_id"] != cart.session_id
+            ):
+                # 이미 다음 세션이 시작됨: 늦게 도착한 종료 통보는 무시
+                return Protocol.ai_response(
+                    True,
+                    {
+                        "session_id": cart.session_id,
+                        "product_active": self._product_active(cart),
+                    },
+                )
+            session_id = (
+                data.get("session_id") if command == AIControl.SESSION_START else None
+            )
+            if data.get("ui") and self.ui_alarm_direct:
+                self._set_alarm_target(cart, *data["ui"])
+            self.set_session(cart, session_id)
+            return Protocol.ai_response(
+                True,
+                {
+                    "session_id": session_id,
+                    "product_active": self._product_active(cart),
+                },
+            )
+
+        if command == AIControl.ASSIGN_CART:
+            carts = data.get("carts")
+            if not isinstance(carts, list):
+                return Protocol.ai_response(False, {}, error="carts must be a list")
+            self.assign_carts(carts)
+            with self._control_lock:
+                assigned = {code: c.session_id for code, c in self.carts.items()}
+            return Protocol.ai_response(True, {"carts": assigned})
+
+        if command == AIControl.TUNE:
+            try:
+                applied = self.apply_tuning(
+                    data.get("target"), data.get("params") or {}
+                )
+            except (TypeError, ValueError) as e:
+                return Protocol.ai_response(False, {}, error=str(e))
+            return Protocol.ai_response(True, {"applied": applied})
+
+        return Protocol.ai_response(False, {}, error=f"Unsupported command: {command}")
 
     # =========================
-    # Inference loops
+    # Stats & runtime tuning
     # =========================
-    def _obstacle_inference_loop(self):
-        print("Obstacle inference loop started.")
+    def get_stats(self) -> dict:
+        """카트/모델별 지연 시간 percentile, 달성 fps, 생략 프레임 수, 대기 프레임 수"""
+        with self._control_lock:
+            carts = list(self.carts.values())
+            pending_swaps = sorted(
+                {target for cart in carts for target in cart.pending_swaps}
+            )
+        return {
+            "uptime_s": round(time.time() - self._started_at, 1),
+            "carts": {cart.cart_code: self._cart_stats(cart) for cart in carts},
+            "unrouted_frames": dict(self._unrouted),
+            "pending_swaps": pending_swaps,
+        }
+
+    def _cart_stats(self, cart: CartPipeline) -> dict:
+        models = {}
+        for target, model in list(cart.models.items()):
+            models[target] = {
+                **cart.stats[target].snapshot(),
+                "target_fps": self.target_fps[target],
+                "tuning": model.get_tuning(),
+            }
+        if "obstacle" in models:
+            models["obstacle"]["cascade"] = dict(cart.models["obstacle"].cascade_stats)
+        if "product" in models:
+            models["product"]["reuse"] = cart.models["product"].get_reuse_stats()
+        stats = {
+            "session_id": cart.session_id,
+            "product_active": self._product_active(cart),
+            "ready": cart.ready,
+            "models": models,
+        }
+        if self.credit_window is not None:
+            stats["frame_credits"] = {
+                stream: {
+                    "available": self._available_credits(cart, stream),
+                    "advertised": count,
+                }
+                for stream, count in cart.credits_advertised.items()
+            }
+        return stats
+
+    def apply_tuning(self, target: str, params: dict) -> dict:
+        """
+        런타임 튜닝: target_fps는 서버 루프에, 나머지는 모든 카트의 모델에 적용
+        - 카트에 적용하기 전에 한 번 검증 (잘못된 값이면 어느 카트도 바꾸지 않음)
+        - 적용한 값은 target별로 합쳐 두고 이후 배정되는 카트에도 적용
+
+        Returns:
+            dict: 실제 적용된 값 (잘못된 값이면 ValueError / TypeError)
+        """
+        if target not in MODEL_TARGETS:
+            raise ValueError(f"Unknown model target: {target}")
+        if not isinstance(params, dict):
+            raise TypeError(f"params must be a dict: {type(params).__name__}")
+        params = dict(params)
+
+        target_fps = params.pop("target_fps", None)
+        if target_fps is not None:
+            target_fps = float(target_fps)
+            if target_fps <= 0:
+                raise ValueError(f"target_fps must be positive: {target_fps}")
+
+        applied = MODEL_CLASSES[target].parse_tuning(params) if params else {}
+        if applied:
+            with self._control_lock:
+                for cart in self.carts.values():
+                    if cart.ready:
+                        cart.models[target].apply_tuning(applied)
+                self._tuning[target] = self._merge_tuning(self._tuning[target], applied)
+        if target_fps is not None:
+            self.target_fps[target] = target_fps
+            applied["target_fps"] = target_fps
+        print(f"[AI Server] {target} tuning applied: {applied}")
+        return applied
+
+    @staticmethod
+    def _merge_tuning(current: dict, changes: dict) -> dict:
+        """튜닝 값 합치기 (risk / trigger 같은 하위 dict는 필드 단위로)"""
+        merged = dict(current)
+        for key, value in changes.items():
+            if isinstance(value, dict):
+                merged[key] = {**merged.get(key, {}), **value}
+            else:
+                merged[key] = value
+        return merged
+
+    def _pace(self, target: str, started: float) -> None:
+        """목표 처리율에 맞춰 남은 시간만큼 대기"""
+        remaining = 1.0 / self.target_fps[target] - (time.monotonic() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    # =========================
+    # UDP receive loops
+    # =========================
+    def _udp_loop(self, stream: str):
+        target = STREAM_TARGETS[stream]
+        print(f"{target.title()} UDP loop started.")
+        self._apply_budget(f"{target}_udp", {"cpus": self._runtime_cfg.get("io_cpus")})
+        receiver = self.receivers[stream]
+        for jpeg_bytes, capture_ts, source in receiver.receive_frames_from():
+            cart = self._route(stream, source[1])
+            if cart is None or not cart.ready:
+                self._unrouted[stream] += 1  # 맡지 않았거나 모델 로드 중인 카트
+                continue
+            if stream == CART_STREAM and not self._product_active(cart):
+                continue  # 세션 없음: 소켓만 비우고 프레임은 버림
+            with cart.frame_lock:
+                cart.latest[stream] = (jpeg_bytes, capture_ts)
+                cart.frame_pending[stream] = True
+                cart.stats[target].frame_received()
+
+    def _take_frame(self, cart: CartPipeline, stream: str, last_jpeg):
+        """추론할 새 프레임 (jpeg_bytes, capture_ts), 없으면 (None, None)"""
+        with cart.frame_lock:
+            latest = cart.latest[stream]
+            taken = latest is not None and latest[0] is not last_jpeg
+            if taken:
+                cart.stats[STREAM_TARGETS[stream]].frame_taken()
+                cart.frame_pending[stream] = False
+        if taken:
+            self._advertise_credits(cart, stream)  # 버퍼가 비었으니 다음 프레임 요청
+        return latest if latest is not None else (None, None)
+
+    # =========================
+    # Inference loops (카트마다 하나씩)
+    # =========================
+    def _obstacle_inference_loop(self, cart: CartPipeline):
+        print(f"{cart.cart_code} obstacle inference loop started.")
+        self._apply_budget(
+            f"{cart.cart_code}_obstacle_inference",
+            config.model.obstacle_detector.threads,
+        )
         last_sent_level = None  # Track last sent level to avoid redundant events
+        last_jpeg = None
 
-        while True:
-            with self._obstacle_lock:
-                jpeg = self._latest_obstacle_bytes
+        while not cart.closed:
+            self._apply_pending_changes(cart, "obstacle")
+            started = time.monotonic()
+            jpeg, capture_ts = self._take_frame(cart, FRONT_STREAM, last_jpeg)
 
             if jpeg is None:
                 time.sleep(0.1)
                 continue
 
+            # 같은 프레임을 다시 추론하지 않음 (위험도 dt가 0이 되는 것 방지)
+            if jpeg is last_jpeg:
+                time.sleep(0.005)
+                continue
+            last_jpeg = jpeg
+
             frame = self._decode(jpeg)
             if frame is None:
                 continue
 
-            result = self.obstacle_model.detect(frame)
+            result = cart.models["obstacle"].detect(frame, timestamp_s=capture_ts)
+            cart.stats["obstacle"].record(time.monotonic() - started)
             level = DangerLevel(result.get("level", 0))
 
             # Send event only when level changes (including SAFE transitions)
             # This prevents spamming the Main Hub with identical states
             if level != last_sent_level:
-                self._push_event(AIEvent.OBSTACLE_DANGER, result)
+                self._push_obstacle(cart, result, capture_ts)
                 last_sent_level = level
 
-            time.sleep(0.05)  # Control inference frequency
+            self._pace("obstacle", started)  # Control inference frequency
 
-    def _product_inference_loop(self):
-        print("Product inference loop started.")
-        while True:
-            with self._product_lock:
-                jpeg = self._latest_product_bytes
+    def _product_inference_loop(self, cart: CartPipeline):
+        print(f"{cart.cart_code} product inference loop started.")
+        self._apply_budget(
+            f"{cart.cart_code}_product_inference",
+            config.model.product_recognizer.threads,
+        )
+        frame_count = 0
+        last_jpeg = None
+        while not cart.closed:
+            self._apply_pending_changes(cart, "product")
+            if not self._product_active(cart):
+                time.sleep(0.2)
+                continue
+            started = time.monotonic()
+            jpeg, _ = self._take_frame(cart, CART_STREAM, last_jpeg)
+            last_jpeg = jpeg
 
             if jpeg is None:
                 time.sleep(0.1)
@@ -133,7 +782,16 @@ class AIServer:
                 continue
 
             # 모션 트리거 방식 사용 (카트에 넣는 순간만 감지)
-            result = self.product_model.recognize_with_trigger(frame, time.time())
+            model = cart.models["product"]
+            result = model.recognize_with_trigger(frame, time.time())
+            cart.stats["product"].record(time.monotonic() - started)
+
+            frame_count += 1
+            if frame_count % 100 == 0:
+                stats = model.get_reuse_stats()
+                print(
+                    f"[AI Server] {cart.cart_code} product inference: {stats['inferred']} inferred, {stats['reused']} reused (reuse ratio {stats['reuse_ratio']:.0%})"
+                )
 
             status = result.get("status")
             main_event = result.get("main_event")
@@ -144,18 +802,27 @@ class AIServer:
 
             # "added" 상태일 때만 이벤트 푸시 (추적 중에는 이벤트 안 보냄)
             if status == "added" and main_event:
-                product_id = main_event.get("product_id")
-                confidence = main_event.get("confidence", 0.0)
+                # 같은 프레임에 여러 상품/여러 개가 추가될 수 있음 (상품별 1 이벤트)
+                for event in result.get("added_events", [main_event]):
+                    product_id = event.get("product_id")
+                    confidence = event.get("confidence", 0.0)
+                    quantity = event.get("quantity", 1)
 
-                print(
-                    f"[AI Server] 🎉 Product ADDED: product_id={product_id}, confidence={confidence:.2f}, movement={main_event.get('movement', 0):.1f}px"
-                )
+                    print(
+                        f"[AI Server] 🎉 Product ADDED: product_id={product_id}, quantity={quantity}, confidence={confidence:.2f}"
+                    )
 
-                # 카트에 추가된 순간만 이벤트 푸시
-                self._push_event(
-                    AIEvent.PRODUCT_DETECTED,
-                    {"product_id": product_id, "confidence": confidence},
-                )
+                    # 카트에 추가된 순간만 이벤트 푸시
+                    self._push_event(
+                        cart,
+                        AIEvent.PRODUCT_DETECTED,
+                        {
+                            "product_id": product_id,
+                            "confidence": confidence,
+                            "quantity": quantity,
+                            "instance_ids": event.get("instance_ids", []),
+                        },
+                    )
             elif status == "tracking" and main_event:
                 # 추적 중 (디버그 로그)
                 product_id = main_event.get("product_id")
@@ -169,7 +836,7 @@ class AIServer:
                     )
                 # else: 아무것도 없음 (로그 안 함)
 
-            time.sleep(0.1)  # Control inference frequency
+            self._pace("product", started)  # Control inference frequency
 
     # =========================
     # Utilities
@@ -183,13 +850,63 @@ class AIServer:
             print(f"Error decoding frame: {e}")
             return None
 
+    # =========================
+    # Frame credits (AI → Main PC2)
+    # =========================
+    def _available_credits(self, cart: CartPipeline, stream: str) -> int:
+        """지금 받을 수 있는 프레임 수 (추론 전 프레임이 있으면 하나 적게, 상품 유휴면 0)"""
+        if stream == CART_STREAM and not self._product_active(cart):
+            return 0
+        return max(0, self.credit_window - int(cart.frame_pending[stream]))
+
+    def _advertise_credits(self, cart: CartPipeline, stream: str) -> None:
+        """Hub에 credit 광고 (실패해도 주기 광고가 다시 보냄)"""
+        if self.credit_window is None:
+            return
+        msg = Protocol.ai_event(
+            AIEvent.FRAME_CREDIT,
+            {
+                "stream": stream,
+                "credits": self._available_credits(cart, stream),
+                "cart_code": cart.cart_code,
+            },
+        )
+        if self.event_client.send_nowait(msg):
+            cart.credits_advertised[stream] += 1
+
+    def _credit_loop(self):
+        """주기 재광고: 유실된 광고/프레임으로 Hub 전달이 멈추지 않도록"""
+        while True:
+            for cart in self._ready_carts():
+                for stream in cart.frame_pending:
+                    self._advertise_credits(cart, stream)
+            time.sleep(self.credit_interval_s)
+
     # =========================
     # PUSH (AI → Main PC2)
     # =========================
-    def _push_event(self, event: AIEvent, data: dict):
+    def _push_obstacle(self, cart: CartPipeline, result: dict, capture_ts) -> None:
+        """
+        위험 단계 전환: 카트 UI에 알람을 먼저 직접 보내고 (fast path),
+        Hub에는 기록/분석용으로 같은 데이터 전송 (alarm_sent로 중복 알람 방지)
+        - 세션이 없으면 직접 알람을 보내지 않음 (Hub도 세션 없는 이벤트는 알람 없이 폐기)
+        """
+        data = dict(result, capture_ts=capture_ts)
+        if cart.alarm_client is not None and cart.session_id is not None:
+            msg = Protocol.ui_command(UICommand.SHOW_ALARM, alarm_content(data))
+            data[ALARM_SENT] = cart.alarm_client.send_oneshot(msg)
+            if not data[ALARM_SENT]:
+                print("Direct UI alarm failed, Main Hub will deliver it")
+        self._push_event(cart, AIEvent.OBSTACLE_DANGER, data)
+
+    def _push_event(self, cart: CartPipeline, event: AIEvent, data: dict):
+        if cart.closed:
+            return  # 다른 worker로 옮겨진 카트
         try:
-            msg = Protocol.ai_event(event, data)
-            self.event_client.send_request(msg)
+            msg = Protocol.ai_event(event, dict(data, cart_code=cart.cart_code))
+            # 응답을 기다리지 않고 스트리밍 (추론 루프가 Hub 왕복 시간만큼 멈추지 않도록)
+            if not self.event_client.send_nowait(msg):
+                print(f"Failed to push AI event: {event.name} not delivered")
         except Exception as e:
             print(f"Failed to push AI event: {e}")
 
@@ -199,15 +916,32 @@ class AIServer:
     def run(self):
         print("Starting AI Server threads...")
         threads = [
-            threading.Thread(target=self._obstacle_udp_loop, daemon=True),
-            threading.Thread(target=self._product_udp_loop, daemon=True),
-            threading.Thread(target=self._obstacle_inference_loop, daemon=True),
-            threading.Thread(target=self._product_inference_loop, daemon=True),
+            threading.Thread(target=self._udp_loop, args=(stream,), daemon=True)
+            for stream in self.receivers
         ]
+        with self._control_lock:
+            carts = list(self.carts.values())
+        cart_threads = [t for cart in carts for t in self._cart_threads(cart)]
 
-        for t in threads:
+        for t in threads + cart_threads:
             t.start()
 
+        # 스레드 레이아웃 리포트 (각 스레드가 설정을 적용할 때까지 잠시 대기)
+        deadline = time.time() + 5.0
+        while time.time() < deadline:
+            with self._layout_lock:
+                if len(self._thread_layout) >= len(threads) + len(cart_threads):
+                    break
+            time.sleep(0.05)
+        with self._layout_lock:
+            print(format_thread_report(self._process_threads, self._thread_layout))
+
+        if self.control_server is not None:
+            threading.Thread(target=self.control_server.start, daemon=True).start()
+
+        if self.credit_window is not None:
+            threading.Thread(target=self._credit_loop, daemon=True).start()
+
         print("AI Server is running.")
         # Keep main thread alive
         for t in threads:
@@ -215,4 +949,13 @@ class AIServer:
 
 
 if __name__ == "__main__":
-    AIServer().run()
+    parser = argparse.ArgumentParser(description="AI Server (PC1)")
+    parser.add_argument("--udp-port-front", type=int, help="Override pc1_ai port")
+    parser.add_argument("--udp-port-cart", type=int, help="Override pc1_ai port")
+    parser.add_argument("--control-port", type=int, help="Override pc1_ai port")
+    args = parser.parse_args()
+    AIServer(
+        udp_port_front=args.udp_port_front,
+        udp_port_cart=args.udp_port_cart,
+        control_port=args.control_port,
+    ).run()
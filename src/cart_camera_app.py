@@ -70,12 +70,13 @@ class CartEdgeApp:
 
         while self.is_running:
             ret, frame = cap.read()
+            capture_ts = time.time()
             if not ret:
                 time.sleep(interval)
                 continue
 
             frame = ImageProcessor.resize_for_ai(frame, resize_shape)
-            sender.send_frame(frame)
+            sender.send_frame(frame, capture_ts)
 
             time.sleep(interval)
 
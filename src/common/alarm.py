@@ -0,0 +1,49 @@
+# src/common/alarm.py
+"""
+Obstacle alarm content (UI SHOW_ALARM)
+- AI 서버 fast path (AI → UI 직접 전송)와 Hub(SmartCartEngine)가 같은 내용을 보내도록 공유
+- capture_ts: 프레임 캡처 시각 (epoch 초), UI가 glass-to-LED 지연 시간 계산에 사용
+"""
+
+from typing import Any, Dict, Optional
+
+from common.protocols import DangerLevel
+
+# AI 이벤트 data에 붙는 표시: AI 서버가 UI에 알람을 이미 보냈으면 True
+ALARM_SENT = "alarm_sent"
+
+
+def alarm_content(
+    data: Dict[str, Any], capture_ts: Optional[float] = None
+) -> Dict[str, Any]:
+    """장애물 결과(AI OBSTACLE_DANGER data) → SHOW_ALARM content"""
+    level = DangerLevel(data["level"])
+    highest_risk_obj = data.get("highest_risk_object")
+
+    content = {
+        "level": level.value,
+        "level_name": level.name,
+        "object_type": data.get("object_type", "UNKNOWN"),
+        "distance": data.get("distance", 1000),
+        "speed": data.get("speed", 0),
+        "direction": data.get("direction", "front"),
+    }
+
+    # Add risk details if available
+    if highest_risk_obj:
+        pttc_s = highest_risk_obj.get("pttc_s", 1e9)
+        content.update(
+            {
+                "track_id": highest_risk_obj.get("track_id", -1),
+                "pttc_s": round(pttc_s, 2) if pttc_s < 1e6 else None,
+                "risk_score": round(highest_risk_obj.get("score", 0.0), 2),
+                "in_center": highest_risk_obj.get("in_center", False),
+                "approaching": highest_risk_obj.get("approaching", False),
+                "class_name": highest_risk_obj.get("class_name", "unknown"),
+            }
+        )
+
+    capture_ts = data.get("capture_ts", capture_ts)
+    if capture_ts is not None:
+        content["capture_ts"] = capture_ts
+    return content
@@ -0,0 +1,314 @@
+# src/common/codec.py
+"""
+TCP control message encoding
+- JSON: 기본 인코딩 (모든 버전이 읽을 수 있음)
+- Binary: MessagePack 형식 (Protocol.BINARY_VERSION 이상인 상대에게만 전송)
+  첫 바이트 BINARY_MARKER(0xC1)로 구분 → 수신 측은 협상 없이 두 형식 모두 해석
+  (0xC1은 MessagePack에서 사용하지 않는 코드이고 UTF-8 JSON의 첫 바이트도 될 수 없음)
+- 인코딩은 내장 구현, 디코딩은 msgpack 패키지(C 확장)가 있으면 사용 (없으면 내장 구현)
+
+JSON과 같은 값 규칙: dict key는 문자열로 변환, tuple은 list,
+표현할 수 없는 값(64bit 범위를 넘는 정수)이 있으면 그 메시지만 JSON으로 전송
+"""
+
+import json
+import struct
+from typing import Any, Tuple
+
+BINARY_MARKER = 0xC1
+
+_BB = struct.Struct(">BB")
+_BH = struct.Struct(">BH")
+_BI = struct.Struct(">BI")
+_BQ = struct.Struct(">BQ")
+_Bb = struct.Struct(">Bb")
+_Bh = struct.Struct(">Bh")
+_Bi = struct.Struct(">Bi")
+_Bq = struct.Struct(">Bq")
+_Bd = struct.Struct(">Bd")
+
+
+def _msgpack():
+    """msgpack은 선택 의존성 (없는 환경에서도 동작)"""
+    try:
+        import msgpack
+
+        return msgpack
+    except ImportError:
+        return None
+
+
+_MSGPACK = _msgpack()
+
+
+def backend() -> str:
+    """바이너리 디코딩 구현 이름 (benchmark / 로그용)"""
+    return "msgpack" if _MSGPACK is not None else "builtin"
+
+
+def is_binary(payload: bytes) -> bool:
+    return len(payload) > 0 and payload[0] == BINARY_MARKER
+
+
+def encode(data: Any, binary: bool = False) -> bytes:
+    """
+    메시지 → payload bytes
+
+    :raises TypeError / ValueError: JSON으로도 직렬화할 수 없는 값
+    """
+    if binary:
+        out = bytearray(b"\xc1")
+        try:
+            _pack(data, out)
+            return bytes(out)
+        except OverflowError:
+            pass  # 64bit를 넘는 정수: JSON은 표현 가능
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def decode(payload: bytes) -> Any:
+    """
+    payload bytes → 메시지 (형식은 첫 바이트로 판단)
+
+    :raises ValueError: 손상되었거나 잘린 payload
+    """
+    if not is_binary(payload):
+        return json.loads(payload.decode("utf-8"))
+    if _MSGPACK is not None:
+        try:
+            return _MSGPACK.unpackb(
+                memoryview(payload)[1:], raw=False, strict_map_key=False
+            )
+        except Exception as e:
+            raise ValueError(f"Invalid binary message: {e}") from e
+    try:
+        value, pos = _unpack(payload, 1)
+    except (IndexError, struct.error, TypeError) as e:
+        raise ValueError(f"Invalid binary message: {e}") from e
+    if pos != len(payload):
+        raise ValueError(f"Extra data after binary message: {len(payload) - pos} bytes")
+    return value
+
+
+# =========================
+# Encoder (MessagePack)
+# =========================
+def _pack_str(value: str, out: bytearray) -> None:
+    raw = value.encode("utf-8")
+    n = len(raw)
+    if n < 32:
+        out.append(0xA0 | n)
+    elif n < 0x100:
+        out += _BB.pack(0xD9, n)
+    elif n < 0x10000:
+        out += _BH.pack(0xDA, n)
+    else:
+        out += _BI.pack(0xDB, n)
+    out += raw
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xFF)
+    elif value >= 0:
+        if value < 0x100:
+            out += _BB.pack(0xCC, value)
+        elif value < 0x10000:
+            out += _BH.pack(0xCD, value)
+        elif value < 0x100000000:
+            out += _BI.pack(0xCE, value)
+        elif value < 0x10000000000000000:
+            out += _BQ.pack(0xCF, value)
+        else:
+            raise OverflowError(f"int too large for binary encoding: {value}")
+    elif value >= -0x80:
+        out += _Bb.pack(0xD0, value)
+    elif value >= -0x8000:
+        out += _Bh.pack(0xD1, value)
+    elif value >= -0x80000000:
+        out += _Bi.pack(0xD2, value)
+    elif value >= -0x8000000000000000:
+        out += _Bq.pack(0xD3, value)
+    else:
+        raise OverflowError(f"int too large for binary encoding: {value}")
+
+
+def _pack_len(n: int, fix: int, tag16: int, out: bytearray) -> None:
+    """array/map 길이 header (tag32 = tag16 + 1)"""
+    if n < 16:
+        out.append(fix | n)
+    elif n < 0x10000:
+        out += _BH.pack(tag16, n)
+    else:
+        out += _BI.pack(tag16 + 1, n)
+
+
+def _json_key(key: Any) -> str:
+    """json.dumps와 같은 dict key 변환"""
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, int):
+        return str(int(key))
+    if isinstance(key, float):
+        return json.dumps(key)
+    raise TypeError(
+        f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+    )
+
+
+def _pack(obj: Any, out: bytearray) -> None:
+    t = type(obj)
+    if t is str:
+        _pack_str(obj, out)
+    elif obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif t is int:
+        _pack_int(obj, out)
+    elif t is float:
+        out += _Bd.pack(0xCB, obj)
+    elif t is dict:
+        _pack_len(len(obj), 0x80, 0xDE, out)
+        for key, value in obj.items():
+            _pack_str(key if type(key) is str else _json_key(key), out)
+            _pack(value, out)
+    elif t is list or t is tuple:
+        _pack_len(len(obj), 0x90, 0xDC, out)
+        for value in obj:
+            _pack(value, out)
+    # 하위 클래스 (IntEnum, str Enum 등): json.dumps와 같은 값으로
+    elif isinstance(obj, str):
+        _pack_str(str.__str__(obj), out)
+    elif isinstance(obj, int):
+        _pack_int(int(obj), out)
+    elif isinstance(obj, float):
+        out += _Bd.pack(0xCB, float(obj))
+    elif isinstance(obj, dict):
+        _pack(dict(obj), out)
+    elif isinstance(obj, (list, tuple)):
+        _pack(list(obj), out)
+    else:
+        raise TypeError(f"Object of type {t.__name__} is not serializable")
+
+
+# =========================
+# Decoder (MessagePack)
+# =========================
+def _unpack(buf: bytes, pos: int) -> Tuple[Any, int]:
+    tag = buf[pos]
+    pos += 1
+    if tag < 0x80:
+        return tag, pos
+    if tag >= 0xE0:
+        return tag - 0x100, pos
+    if 0xA0 <= tag <= 0xBF:
+        end = pos + (tag & 0x1F)
+        return _text(buf, pos, end), end
+    if 0x80 <= tag <= 0x8F:
+        return _unpack_map(buf, pos, tag & 0x0F)
+    if 0x90 <= tag <= 0x9F:
+        return _unpack_array(buf, pos, tag & 0x0F)
+
+    if tag == 0xC0:
+        return None, pos
+    if tag == 0xC2:
+        return False, pos
+    if tag == 0xC3:
+        return True, pos
+    if tag == 0xCB:
+        return struct.unpack_from(">d", buf, pos)[0], pos + 8
+    if tag == 0xCA:
+        return struct.unpack_from(">f", buf, pos)[0], pos + 4
+
+    fmt = _FIXED.get(tag)
+    if fmt is not None:
+        return struct.unpack_from(fmt[0], buf, pos)[0], pos + fmt[1]
+
+    sized = _SIZED.get(tag)
+    if sized is None:
+        raise ValueError(f"Unsupported binary type tag: 0x{tag:02x}")
+    kind, fmt, width = sized
+    n = struct.unpack_from(fmt, buf, pos)[0]
+    pos += width
+    if kind == "str":
+        return _text(buf, pos, pos + n), pos + n
+    if kind == "bin":
+        if pos + n > len(buf):
+            raise ValueError("Truncated binary message")
+        return bytes(buf[pos : pos + n]), pos + n
+    if kind == "map":
+        return _unpack_map(buf, pos, n)
+    return _unpack_array(buf, pos, n)
+
+
+_FIXED = {
+    0xCC: (">B", 1),
+    0xCD: (">H", 2),
+    0xCE: (">I", 4),
+    0xCF: (">Q", 8),
+    0xD0: (">b", 1),
+    0xD1: (">h", 2),
+    0xD2: (">i", 4),
+    0xD3: (">q", 8),
+}
+
+_SIZED = {
+    0xD9: ("str", ">B", 1),
+    0xDA: ("str", ">H", 2),
+    0xDB: ("str", ">I", 4),
+    0xC4: ("bin", ">B", 1),
+    0xC5: ("bin", ">H", 2),
+    0xC6: ("bin", ">I", 4),
+    0xDC: ("array", ">H", 2),
+    0xDD: ("array", ">I", 4),
+    0xDE: ("map", ">H", 2),
+    0xDF: ("map", ">I", 4),
+}
+
+
+_KEY_CACHE = {}  # fixstr 인코딩 bytes → str
+
+
+def _text(buf: bytes, start: int, end: int) -> str:
+    if end > len(buf):
+        raise ValueError("Truncated binary message")
+    return buf[start:end].decode("utf-8")
+
+
+def _unpack_map(buf: bytes, pos: int, n: int) -> Tuple[dict, int]:
+    out = {}
+    for _ in range(n):
+        tag = buf[pos]
+        if 0xA0 <= tag <= 0xBF:
+            # 짧은 key (대부분): 같은 key가 메시지마다 반복되므로 캐시
+            end = pos + 1 + (tag & 0x1F)
+            raw = buf[pos:end]
+            key = _KEY_CACHE.get(raw)
+            if key is None:
+                key = _text(buf, pos + 1, end)
+                if len(_KEY_CACHE) < 1024:
+                    _KEY_CACHE[raw] = key
+            pos = end
+        else:
+            key, pos = _unpack(buf, pos)
+        out[key], pos = _unpack(buf, pos)
+    return out, pos
+
+
+def _unpack_array(buf: bytes, pos: int, n: int) -> Tuple[list, int]:
+    out = []
+    for _ in range(n):
+        value, pos = _unpack(buf, pos)
+        out.append(value)
+    return out, pos
@@ -40,31 +40,79 @@ class DetectorConfig(BaseModel):
     danger_threshold_low: Optional[float] = None
     danger_threshold_high: Optional[float] = None
     risk: Optional[Dict[str, Any]] = None  # Risk engine configuration (obstacle_v2)
+    schedule: Optional[Dict[str, Any]] = None  # Detect-every-N-frames scheduling
+    cascade: Optional[Dict[str, Any]] = None  # Light/full model cascade
+    trigger: Optional[Dict[str, Any]] = None  # Product add trigger (evidence/duration)
+    reuse: Optional[Dict[str, Any]] = None  # Static-frame result reuse
+    fast_postprocess: Optional[bool] = None  # Raw output + NumPy NMS path
+    parity_frames: Optional[str] = None  # Recorded frames checked before fast path
+    device: Optional[str] = None  # ultralytics device ("0", "cpu"; None = auto)
+    imgsz: Optional[int] = None  # Input size (None = size the model was trained at)
+    threads: Optional[Dict[str, Any]] = None  # torch_threads / cpus per detector
 
 
 class ModelConfig(BaseModel):
     obstacle_detector: DetectorConfig
     product_recognizer: DetectorConfig
+    runtime: Optional[Dict[str, Any]] = None  # Process-wide thread settings
 
 
 class PC1Config(BaseModel):
     ip: str
     udp_port_front: int
     udp_port_cart: int
+    control_port: Optional[int] = None  # Model swap / status commands
+    ui_alarm_direct: bool = False  # Send obstacle alarms straight to the UI
+    frame_credits: Optional[Dict[str, Any]] = None  # Frame flow control credits
+
+
+class CartConfig(BaseModel):
+    cart_code: str
+    ui_ip: str
+    ui_port: int
+    udp_front_cam_port: Optional[int] = None  # Hub camera ports for this cart
+    udp_cart_cam_port: Optional[int] = None
+
+
+class AIWorkerConfig(BaseModel):
+    name: str  # Fixes the worker's position on the hash ring
+    ip: str
+    udp_port_front: int
+    udp_port_cart: int
+    control_port: Optional[int] = None  # Health checks / cart assignment
+    max_carts: Optional[int] = None  # Carts served at once (one model set per cart)
+
+
+class FrameSubscriberConfig(BaseModel):
+    name: str
+    stream: str  # "front" | "cart"
+    cart_code: Optional[str] = None  # Defaults to pc2_main.cart_code
+    host: str
+    port: int
+    max_fps: Optional[float] = None
+    max_queue: int = 1
+    overflow: str = "drop_oldest"  # drop_oldest | drop_newest
 
 
 class PC2Config(BaseModel):
     ip: str
-    cart_code: str
+    cart_code: str  # Default cart (messages without a cart_code)
     event_port: int
     ui_port: int
     udp_front_cam_port: int
     udp_cart_cam_port: int
+    tcp_server: Optional[Dict[str, Any]] = None  # TCPServer worker/connection limits
+    event_pipeline: Optional[Dict[str, Any]] = None  # AI event queue / overflow policy
+    carts: Optional[List[CartConfig]] = None  # Carts served by this hub (UI endpoints)
+    frame_subscribers: Optional[List[FrameSubscriberConfig]] = None  # Frame fan-out
+    ai_workers: Optional[List[AIWorkerConfig]] = None  # AI server pool (else pc1_ai)
+    ai_pool: Optional[Dict[str, Any]] = None  # Health check / hashing options
 
 
 class PC3Config(BaseModel):
     ip: str
     ui_port: int
+    cart_code: Optional[str] = None  # This UI's cart (defaults to pc2_main.cart_code)
 
 
 class NetworkConfig(BaseModel):
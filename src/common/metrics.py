@@ -0,0 +1,69 @@
+# src/common/metrics.py
+"""
+Inference loop statistics
+- 프레임별 추론 지연 시간 분포 (최근 window개 기준 percentile)
+- 달성 fps (최근 완료 시각 기준)
+- 수신/처리/생략 프레임 수 (최신 프레임만 유지하는 버퍼에서 덮어쓴 프레임 = 생략)
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class LoopStats:
+    def __init__(self, window: int = 500) -> None:
+        self._lock = threading.Lock()
+        self._latency_s = deque(maxlen=window)
+        self._done_at = deque(maxlen=window)
+        self.received = 0
+        self.processed = 0
+        self.skipped = 0
+        self._taken_at = 0  # 마지막으로 가져간 프레임의 수신 번호
+
+    def frame_received(self) -> None:
+        """수신 스레드: 최신 프레임 버퍼를 갱신할 때 호출"""
+        with self._lock:
+            self.received += 1
+
+    def frame_taken(self) -> None:
+        """추론 스레드: 새 프레임을 가져갈 때 호출 (그 사이 덮어쓴 프레임은 생략)"""
+        with self._lock:
+            self.skipped += max(0, self.received - self._taken_at - 1)
+            self._taken_at = self.received
+
+    def record(self, latency_s: float, now: Optional[float] = None) -> None:
+        """추론 1회 완료 (decode + 추론 시간)"""
+        with self._lock:
+            self.processed += 1
+            self._latency_s.append(latency_s)
+            self._done_at.append(time.monotonic() if now is None else now)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latency_ms = np.asarray(self._latency_s, dtype=np.float64) * 1000.0
+            done_at = list(self._done_at)
+            out = {
+                "received": self.received,
+                "processed": self.processed,
+                "skipped": self.skipped,
+                "pending_frames": self.received - self._taken_at,
+            }
+
+        if len(latency_ms):
+            p50, p90, p99 = np.percentile(latency_ms, [50, 90, 99])
+            out["latency_ms"] = {
+                "p50": round(float(p50), 2),
+                "p90": round(float(p90), 2),
+                "p99": round(float(p99), 2),
+                "max": round(float(latency_ms.max()), 2),
+            }
+        else:
+            out["latency_ms"] = None
+
+        span = done_at[-1] - done_at[0] if len(done_at) >= 2 else 0.0
+        out["fps"] = round((len(done_at) - 1) / span, 2) if span > 0 else 0.0
+        return out
@@ -1,7 +1,9 @@
 import time
 import json
 from enum import IntEnum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
+
+from common import codec
 
 
 # =========================
@@ -11,6 +13,7 @@ class MessageType(IntEnum):
     AI_REQ = 1
     AI_RES = 2
     AI_EVT = 3
+    AI_CTRL = 4
 
     UI_REQ = 10
     UI_CMD = 11
@@ -49,6 +52,17 @@ class DBAction(IntEnum):
 class AIEvent(IntEnum):
     OBSTACLE_DANGER = 1
     PRODUCT_DETECTED = 2
+    FRAME_CREDIT = 3  # 스트림별 프레임 credit 광고 (network/flow_control.py)
+
+
+class AIControl(IntEnum):
+    SWAP_MODEL = 1
+    MODEL_STATUS = 2
+    GET_STATS = 3
+    TUNE = 4
+    SESSION_START = 5
+    SESSION_END = 6
+    ASSIGN_CART = 7  # Hub → AI worker: 맡을 카트 / 진행 중 세션 / UI 주소
 
 
 class DangerLevel(IntEnum):
@@ -69,11 +83,22 @@ class DangerLevel(IntEnum):
 # =========================
 class Protocol:
     """
-    System-wide JSON control protocol (TCP only)
+    System-wide control protocol (TCP only)
     Binary data (image/frame) is NOT allowed.
+
+    Versions:
+    - 1: JSON only
+    - 2: JSON + binary (MessagePack) encoding, see common/codec.py
+    header.version은 보낸 쪽이 해석할 수 있는 최고 버전 → 상대가 인코딩 선택에 사용
     """
 
-    VERSION = 1
+    VERSION = 2
+    BINARY_VERSION = 2  # 바이너리 인코딩을 해석할 수 있는 최소 버전
+    SUPPORTED_VERSIONS = (1, 2)
+
+    # 선택 header 필드 (TCPClient pipelining)
+    REQUEST_ID = "request_id"  # 응답 header에 그대로 돌려줌 (요청-응답 매칭)
+    NO_REPLY = "no_reply"  # True면 서버는 응답을 만들지도 보내지도 않음
 
     # -------------------------
     # Core
@@ -127,6 +152,16 @@ class Protocol:
             },
         )
 
+    @staticmethod
+    def ai_control(command: AIControl, data: Dict[str, Any]) -> Dict[str, Any]:
+        return Protocol._base_message(
+            MessageType.AI_CTRL,
+            {
+                "command": int(command),
+                "data": data,
+            },
+        )
+
     # =========================
     # UI
     # =========================
@@ -187,21 +222,27 @@ class Protocol:
 
         return Protocol._base_message(MessageType.DB_RES, payload)
 
+    @staticmethod
+    def supports_binary(version: Any) -> bool:
+        """상대가 알린 header.version으로 바이너리 인코딩 사용 가능 여부 판단"""
+        return isinstance(version, int) and version >= Protocol.BINARY_VERSION
+
     # =========================
     # Parsing & Validation
     # =========================
     @staticmethod
-    def parse(raw_json: str) -> Dict[str, Any]:
+    def parse(raw: Union[str, bytes]) -> Dict[str, Any]:
         """
-        Parses and validates a JSON message string.
+        Parses and validates a JSON message string or an encoded payload
+        (JSON or binary bytes).
 
-        :raises ValueError: If JSON is malformed or protocol validation fails.
+        :raises ValueError: If the message is malformed or protocol validation fails.
         :return: The parsed message as a dictionary.
         """
         try:
-            message = json.loads(raw_json)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON format: {e}")
+            message = json.loads(raw) if isinstance(raw, str) else codec.decode(raw)
+        except ValueError as e:
+            raise ValueError(f"Invalid message format: {e}") from e
 
         if not Protocol.validate(message):
             raise ValueError("Message failed protocol validation.")
@@ -220,7 +261,7 @@ class Protocol:
                 isinstance(header, dict)
                 and isinstance(payload, dict)
                 and isinstance(header.get("type"), int)
-                and header["version"] == Protocol.VERSION
+                and header["version"] in Protocol.SUPPORTED_VERSIONS
             )
         except Exception:
             return False
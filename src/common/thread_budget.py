@@ -0,0 +1,109 @@
+# src/common/thread_budget.py
+"""
+Thread / CPU budgeting (한 프로세스에서 여러 모델 동시 실행)
+- 프로세스 단위: OpenCV 스레드 풀 크기, torch inter-op 스레드 수
+- 추론 스레드 단위: CPU affinity + torch intra-op 스레드 수
+  (Linux sched_setaffinity(0, ...)는 호출한 스레드에만 적용되고,
+   이후 생성되는 워커 스레드가 mask를 상속)
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import cv2
+
+
+def _torch():
+    """torch는 ultralytics 의존성 (없는 환경에서도 동작)"""
+    try:
+        import torch
+
+        return torch
+    except ImportError:
+        return None
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def apply_process_budget(runtime_cfg: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    프로세스 공통 설정 적용 (모델 로드 전에 한 번 호출)
+
+    runtime_cfg keys: opencv_threads, torch_interop_threads
+    """
+    runtime_cfg = runtime_cfg or {}
+
+    opencv_threads = runtime_cfg.get("opencv_threads")
+    if opencv_threads is not None:
+        cv2.setNumThreads(int(opencv_threads))
+
+    torch = _torch()
+    interop = runtime_cfg.get("torch_interop_threads")
+    if torch is not None and interop is not None:
+        try:
+            torch.set_num_interop_threads(int(interop))
+        except RuntimeError as e:
+            # 이미 병렬 작업이 시작된 뒤에는 변경 불가
+            print(f"[ThreadBudget] torch inter-op threads unchanged: {e}")
+
+    return {
+        "cpus": available_cpus(),
+        "opencv_threads": cv2.getNumThreads(),
+        "torch_interop_threads": (
+            torch.get_num_interop_threads() if torch is not None else None
+        ),
+    }
+
+
+def apply_thread_budget(
+    name: str,
+    torch_threads: Optional[int] = None,
+    cpus: Optional[Iterable[int]] = None,
+) -> Dict[str, Any]:
+    """
+    호출한 스레드를 지정 CPU에 고정하고 torch intra-op 스레드 수 설정
+
+    Returns:
+        dict: 실제 적용된 레이아웃 {"name", "thread", "cpus", "torch_threads"}
+    """
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        allowed = set(available_cpus())
+        wanted = set(int(c) for c in cpus) & allowed
+        if wanted:
+            os.sched_setaffinity(0, wanted)
+        else:
+            print(f"[ThreadBudget] {name}: none of cpus {list(cpus)} available")
+
+    torch = _torch()
+    if torch is not None and torch_threads is not None:
+        torch.set_num_threads(int(torch_threads))
+
+    return {
+        "name": name,
+        "thread": threading.current_thread().name,
+        "cpus": available_cpus(),
+        "torch_threads": torch.get_num_threads() if torch is not None else None,
+    }
+
+
+def format_thread_report(process: Dict[str, Any], layout: List[Dict[str, Any]]) -> str:
+    """시작 시 출력할 스레드 레이아웃 리포트"""
+    lines = [
+        "=" * 60,
+        "Thread layout",
+        f"  process cpus      : {process['cpus']}",
+        f"  opencv threads    : {process['opencv_threads']}",
+        f"  torch inter-op    : {process['torch_interop_threads']}",
+    ]
+    for entry in layout:
+        lines.append(
+            f"  {entry['name']:<18}: cpus={entry['cpus']} "
+            f"torch_threads={entry['torch_threads']} ({entry['thread']})"
+        )
+    lines.append("=" * 60)
+    return "\n".join(lines)
@@ -0,0 +1,16 @@
+# src/common/tuning.py
+"""
+Runtime tuning value parsing
+- AI 서버 control 포트(TUNE)로 받은 값을 모델 설정 필드 타입으로 변환 (JSON/MessagePack 숫자)
+"""
+
+from typing import Any
+
+
+def to_int(value: Any) -> int:
+    """정수 필드 값 변환 (2.5처럼 정수가 아닌 값은 잘라내지 않고 ValueError)"""
+    if isinstance(value, bool):
+        raise TypeError("expected an integer, got bool")
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError("expected an integer")
+    return int(value)
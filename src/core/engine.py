@@ -1,7 +1,8 @@
 # src/core/engine.py
 import time
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+from common.alarm import ALARM_SENT, alarm_content
 from common.protocols import DangerLevel, Protocol, UICommand
 from database.obstacle_log_dao import ObstacleLogDAO
 from database.product_dao import ProductDAO
@@ -36,85 +37,54 @@ class SmartCartEngine:
         # State for product de-duplication
         self._last_product_id: Optional[int] = None
         self._last_product_ts: float = 0.0
+        # {(product_id, instance_id): timestamp} - 물체 단위 중복 방지
+        self._recent_instances: Dict[Tuple[int, int], float] = {}
 
     def process_obstacle_event(self, data: dict, session_id: int):
         """
         Processes an obstacle danger event from the AI.
         Now supports advanced tracking and risk assessment from obstacle_v2.
+        - UI 알람을 먼저 보내고 DB 기록은 그 뒤 (DB 왕복이 알람 지연에 포함되지 않도록)
+        - AI 서버가 UI에 직접 알람을 보냈으면(alarm_sent) 상태만 갱신하고 기록
         """
         level = DangerLevel(data["level"])
 
-        # Extract detailed information from new algorithm
-        object_type = data.get("object_type", "UNKNOWN")
-        distance = data.get("distance", 1000)
-        speed = data.get("speed", 0)
-        direction = data.get("direction", "front")
-
-        # New fields from risk_engine
-        highest_risk_obj = data.get("highest_risk_object")
-        track_id = highest_risk_obj.get("track_id", -1) if highest_risk_obj else -1
-        pttc_s = highest_risk_obj.get("pttc_s", 1e9) if highest_risk_obj else 1e9
-        risk_score = highest_risk_obj.get("score", 0.0) if highest_risk_obj else 0.0
-        in_center = (
-            highest_risk_obj.get("in_center", False) if highest_risk_obj else False
-        )
-        approaching = (
-            highest_risk_obj.get("approaching", False) if highest_risk_obj else False
-        )
+        # 1. Check if level changed (send update to UI on any change)
+        if level != self.last_obstacle_level:
+            self.last_obstacle_level = level
+            if not data.get(ALARM_SENT):
+                self._send_alarm(data, level)
 
-        # 1. Log event to database with enhanced tracking info
+        # 2. Log event to database with enhanced tracking info
+        highest_risk_obj = data.get("highest_risk_object") or {}
         self.obstacle_dao.log_obstacle(
             session_id=session_id,
-            object_type=object_type,
-            distance=distance,
-            speed=speed,
-            direction=direction,
+            object_type=data.get("object_type", "UNKNOWN"),
+            distance=data.get("distance", 1000),
+            speed=data.get("speed", 0),
+            direction=data.get("direction", "front"),
             is_warning=level >= DangerLevel.CAUTION,
-            track_id=track_id,
-            pttc_s=pttc_s,
-            risk_score=risk_score,
-            in_center=in_center,
-            approaching=approaching,
+            track_id=highest_risk_obj.get("track_id", -1),
+            pttc_s=highest_risk_obj.get("pttc_s", 1e9),
+            risk_score=highest_risk_obj.get("score", 0.0),
+            in_center=highest_risk_obj.get("in_center", False),
+            approaching=highest_risk_obj.get("approaching", False),
         )
 
-        # 2. Check if level changed (send update to UI on any change)
-        if level == self.last_obstacle_level:
-            return
-        self.last_obstacle_level = level
-
-        # 3. Send status update to UI (including SAFE state to reset LED)
+    def _send_alarm(self, data: dict, level: DangerLevel):
+        # Send status update to UI (including SAFE state to reset LED)
         # Always send update when level changes, even when returning to SAFE
-        # Prepare detailed alert message
-        alert_data = {
-            "level": level.value,
-            "level_name": level.name,
-            "object_type": object_type,
-            "distance": distance,
-            "speed": speed,
-            "direction": direction,
-        }
-
-        # Add risk details if available
-        if highest_risk_obj:
-            alert_data.update(
-                {
-                    "track_id": track_id,
-                    "pttc_s": round(pttc_s, 2) if pttc_s < 1e6 else None,
-                    "risk_score": round(risk_score, 2),
-                    "in_center": in_center,
-                    "approaching": approaching,
-                    "class_name": highest_risk_obj.get("class_name", "unknown"),
-                }
-            )
-
+        alert_data = alarm_content(data)
         msg = Protocol.ui_command(UICommand.SHOW_ALARM, alert_data)
-        self.ui_client.send_request(msg)
+        self.ui_client.send_oneshot(msg)
 
+        object_type = alert_data["object_type"]
+        pttc_s = alert_data.get("pttc_s")
         if level >= DangerLevel.CAUTION:
             print(
                 f"[Engine] Obstacle alert sent: level={level.name}, object={object_type}, "
-                f"track_id={track_id}, pTTC={pttc_s:.2f}s"
-                if pttc_s < 1e6
+                f"track_id={alert_data.get('track_id', -1)}, pTTC={pttc_s:.2f}s"
+                if pttc_s is not None
                 else f"[Engine] Obstacle alert sent: level={level.name}, object={object_type}"
             )
         else:
@@ -123,12 +93,20 @@ class SmartCartEngine:
     def process_product_event(self, data: dict, session_id: int):
         """Processes a product detection event from the AI."""
         product_id = data["product_id"]
+        quantity = int(data.get("quantity", 1))
+        instance_ids = data.get("instance_ids")
         print(
-            f"[Engine] Product event received: product_id={product_id}, confidence={data.get('confidence', 'N/A')}"
+            f"[Engine] Product event received: product_id={product_id}, quantity={quantity}, confidence={data.get('confidence', 'N/A')}"
         )
 
         # 1. Debounce product detection
-        if not self._is_new_product_detection(product_id):
+        if instance_ids:
+            # 물체별로 추적된 이벤트: 이미 반영된 물체만 제외
+            quantity = self._count_new_instances(product_id, instance_ids)
+            if quantity == 0:
+                print("[Engine] Duplicate instances ignored")
+                return
+        elif not self._is_new_product_detection(product_id):
             print(
                 f"[Engine] Duplicate detection ignored (within {self.DUPLICATE_PRODUCT_INTERVAL_SEC}s)"
             )
@@ -148,9 +126,9 @@ class SmartCartEngine:
         self.tx_dao.add_cart_item(
             session_id=session_id,
             product_id=product_id,
-            quantity=1,
+            quantity=quantity,
         )
-        print(f"[Engine] Item added to cart (session_id={session_id})")
+        print(f"[Engine] Item added to cart x{quantity} (session_id={session_id})")
 
         # 4. Get updated cart and send to UI
         cart_items = self.tx_dao.list_cart_items(session_id)
@@ -163,7 +141,7 @@ class SmartCartEngine:
             UICommand.UPDATE_CART, {"items": cart_items, "total": total}
         )
         print("[Engine] Sending UPDATE_CART to UI...")
-        self.ui_client.send_request(msg)
+        self.ui_client.send_oneshot(msg)
         print("[Engine] UPDATE_CART sent successfully")
 
     def _is_new_product_detection(self, product_id: int) -> bool:
@@ -182,6 +160,24 @@ class SmartCartEngine:
         self._last_product_ts = now
         return True
 
+    def _count_new_instances(self, product_id: int, instance_ids: List[int]) -> int:
+        """Counts instances not yet applied within the duplicate interval."""
+        now = time.time()
+        self._recent_instances = {
+            key: ts
+            for key, ts in self._recent_instances.items()
+            if (now - ts) < self.DUPLICATE_PRODUCT_INTERVAL_SEC
+        }
+
+        new_count = 0
+        for instance_id in instance_ids:
+            key = (product_id, int(instance_id))
+            if key in self._recent_instances:
+                continue
+            self._recent_instances[key] = now
+            new_count += 1
+        return new_count
+
     def update_item_quantity(self, session_id: int, product_id: int, quantity: int):
         """Update quantity of a specific product in cart"""
         print(
@@ -198,7 +194,7 @@ class SmartCartEngine:
         msg = Protocol.ui_command(
             UICommand.UPDATE_CART, {"items": cart_items, "total": total}
         )
-        self.ui_client.send_request(msg)
+        self.ui_client.send_oneshot(msg)
         print("[Engine] Quantity updated, cart refreshed")
 
     def remove_cart_item(self, session_id: int, product_id: int):
@@ -215,7 +211,7 @@ class SmartCartEngine:
         msg = Protocol.ui_command(
             UICommand.UPDATE_CART, {"items": cart_items, "total": total}
         )
-        self.ui_client.send_request(msg)
+        self.ui_client.send_oneshot(msg)
         print("[Engine] Item removed, cart refreshed")
 
     def reset(self) -> None:
@@ -223,3 +219,4 @@ class SmartCartEngine:
         self.last_obstacle_level = DangerLevel.NORMAL
         self._last_product_id = None
         self._last_product_ts = 0.0
+        self._recent_instances.clear()
@@ -0,0 +1,184 @@
+# src/core/event_pipeline.py
+"""
+Asynchronous, ordered event pipeline (Main Hub)
+- AI 이벤트를 세션별 FIFO 큐에 넣고 바로 반환 (TCP handler가 DB/UI 왕복을 기다리지 않음)
+- 고정 크기 worker pool이 처리, 세션별로는 한 번에 하나씩 (세션 내 이벤트 순서 유지)
+- 세션 큐가 max_queue에 도달했을 때 overflow 정책:
+  - block: 자리가 날 때까지 대기 (block_timeout_s 초과 시 새 이벤트 폐기)
+  - drop_oldest: 큐에서 가장 오래된 drop 가능 이벤트 폐기
+  - drop_newest: 새 이벤트 폐기
+  critical 이벤트(장애물 위험 단계 전환)는 정책과 무관하게 폐기하지 않음
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from common.metrics import LoopStats
+
+
+class _Event:
+    __slots__ = ("critical", "data", "enqueued_at", "kind")
+
+    def __init__(self, kind: Any, data: dict, critical: bool) -> None:
+        self.kind = kind
+        self.data = data
+        self.critical = critical
+        self.enqueued_at = time.monotonic()
+
+
+class EventPipeline:
+    OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+    def __init__(
+        self,
+        handler: Callable[[Any, Any, dict], None],
+        max_workers: int = 2,
+        max_queue: int = 256,
+        overflow: str = "block",
+        block_timeout_s: float = 5.0,
+    ):
+        """
+        Args:
+            handler: handler(session_id, kind, data), worker 스레드에서 호출
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}' "
+                f"(expected one of {self.OVERFLOW_POLICIES})"
+            )
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.block_timeout_s = block_timeout_s
+
+        self._cond = threading.Condition()
+        self._queues: Dict[Any, Deque[_Event]] = {}
+        self._ready: Deque[Any] = deque()  # 처리할 이벤트가 있고 처리 중이 아닌 세션
+        self._active = set()  # _ready에 있거나 처리 중인 세션
+        self._started = False
+
+        self._latency = LoopStats()  # 큐 대기 + 처리 (submit → 완료)
+        self._processing = LoopStats()  # handler 실행 시간
+        self._counters = {
+            "submitted": 0,
+            "processed": 0,
+            "dropped": 0,
+            "errors": 0,
+            "max_depth": 0,
+        }
+
+    def start(self) -> None:
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self.max_workers):
+            threading.Thread(
+                target=self._worker, name=f"event-worker-{i}", daemon=True
+            ).start()
+
+    def submit(
+        self, session_id: Any, kind: Any, data: dict, critical: bool = False
+    ) -> bool:
+        """
+        이벤트를 세션 큐에 넣고 바로 반환
+
+        Returns:
+            bool: 큐에 들어갔으면 True, overflow 정책으로 폐기되었으면 False
+        """
+        with self._cond:
+            self._counters["submitted"] += 1
+            queue = self._queues.setdefault(session_id, deque())
+            if len(queue) >= self.max_queue and not critical:
+                if not self._make_room(session_id):
+                    self._counters["dropped"] += 1
+                    return False
+                queue = self._queues.setdefault(session_id, deque())
+
+            queue.append(_Event(kind, data, critical))
+            self._counters["max_depth"] = max(self._counters["max_depth"], len(queue))
+            if session_id not in self._active:
+                self._active.add(session_id)
+                self._ready.append(session_id)
+                self._cond.notify_all()
+        return True
+
+    def wait_idle(self, session_id: Any, timeout: Optional[float] = None) -> bool:
+        """세션의 대기/처리 중 이벤트가 모두 끝날 때까지 대기 (timeout 시 False)"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: session_id not in self._active, timeout=timeout
+            )
+
+    def depth(self, session_id: Any = None) -> int:
+        """대기 중인 이벤트 수 (session_id가 없으면 전체)"""
+        with self._cond:
+            if session_id is not None:
+                return len(self._queues.get(session_id, ()))
+            return sum(len(q) for q in self._queues.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out = dict(self._counters)
+            out["depth"] = sum(len(q) for q in self._queues.values())
+            out["sessions"] = len(self._active)
+        out["latency"] = self._latency.snapshot()
+        out["processing"] = self._processing.snapshot()
+        return out
+
+    # =========================
+    # Internal
+    # =========================
+    def _make_room(self, session_id: Any) -> bool:
+        """overflow 정책 적용 (_cond 안에서 호출), 새 이벤트를 넣어도 되면 True"""
+        if self.overflow == "drop_newest":
+            return False
+
+        if self.overflow == "drop_oldest":
+            queue = self._queues[session_id]
+            for i, event in enumerate(queue):
+                if not event.critical:
+                    del queue[i]
+                    self._counters["dropped"] += 1
+                    return True
+            return True  # 모두 critical: 한도를 넘더라도 유지
+
+        return self._cond.wait_for(
+            lambda: len(self._queues.get(session_id, ())) < self.max_queue,
+            timeout=self.block_timeout_s,
+        )
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready:
+                    self._cond.wait()
+                session_id = self._ready.popleft()
+                queue = self._queues[session_id]
+                event = queue.popleft()
+                self._cond.notify_all()  # block 정책으로 대기 중인 submit
+
+            started = time.monotonic()
+            try:
+                self.handler(session_id, event.kind, event.data)
+            except Exception as e:
+                with self._cond:
+                    self._counters["errors"] += 1
+                print(
+                    f"[EventPipeline] Error handling {event.kind} for {session_id}: {e}"
+                )
+            done = time.monotonic()
+            self._processing.record(done - started, now=done)
+            self._latency.record(done - event.enqueued_at, now=done)
+
+            with self._cond:
+                self._counters["processed"] += 1
+                if queue:
+                    self._ready.append(session_id)
+                else:
+                    self._active.discard(session_id)
+                    del self._queues[session_id]
+                self._cond.notify_all()
@@ -0,0 +1,77 @@
+# src/core/session_registry.py
+"""
+Per-cart session registry (Main Hub 하나가 여러 카트 처리)
+- cart_code별 CartSession: 쇼핑 세션 ID, SmartCartEngine(위험 단계/중복 제거 상태), UI 연결
+- 카트 상태는 처음 참조될 때 factory로 생성 (등록되지 않은 카트면 None)
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from core.engine import SmartCartEngine
+from network.tcp_client import TCPClient
+
+
+class CartSession:
+    """카트 하나의 상태"""
+
+    def __init__(
+        self, cart_code: str, ui_client: TCPClient, engine: SmartCartEngine
+    ) -> None:
+        self.cart_code = cart_code
+        self.ui_client = ui_client
+        self.engine = engine
+        self.session_id: Optional[int] = None
+        self.obstacle_level: Optional[int] = None  # 마지막으로 받은 장애물 위험 단계
+        self.lock = threading.RLock()  # 세션 시작/결제 직렬화
+
+    @property
+    def key(self):
+        """EventPipeline 큐 키: 같은 카트의 같은 세션 이벤트는 순서대로 처리"""
+        return (self.cart_code, self.session_id)
+
+
+class SessionRegistry:
+    def __init__(
+        self,
+        factory: Callable[[str], CartSession],
+        cart_codes: Iterable[str],
+        default_cart: str,
+    ) -> None:
+        """
+        Args:
+            factory: cart_code → CartSession (UI client / engine 생성)
+            cart_codes: 등록된 카트 코드
+            default_cart: cart_code 없이 들어온 메시지의 카트 (단일 카트 구성 호환)
+        """
+        self._factory = factory
+        self._known = set(cart_codes) | {default_cart}
+        self.default_cart = default_cart
+        self._lock = threading.Lock()
+        self._carts: Dict[str, CartSession] = {}
+
+    def get(self, cart_code: Optional[str] = None) -> Optional[CartSession]:
+        cart_code = cart_code or self.default_cart
+        cart = self._carts.get(cart_code)
+        if cart is not None:
+            return cart
+        if cart_code not in self._known:
+            return None
+        with self._lock:
+            cart = self._carts.get(cart_code)
+            if cart is None:
+                cart = self._factory(cart_code)
+                self._carts[cart_code] = cart
+        return cart
+
+    def carts(self) -> List[CartSession]:
+        with self._lock:
+            return list(self._carts.values())
+
+    def active_sessions(self) -> Dict[str, int]:
+        """cart_code → 진행 중인 session_id"""
+        return {
+            cart.cart_code: cart.session_id
+            for cart in self.carts()
+            if cart.session_id is not None
+        }
@@ -3,12 +3,21 @@ Advanced Obstacle Detection with Tracking and Risk Assessment
 Integrated obstacle_v2 algorithm with original system compatibility
 """
 
+import time
+from dataclasses import asdict
+
 import numpy as np
 from common.config import config
-from detectors.obstacle_tracker import YoloTrackerDetector
+from detectors.obstacle_tracker import (
+    DetectionBatch,
+    TrackPredictor,
+    YoloTrackerDetector,
+)
+from detectors.postprocess import pairwise_iou
 from detectors.risk_engine import (
     RiskEngine,
     RiskEngineConfig,
+    RISK_NAME,
     RISK_SAFE,
     RISK_CAUTION,
     RISK_WARN,
@@ -20,6 +29,8 @@ class ObstacleDetector:
     고급 장애물 감지기 - Track ID 기반 추적 및 위험도 평가
     - YOLO Tracking으로 객체 추적
     - RiskEngine으로 SAFE/CAUTION/WARN 판정
+    - N 프레임마다 YOLO 추적, 사이 프레임은 등속 예측 박스로 위험도 갱신
+    - (선택) 경량 모델 cascade: 평소에는 경량 모델, 중앙 후보/CAUTION 시 전체 모델
     - 기존 시스템과 호환되는 인터페이스 유지
     """
 
@@ -41,16 +52,9 @@ class ObstacleDetector:
         )
 
         # YOLO Tracker 초기화
-        self.tracker = YoloTrackerDetector(
-            weights=model_path,
-            tracker="bytetrack.yaml",
-            conf=conf_threshold,
-            iou=iou_threshold,
-            imgsz=640,
-            device="0",
-            persist=True,
-            verbose=False,
-        )
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.tracker = self._build_tracker(model_path)
 
         # Risk Engine 설정
         risk_cfg = RiskEngineConfig()
@@ -63,82 +67,382 @@ class ObstacleDetector:
 
         self.risk_engine = RiskEngine(risk_cfg)
         self.frame_index = 0
-        self.last_fps = 30.0  # 기본 FPS
+        self.last_fps = 30.0  # 실제 프레임 간격으로 추정 (초기값)
+        self._last_timestamp = None
+
+        # 감지 스케줄 설정 (detect_interval=1 이면 매 프레임 추적)
+        schedule = {}
+        if config and isinstance(
+            getattr(config.model.obstacle_detector, "schedule", None), dict
+        ):
+            schedule = config.model.obstacle_detector.schedule
+        self.detect_interval = max(1, int(schedule.get("detect_interval", 1)))
+        self.caution_interval = max(
+            1, int(schedule.get("caution_interval", self.detect_interval // 2))
+        )
+        self.warn_interval = max(1, int(schedule.get("warn_interval", 1)))
+
+        self.predictor = TrackPredictor(
+            velocity_alpha=float(schedule.get("velocity_alpha", 0.5)),
+            max_age=max(self.detect_interval, self.caution_interval),
+        )
+        self._last_detect_frame = None
+        self._last_level = RISK_SAFE
+
+        # 모델 cascade 설정 (경량 모델은 추적 없이 감지만, Track ID는 전체 모델 기준)
+        cascade = {}
+        if config and isinstance(
+            getattr(config.model.obstacle_detector, "cascade", None), dict
+        ):
+            cascade = config.model.obstacle_detector.cascade
+        self.light_tracker = None
+        if cascade.get("enabled", False) and cascade.get("weights"):
+            try:
+                self.light_tracker = YoloTrackerDetector(
+                    weights=cascade["weights"],
+                    conf=float(cascade.get("confidence", conf_threshold)),
+                    iou=iou_threshold,
+                    imgsz=int(cascade.get("imgsz", 320)),
+                    device="0",
+                    verbose=False,
+                )
+            except Exception as e:
+                print(
+                    f"[ObstacleDetector] Cascade disabled (light model load failed): {e}"
+                )
+        self.cascade_hold_frames = int(cascade.get("hold_frames", 15))
+        self.cascade_match_iou = float(cascade.get("match_iou", 0.3))
+        self._full_until = -1  # 이 프레임까지 전체 모델 유지
+        self._last_source = "full"
+        self._id_alias = {}  # 전체 모델 새 Track ID -> 경량 구간에서 이어온 ID
+        self.cascade_stats = {"light": 0, "full": 0}
+
+    def _build_tracker(self, weights: str) -> YoloTrackerDetector:
+        return YoloTrackerDetector(
+            weights=weights,
+            tracker="bytetrack.yaml",
+            conf=self.conf_threshold,
+            iou=self.iou_threshold,
+            imgsz=640,
+            device="0",
+            persist=True,
+            verbose=False,
+        )
+
+    def load_model(self, weights: str) -> YoloTrackerDetector:
+        """
+        교체용 전체 모델 로드 + 예열 (백그라운드 스레드에서 호출)
+        - 현재 모델은 그대로 사용되며, 실제 교체는 swap_model()에서 수행
+        """
+        tracker = self._build_tracker(weights)
+        tracker.warmup()
+        return tracker
+
+    def swap_model(self, tracker: YoloTrackerDetector) -> dict:
+        """
+        전체 모델 교체 (추론 스레드에서 프레임 사이에 호출)
+        - 클래스 맵이 같으면 ByteTrack/위험도/예측 상태를 그대로 이어감
+        - 다르면 Track ID 의미가 달라지므로 추적 상태 초기화
+
+        Returns:
+            dict: {"weights": str, "state_kept": bool}
+        """
+        old = self.tracker
+        kept = (
+            tracker.class_names() == old.class_names()
+            and tracker.adopt_tracker_state(old)
+        )
+        self.tracker = tracker
+        if not kept:
+            self.reset_tracking()
+        return {"weights": tracker.weights, "state_kept": kept}
+
+    def reset_tracking(self, compact: bool = False) -> None:
+        """
+        추적/위험도 상태 초기화 (세션 전환, 호환되지 않는 모델 교체 시)
+        - compact=True면 Track slot 배열도 초기 크기로 축소
+        """
+        self.tracker.reset_tracker()
+        self.risk_engine.reset(compact=compact)
+        self.predictor.reset()
+        self._id_alias.clear()
+        self._last_detect_frame = None
+        self._last_level = RISK_SAFE
+        self._last_timestamp = None
+        self._full_until = -1
+        self._last_source = "full"
 
-    def detect(self, frame):
+    def get_tuning(self) -> dict:
+        """런타임 튜닝 가능한 현재 값"""
+        return {
+            "confidence": self.conf_threshold,
+            "iou_threshold": self.iou_threshold,
+            "risk": asdict(self.risk_engine.cfg),
+        }
+
+    @classmethod
+    def parse_tuning(cls, params: dict) -> dict:
+        """
+        apply_tuning()의 값 검사/변환만 수행 (모델 없이 미리 검증할 때 사용)
+
+        Returns:
+            dict: 변환된 값 (잘못된 키/값이면 ValueError)
+        """
+        unknown = set(params) - {"confidence", "iou_threshold", "risk"}
+        if unknown:
+            raise ValueError(f"Unknown obstacle tuning keys: {sorted(unknown)}")
+
+        parsed = {}
+        for key in ("confidence", "iou_threshold"):
+            if key in params:
+                value = float(params[key])
+                if not 0.0 < value < 1.0:
+                    raise ValueError(f"{key} must be in (0, 1): {value}")
+                parsed[key] = value
+        if "risk" in params:
+            parsed["risk"] = RiskEngineConfig.parse(params["risk"] or {})
+        return parsed
+
+    def apply_tuning(self, params: dict) -> dict:
+        """
+        런타임 튜닝 (재시작 없이 다음 프레임부터 적용)
+        - confidence / iou_threshold: 전체 모델 추적 임계값 (교체될 모델에도 유지)
+        - risk: RiskEngineConfig 필드 {name: value}
+
+        Returns:
+            dict: 실제 적용된 값 (잘못된 키/값이면 ValueError, 아무것도 바꾸지 않음)
+        """
+        applied = self.parse_tuning(params)
+        if "risk" in applied:
+            self.risk_engine.cfg.update(applied["risk"])
+        if "confidence" in applied:
+            self.conf_threshold = self.tracker.conf = applied["confidence"]
+        if "iou_threshold" in applied:
+            self.iou_threshold = self.tracker.iou = applied["iou_threshold"]
+        return applied
+
+    def _current_interval(self) -> int:
+        """직전 위험도에 따라 감지 주기 결정 (CAUTION 이상이면 주기 단축)"""
+        if self._last_level >= RISK_WARN:
+            return self.warn_interval
+        if self._last_level >= RISK_CAUTION:
+            return min(self.caution_interval, self.detect_interval)
+        return self.detect_interval
+
+    def _should_detect(self, frame_index: int) -> bool:
+        if self._last_detect_frame is None:
+            return True
+        return frame_index - self._last_detect_frame >= self._current_interval()
+
+    def _in_near_center(self, batch: DetectionBatch, width: int) -> np.ndarray:
+        """위험 판정 대상이 될 수 있는 (근접 중앙 영역) 감지 마스크"""
+        band = self.risk_engine.cfg.near_center_band_ratio
+        cx = 0.5 * (batch.xyxy[:, 0] + batch.xyxy[:, 2])
+        left = (1.0 - band) * 0.5 * width
+        return (left <= cx) & (cx <= width - left)
+
+    def _match_previous(self, batch: DetectionBatch, frame_index: int, hw):
+        """
+        감지 박스를 직전 Track 예측 박스와 IoU(같은 클래스) greedy 매칭
+
+        Returns:
+            np.ndarray: 감지별 매칭된 직전 Track ID (없으면 -1)
+        """
+        ids = np.full(len(batch), -1, dtype=np.int64)
+        prev = self.predictor.predict(frame_index, hw)
+        if len(batch) == 0 or len(prev) == 0:
+            return ids
+
+        iou = pairwise_iou(batch.xyxy, prev.xyxy)
+        same_cls = (
+            np.array(batch.cls_names)[:, None] == np.array(prev.cls_names)[None, :]
+        )
+        iou = np.where(same_cls, iou, 0.0)
+
+        used = set()
+        for flat in np.argsort(-iou, axis=None):
+            d, t = divmod(int(flat), len(prev))
+            if iou[d, t] < self.cascade_match_iou:
+                break
+            if ids[d] >= 0 or t in used:
+                continue
+            ids[d] = prev.track_id[t]
+            used.add(t)
+        return ids
+
+    def _detect_full(self, frame, frame_index: int, hw) -> DetectionBatch:
+        """전체 모델 추적 (경량 구간 이후 새로 붙은 Track ID는 이전 ID로 연결)"""
+        detections = self.tracker.detect_single_frame(frame, frame_index).detections
+        self.cascade_stats["full"] += 1
+
+        if self._last_source == "light":
+            carried = self._match_previous(detections, frame_index, hw)
+            for new_id, old_id in zip(detections.track_id.tolist(), carried.tolist()):
+                if new_id >= 0 and old_id >= 0 and new_id != old_id:
+                    self._id_alias[new_id] = old_id
+        self._last_source = "full"
+
+        if self._id_alias:
+            # 사라진 Track의 별칭 정리 (전체 모델 ID가 이번 감지에도, 예측 Track에도 없음)
+            raw_ids = set(detections.track_id.tolist())
+            tracked = self.predictor.track_ids
+            self._id_alias = {
+                new_id: old_id
+                for new_id, old_id in self._id_alias.items()
+                if new_id in raw_ids or old_id in tracked
+            }
+
+        if self._id_alias:
+            detections.track_id = np.array(
+                [self._id_alias.get(i, i) for i in detections.track_id.tolist()],
+                dtype=np.int64,
+            )
+        return detections
+
+    def _detect_cascade(self, frame, frame_index: int, hw) -> DetectionBatch:
+        """경량 모델 우선 감지, 중앙 후보/CAUTION 이상이면 전체 모델로 전환"""
+        if (
+            self.light_tracker is None
+            or frame_index <= self._full_until
+            or self._last_level >= RISK_CAUTION
+        ):
+            detections = self._detect_full(frame, frame_index, hw)
+        else:
+            light = self.light_tracker.predict_single_frame(frame)
+            if not self._in_near_center(light, hw[1]).any():
+                # 위험 후보 없음: 경량 결과에 직전 Track ID를 이어 붙여 사용
+                self.cascade_stats["light"] += 1
+                self._last_source = "light"
+                light.track_id = self._match_previous(light, frame_index, hw)
+                return light
+            detections = self._detect_full(frame, frame_index, hw)
+
+        if (
+            self.light_tracker is not None
+            and self._in_near_center(detections, hw[1]).any()
+        ):
+            self._full_until = frame_index + self.cascade_hold_frames
+        return detections
+
+    def _update_fps(self, timestamp_s: float) -> None:
+        """프레임 캡처 시각 간격으로 FPS 추정 (EMA)"""
+        if self._last_timestamp is not None:
+            dt = timestamp_s - self._last_timestamp
+            if 1e-6 < dt < 5.0:
+                self.last_fps = 0.9 * self.last_fps + 0.1 * (1.0 / dt)
+        self._last_timestamp = timestamp_s
+
+    def detect(self, frame, timestamp_s=None):
         """
         이미지를 분석하여 장애물 유무와 위험도를 반환
 
+        Args:
+            frame: BGR 프레임
+            timestamp_s: 프레임 캡처 시각 (초, 엣지에서 전달), None이면 현재 시각
+
         Returns:
             dict: {
                 "level": int (0=SAFE, 1=CAUTION, 2=WARN),
                 "danger_level": float (0.0-1.0, 하위 호환),
                 "objects": list,
                 "highest_risk_object": dict (가장 위험한 객체 정보),
+                "predicted": bool (True면 YOLO 대신 등속 예측 박스 사용),
                 "metrics": dict (상세 위험도 메트릭)
             }
         """
         try:
-            # YOLO Tracking 수행
-            frame_detections = self.tracker.detect_single_frame(frame, self.frame_index)
+            frame_index = self.frame_index
+            self.frame_index += 1
+            H, W = frame.shape[:2]
+            if timestamp_s is None:
+                timestamp_s = time.time()
+            self._update_fps(timestamp_s)
 
-            if not frame_detections.detections:
+            if self._should_detect(frame_index):
+                # YOLO Tracking 수행 (cascade 사용 시 경량 모델 우선)
+                detections = self._detect_cascade(frame, frame_index, (H, W))
+                self.predictor.observe(detections, frame_index)
+                self._last_detect_frame = frame_index
+                predicted = False
+            else:
+                # 추적 생략 프레임: 기존 Track을 등속 예측으로 전파
+                detections = self.predictor.predict(frame_index, (H, W))
+                predicted = True
+
+            if len(detections) == 0:
+                self._last_level = RISK_SAFE
                 return {
                     "level": 0,
                     "danger_level": 0.0,
                     "objects": [],
+                    "predicted": predicted,
                 }
 
-            # Risk Engine으로 위험도 평가
-            H, W = frame.shape[:2]
-            risk_metrics = self.risk_engine.update(
-                detections=frame_detections.detections,
+            # Risk Engine으로 위험도 평가 (컬럼 배열 그대로 사용)
+            cols = self.risk_engine.update_batch(
+                detections,
                 frame_shape_hw=(H, W),
-                frame_index=self.frame_index,
+                frame_index=frame_index,
                 fps=self.last_fps,
+                timestamp_s=timestamp_s,
             )
+            levels = cols["risk_level"]
+            scores = cols["score"]
 
-            # 결과 변환
-            detected_objects = []
-            max_risk_level = RISK_SAFE
-            max_risk_score = 0.0
-            highest_risk_obj = None
-
-            for idx, det in enumerate(frame_detections.detections):
-                metrics = risk_metrics.get(idx)
-                if metrics is None:
-                    continue
-
-                x1, y1, x2, y2 = det.xyxy
-                obj_info = {
-                    "track_id": int(det.track_id),
-                    "class": det.cls_id,
-                    "class_name": det.cls_name,
-                    "confidence": float(det.conf),
-                    "box": [int(x1), int(y1), int(x2), int(y2)],
-                    "risk_level": metrics.risk_level,
-                    "risk_name": metrics.risk_name,
-                    "score": metrics.score,
-                    "pttc_s": metrics.pttc_s,
-                    "in_center": metrics.in_center,
-                    "approaching": metrics.approaching,
+            # 결과 변환 (이벤트 페이로드용, 컬럼 단위로 한 번에 변환)
+            detected_objects = [
+                {
+                    "track_id": track_id,
+                    "class": cls_id,
+                    "class_name": cls_name,
+                    "confidence": conf,
+                    "box": box,
+                    "risk_level": level,
+                    "risk_name": RISK_NAME[level],
+                    "score": score,
+                    "pttc_s": pttc_s,
+                    "in_center": in_center,
+                    "approaching": approaching,
                 }
-                detected_objects.append(obj_info)
+                for (
+                    track_id,
+                    cls_id,
+                    cls_name,
+                    conf,
+                    box,
+                    level,
+                    score,
+                    pttc_s,
+                    in_center,
+                    approaching,
+                ) in zip(
+                    detections.track_id.tolist(),
+                    detections.cls.tolist(),
+                    detections.cls_names,
+                    detections.conf.tolist(),
+                    detections.xyxy.astype(np.int64).tolist(),
+                    levels.tolist(),
+                    scores.tolist(),
+                    cols["pttc_s"].tolist(),
+                    cols["in_center"].tolist(),
+                    cols["approaching"].tolist(),
+                )
+            ]
 
-                # 최고 위험 객체 추적
-                if metrics.risk_level > max_risk_level or (
-                    metrics.risk_level == max_risk_level
-                    and metrics.score > max_risk_score
-                ):
-                    max_risk_level = metrics.risk_level
-                    max_risk_score = metrics.score
-                    highest_risk_obj = obj_info
+            # 최고 위험 객체: 위험도 우선, 같은 위험도에서는 점수 (동점이면 앞쪽)
+            best = int(np.lexsort((-scores, -levels))[0])
+            max_risk_level = int(levels[best])
+            highest_risk_obj = (
+                detected_objects[best]
+                if max_risk_level > RISK_SAFE or scores[best] > 0.0
+                else None
+            )
 
             # 하위 호환을 위한 danger_level 계산 (0.0-1.0)
             # SAFE=0 -> 0.0, CAUTION=1 -> 0.5, WARN=2 -> 1.0
             danger_level = max_risk_level / 2.0
 
-            self.frame_index += 1
+            self._last_level = max_risk_level
 
             return {
                 "level": int(max_risk_level),  # 0=SAFE, 1=CAUTION, 2=WARN
@@ -151,6 +455,7 @@ class ObstacleDetector:
                 "distance": int(1000 * (1.0 - danger_level)),  # 근사치 (mm)
                 "speed": 0,  # TODO: 추후 속도 계산 추가 가능
                 "direction": "front",  # 기본값
+                "predicted": predicted,
             }
 
         except Exception as e:
@@ -7,15 +7,17 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
-from typing import Dict, Iterator, List, Union
+from typing import Iterator, List, Union
 
 import numpy as np
 from ultralytics import YOLO
 
+from detectors.preprocess import LetterboxBuffer, LetterboxParams, map_boxes
 
-@dataclass
+
+@dataclass(slots=True)
 class Detection:
-    """One tracked detection on a single frame."""
+    """One tracked detection on a single frame (row view of DetectionBatch)."""
 
     track_id: int
     cls_id: int
@@ -24,15 +26,112 @@ class Detection:
     xyxy: tuple[float, float, float, float]  # (x1, y1, x2, y2)
 
 
+class DetectionBatch:
+    """
+    한 프레임의 감지 결과를 연속 NumPy 컬럼으로 보관
+    - xyxy: (N, 4) float64, conf: (N,) float64, cls/track_id: (N,) int64
+    - names: cls_id -> 클래스 이름 테이블 (모델 단위로 공유)
+    """
+
+    __slots__ = ("cls", "conf", "names", "track_id", "xyxy")
+
+    def __init__(
+        self,
+        xyxy: np.ndarray,
+        conf: np.ndarray,
+        cls: np.ndarray,
+        track_id: np.ndarray,
+        names: tuple[str, ...] = (),
+    ) -> None:
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+        self.track_id = track_id
+        self.names = names
+
+    @classmethod
+    def empty(cls, names: tuple[str, ...] = ()) -> DetectionBatch:
+        return cls(
+            xyxy=np.zeros((0, 4), dtype=np.float64),
+            conf=np.zeros(0, dtype=np.float64),
+            cls=np.zeros(0, dtype=np.int64),
+            track_id=np.zeros(0, dtype=np.int64),
+            names=names,
+        )
+
+    @classmethod
+    def from_detections(cls, detections: List[Detection]) -> DetectionBatch:
+        """Detection 리스트를 배치로 변환 (테스트/호환용)"""
+        if not detections:
+            return cls.empty()
+        max_id = max(det.cls_id for det in detections)
+        table = [str(i) for i in range(max_id + 1)]
+        for det in detections:
+            table[det.cls_id] = det.cls_name
+        return cls(
+            xyxy=np.array([det.xyxy for det in detections], dtype=np.float64),
+            conf=np.array([det.conf for det in detections], dtype=np.float64),
+            cls=np.array([det.cls_id for det in detections], dtype=np.int64),
+            track_id=np.array([det.track_id for det in detections], dtype=np.int64),
+            names=tuple(table),
+        )
+
+    def __len__(self) -> int:
+        return len(self.cls)
+
+    def __getitem__(self, i: int) -> Detection:
+        cls_id = int(self.cls[i])
+        x1, y1, x2, y2 = self.xyxy[i].tolist()
+        return Detection(
+            track_id=int(self.track_id[i]),
+            cls_id=cls_id,
+            cls_name=self.class_name(cls_id),
+            conf=float(self.conf[i]),
+            xyxy=(x1, y1, x2, y2),
+        )
+
+    def __iter__(self) -> Iterator[Detection]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def class_name(self, cls_id: int) -> str:
+        return self.names[cls_id] if 0 <= cls_id < len(self.names) else str(cls_id)
+
+    @property
+    def cls_names(self) -> List[str]:
+        """감지별 클래스 이름 리스트"""
+        return [self.class_name(c) for c in self.cls.tolist()]
+
+    def select(self, mask: np.ndarray) -> DetectionBatch:
+        """불리언 마스크/인덱스로 부분 배치 생성"""
+        return DetectionBatch(
+            xyxy=self.xyxy[mask],
+            conf=self.conf[mask],
+            cls=self.cls[mask],
+            track_id=self.track_id[mask],
+            names=self.names,
+        )
+
+
 @dataclass
 class FrameDetections:
-    """Detections for a single frame."""
+    """Detections for a single frame (원본 프레임은 보관하지 않음)."""
 
     frame_index: int
     timestamp_s: float
     fps: float
-    frame_bgr: np.ndarray
-    detections: List[Detection]
+    frame_shape_hw: tuple[int, int]
+    detections: DetectionBatch
+
+
+def _class_table(names) -> tuple[str, ...]:
+    """ultralytics names(dict 또는 list)를 cls_id 인덱스 테이블로 변환"""
+    if not names:
+        return ()
+    if isinstance(names, dict):
+        size = max(int(k) for k in names) + 1
+        return tuple(str(names.get(i, i)) for i in range(size))
+    return tuple(str(n) for n in names)
 
 
 def _as_numpy(x):
@@ -76,6 +175,9 @@ class YoloTrackerDetector:
         self.verbose = verbose
 
         self.model = YOLO(weights)
+        self._names_table = None
+        # 단일 프레임 입력용 고정 shape letterbox 버퍼
+        self.preprocess = LetterboxBuffer(imgsz)
 
     def stream(self, source: Union[int, str]) -> Iterator[FrameDetections]:
         results_iter = self.model.track(
@@ -114,57 +216,61 @@ class YoloTrackerDetector:
                 frame_index=frame_index,
                 timestamp_s=now - t0,
                 fps=fps_est,
-                frame_bgr=frame,
+                frame_shape_hw=frame.shape[:2],
                 detections=detections,
             )
             frame_index += 1
 
-    def _parse_results(self, r) -> List[Detection]:
+    def _names(self, r) -> tuple[str, ...]:
+        if self._names_table is None:
+            names = getattr(self.model, "names", None) or getattr(r, "names", {})
+            self._names_table = _class_table(names)
+        return self._names_table
+
+    def _parse_results(
+        self, r, letterbox: LetterboxParams | None = None
+    ) -> DetectionBatch:
         boxes = getattr(r, "boxes", None)
         if boxes is None:
-            return []
+            return DetectionBatch.empty(self._names(r))
 
         xyxy = _as_numpy(getattr(boxes, "xyxy", None))
+        if xyxy is None or len(xyxy) == 0:
+            return DetectionBatch.empty(self._names(r))
+
+        n = len(xyxy)
         conf = _as_numpy(getattr(boxes, "conf", None))
         cls = _as_numpy(getattr(boxes, "cls", None))
         ids = _as_numpy(getattr(boxes, "id", None))
 
-        if xyxy is None or len(xyxy) == 0:
-            return []
-
-        names: Dict[int, str] = getattr(self.model, "names", None) or getattr(
-            r, "names", {}
+        return DetectionBatch(
+            xyxy=map_boxes(
+                np.ascontiguousarray(xyxy, dtype=np.float64).reshape(n, 4), letterbox
+            ),
+            conf=(
+                np.zeros(n, dtype=np.float64)
+                if conf is None or len(conf) < n
+                else np.asarray(conf, dtype=np.float64)[:n]
+            ),
+            cls=np.asarray(cls).astype(np.int64),
+            track_id=(
+                np.full(n, -1, dtype=np.int64)
+                if ids is None
+                else np.asarray(ids).astype(np.int64)
+            ),
+            names=self._names(r),
         )
 
-        out: List[Detection] = []
-        n = len(xyxy)
-        for i in range(n):
-            cls_id = int(cls[i])
-            cls_name = names.get(cls_id, str(cls_id))
-            conf_i = float(conf[i]) if conf is not None and len(conf) > i else 0.0
-            x1, y1, x2, y2 = map(float, xyxy[i].tolist())
-
-            track_id = -1 if ids is None else int(ids[i])
-
-            out.append(
-                Detection(
-                    track_id=track_id,
-                    cls_id=cls_id,
-                    cls_name=cls_name,
-                    conf=conf_i,
-                    xyxy=(x1, y1, x2, y2),
-                )
-            )
-        return out
-
     def detect_single_frame(
         self, frame: np.ndarray, frame_index: int = 0
     ) -> FrameDetections:
         """
         단일 프레임에 대한 추적 기반 감지 수행 (기존 시스템과 호환용)
+        - 미리 할당된 버퍼에 letterbox 후 입력, 박스는 원본 좌표로 복원
         """
+        inp, letterbox = self.preprocess(frame)
         results = self.model.track(
-            source=frame,
+            source=inp,
             persist=self.persist,
             tracker=self.tracker,
             conf=self.conf,
@@ -180,17 +286,154 @@ class YoloTrackerDetector:
                 frame_index=frame_index,
                 timestamp_s=time.time(),
                 fps=0.0,
-                frame_bgr=frame,
-                detections=[],
+                frame_shape_hw=frame.shape[:2],
+                detections=DetectionBatch.empty(self._names(None)),
             )
 
         r = results[0]
-        detections = self._parse_results(r)
+        detections = self._parse_results(r, letterbox)
 
         return FrameDetections(
             frame_index=frame_index,
             timestamp_s=time.time(),
             fps=0.0,
-            frame_bgr=frame,
+            frame_shape_hw=frame.shape[:2],
             detections=detections,
         )
+
+    def predict_single_frame(self, frame: np.ndarray) -> DetectionBatch:
+        """
+        추적 없이 단일 프레임 감지만 수행 (cascade용 경량 모델, track_id=-1)
+        """
+        inp, letterbox = self.preprocess(frame)
+        results = self.model.predict(
+            source=inp,
+            conf=self.conf,
+            iou=self.iou,
+            imgsz=self.imgsz,
+            device=self.device,
+            verbose=self.verbose,
+        )
+        if not results or len(results) == 0:
+            return DetectionBatch.empty(self._names(None))
+
+        detections = self._parse_results(results[0], letterbox)
+        detections.track_id = np.full(len(detections), -1, dtype=np.int64)
+        return detections
+
+    def class_names(self) -> tuple[str, ...]:
+        """모델 클래스 표 (모델 교체 시 클래스 맵 호환성 비교용)"""
+        return _class_table(getattr(self.model, "names", None) or {})
+
+    def warmup(self, runs: int = 2) -> None:
+        """
+        빈 프레임으로 추론 경로 예열 (모델 교체 전 백그라운드에서 호출)
+        - persist 추적 모델은 track 경로로 예열해 추적기 콜백까지 등록
+        """
+        blank = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        for _ in range(runs):
+            if self.persist:
+                self.detect_single_frame(blank)
+            else:
+                self.predict_single_frame(blank)
+
+    def reset_tracker(self) -> None:
+        """ByteTrack 상태 초기화 (세션 전환 시, Track ID도 처음부터)"""
+        predictor = getattr(self.model, "predictor", None)
+        for tracker in getattr(predictor, "trackers", None) or []:
+            tracker.reset()
+
+    def adopt_tracker_state(self, other: YoloTrackerDetector) -> bool:
+        """
+        다른 인스턴스의 ByteTrack 추적기 상태를 이어받음 (Track ID 유지)
+
+        Returns:
+            bool: 이어받았으면 True (어느 한쪽에 추적기가 아직 없으면 False)
+        """
+        src = getattr(getattr(other, "model", None), "predictor", None)
+        dst = getattr(self.model, "predictor", None)
+        trackers = getattr(src, "trackers", None)
+        if trackers is None or dst is None or not hasattr(dst, "trackers"):
+            return False
+        dst.trackers = trackers
+        return True
+
+
+class TrackPredictor:
+    """
+    등속(constant-velocity) 모델로 Track 박스를 예측
+    - YOLO 추적을 건너뛴 프레임에서 마지막 박스 + 속도로 위치를 외삽
+    - 속도는 프레임당 xyxy 변화량의 EMA
+    """
+
+    def __init__(self, velocity_alpha: float = 0.5, max_age: int = 10) -> None:
+        self.velocity_alpha = velocity_alpha
+        self.max_age = max_age
+        self.reset()
+
+    @staticmethod
+    def _keys(batch: DetectionBatch) -> np.ndarray:
+        return (batch.cls << 32) | (batch.track_id & 0xFFFFFFFF)
+
+    def observe(self, detections: DetectionBatch, frame_index: int) -> None:
+        """실제 감지 결과로 Track 위치/속도 갱신 (이번 감지에서 빠진 Track은 제거)"""
+        batch = detections.select(detections.track_id >= 0)
+        keys = self._keys(batch)
+        vel = np.zeros_like(batch.xyxy)
+
+        if len(self._keys_sorted) > 0 and len(batch) > 0:
+            pos = np.minimum(
+                np.searchsorted(self._keys_sorted, keys), len(self._keys_sorted) - 1
+            )
+            matched = self._keys_sorted[pos] == keys
+            prev = self._order[pos[matched]]
+            gap = max(1, frame_index - self._frame)
+            inst_vel = (batch.xyxy[matched] - self._batch.xyxy[prev]) / gap
+            alpha = self.velocity_alpha
+            vel[matched] = alpha * inst_vel + (1.0 - alpha) * self._vel[prev]
+
+        order = np.argsort(keys, kind="stable")
+        self._batch = batch
+        self._vel = vel
+        self._frame = frame_index
+        self._order = order
+        self._keys_sorted = keys[order]
+
+    def predict(
+        self, frame_index: int, frame_shape_hw: tuple[int, int]
+    ) -> DetectionBatch:
+        """frame_index 시점의 예측 박스 반환 (max_age 초과 시 빈 배치)"""
+        H, W = frame_shape_hw
+        age = frame_index - self._frame
+        if self._batch is None or age > self.max_age:
+            return DetectionBatch.empty(
+                self._batch.names if self._batch is not None else ()
+            )
+
+        box = self._batch.xyxy + self._vel * age
+        x1 = np.clip(box[:, 0], 0.0, W - 1.0)
+        x2 = np.minimum(np.maximum(x1 + 1.0, box[:, 2]), float(W))
+        y1 = np.clip(box[:, 1], 0.0, H - 1.0)
+        y2 = np.minimum(np.maximum(y1 + 1.0, box[:, 3]), float(H))
+
+        return DetectionBatch(
+            xyxy=np.stack([x1, y1, x2, y2], axis=1),
+            conf=self._batch.conf,
+            cls=self._batch.cls,
+            track_id=self._batch.track_id,
+            names=self._batch.names,
+        )
+
+    @property
+    def track_ids(self) -> set:
+        """마지막으로 관측한 Track ID"""
+        if self._batch is None:
+            return set()
+        return set(self._batch.track_id.tolist())
+
+    def reset(self) -> None:
+        self._batch = None
+        self._vel = np.zeros((0, 4), dtype=np.float64)
+        self._frame = 0
+        self._order = np.zeros(0, dtype=np.int64)
+        self._keys_sorted = np.zeros(0, dtype=np.int64)
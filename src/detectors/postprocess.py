@@ -0,0 +1,223 @@
+"""
+Raw YOLO output post-processing (ultralytics Results 객체 생성 없이 NumPy로 처리)
+- Detect 출력 (4 + nc, A): xywh + 클래스 점수
+- OBB 출력 (4 + nc + 1, A): xywh + 클래스 점수 + 회전각(rad)
+- 클래스별 NMS (OBB는 probiou 기반 회전 NMS), 결과는 컬럼 배열로 반환
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+MAX_WH = 7680  # 클래스별 NMS용 좌표 오프셋 (ultralytics와 동일)
+
+
+def pairwise_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, 4) x (M, 4) xyxy 박스 간 IoU 행렬 (N, M)"""
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def xywh_to_xyxy(xywh: np.ndarray) -> np.ndarray:
+    half = xywh[:, 2:4] / 2
+    return np.concatenate([xywh[:, :2] - half, xywh[:, :2] + half], axis=1)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_thres: float) -> np.ndarray:
+    """
+    Greedy NMS (torchvision.ops.nms와 같은 규칙: IoU > iou_thres 이면 제거)
+
+    Returns:
+        np.ndarray: 유지할 인덱스 (점수 내림차순)
+    """
+    order = np.argsort(-scores, kind="stable")
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter)
+        order = rest[iou <= iou_thres]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _covariance(xywhr: np.ndarray):
+    """회전 박스를 2D 가우시안 공분산 (a, b, c)로 변환"""
+    a = xywhr[:, 2] ** 2 / 12
+    b = xywhr[:, 3] ** 2 / 12
+    cos = np.cos(xywhr[:, 4])
+    sin = np.sin(xywhr[:, 4])
+    cos2, sin2 = cos**2, sin**2
+    return a * cos2 + b * sin2, a * sin2 + b * cos2, (a - b) * cos * sin
+
+
+def probiou(obb1: np.ndarray, obb2: np.ndarray, eps: float = 1e-7) -> np.ndarray:
+    """(N, 5) x (M, 5) xywhr 회전 박스 간 ProbIoU 행렬 (ultralytics batch_probiou)"""
+    x1, y1 = obb1[:, None, 0], obb1[:, None, 1]
+    x2, y2 = obb2[None, :, 0], obb2[None, :, 1]
+    a1, b1, c1 = (v[:, None] for v in _covariance(obb1))
+    a2, b2, c2 = (v[None, :] for v in _covariance(obb2))
+
+    core = (a1 + a2) * (b1 + b2) - (c1 + c2) ** 2
+    t1 = ((a1 + a2) * (y1 - y2) ** 2 + (b1 + b2) * (x1 - x2) ** 2) / (core + eps) * 0.25
+    t2 = ((c1 + c2) * (x2 - x1) * (y1 - y2)) / (core + eps) * 0.5
+    det1 = np.clip(a1 * b1 - c1**2, 0, None)
+    det2 = np.clip(a2 * b2 - c2**2, 0, None)
+    t3 = np.log(core / (4 * np.sqrt(det1 * det2) + eps) + eps) * 0.5
+    bd = np.clip(t1 + t2 + t3, eps, 100.0)
+    hd = np.sqrt(1.0 - np.exp(-bd) + eps)
+    return 1 - hd
+
+
+def nms_rotated(xywhr: np.ndarray, scores: np.ndarray, iou_thres: float) -> np.ndarray:
+    """
+    회전 박스 NMS (ultralytics nms_rotated와 같은 행렬 방식)
+    점수 순 정렬 후, 앞선 박스와의 ProbIoU 최댓값이 iou_thres 미만인 박스만 유지
+    """
+    order = np.argsort(-scores, kind="stable")
+    ious = np.triu(probiou(xywhr[order], xywhr[order]), k=1)
+    pick = np.nonzero(ious.max(axis=0, initial=0.0) < iou_thres)[0]
+    return order[pick]
+
+
+def xywhr_to_corners(xywhr: np.ndarray) -> np.ndarray:
+    """(N, 5) xywhr -> (N, 4, 2) 코너 좌표"""
+    ctr = xywhr[:, :2]
+    cos, sin = np.cos(xywhr[:, 4]), np.sin(xywhr[:, 4])
+    vec1 = np.stack([xywhr[:, 2] / 2 * cos, xywhr[:, 2] / 2 * sin], axis=1)
+    vec2 = np.stack([-xywhr[:, 3] / 2 * sin, xywhr[:, 3] / 2 * cos], axis=1)
+    return np.stack(
+        [ctr + vec1 + vec2, ctr + vec1 - vec2, ctr - vec1 - vec2, ctr - vec1 + vec2],
+        axis=1,
+    )
+
+
+def _candidates(raw: np.ndarray, nc: int, conf_thres: float, max_nms: int):
+    """(C, A) 원시 출력에서 최고 클래스 점수가 conf_thres 초과인 후보 추출"""
+    x = np.ascontiguousarray(raw.T)
+    scores = x[:, 4 : 4 + nc]
+    cls = scores.argmax(axis=1)
+    conf = scores[np.arange(len(x)), cls]
+
+    mask = conf > conf_thres
+    x, cls, conf = x[mask], cls[mask], conf[mask]
+
+    order = np.argsort(-conf, kind="stable")[:max_nms]
+    return x[order], cls[order].astype(np.int64), conf[order]
+
+
+def postprocess_detect(
+    raw: np.ndarray,
+    nc: int,
+    conf_thres: float = 0.25,
+    iou_thres: float = 0.7,
+    max_det: int = 300,
+    max_nms: int = 30000,
+):
+    """
+    Detect 원시 출력 (4 + nc, A) → 컬럼 배열
+
+    Returns:
+        tuple: (xyxy (N, 4) 입력 이미지 좌표, conf (N,), cls (N,) int64)
+    """
+    x, cls, conf = _candidates(raw, nc, conf_thres, max_nms)
+    boxes = xywh_to_xyxy(x[:, :4])
+    keep = nms(boxes + (cls * MAX_WH)[:, None], conf, iou_thres)[:max_det]
+    return boxes[keep], conf[keep], cls[keep]
+
+
+def postprocess_obb(
+    raw: np.ndarray,
+    nc: int,
+    conf_thres: float = 0.25,
+    iou_thres: float = 0.7,
+    max_det: int = 300,
+    max_nms: int = 30000,
+):
+    """
+    OBB 원시 출력 (4 + nc + 1, A) → 컬럼 배열
+
+    Returns:
+        tuple: (xywhr (N, 5) 입력 이미지 좌표, conf (N,), cls (N,) int64)
+    """
+    x, cls, conf = _candidates(raw, nc, conf_thres, max_nms)
+    xywhr = np.concatenate([x[:, :4], x[:, 4 + nc : 5 + nc]], axis=1)
+
+    shifted = xywhr.copy()
+    shifted[:, :2] += (cls * MAX_WH)[:, None]
+    keep = nms_rotated(shifted, conf, iou_thres)[:max_det]
+    return xywhr[keep], conf[keep], cls[keep]
+
+
+class RawYoloRunner:
+    """
+    ultralytics YOLO의 PyTorch 모듈을 직접 호출해 원시 출력 (C, A)을 반환
+    - predict()와 같은 장치 선택 / Conv+BN fuse를 먼저 적용 (predict() 호출 이력과 무관)
+    - letterbox된 uint8 HWC(BGR) 버퍼를 미리 할당된 입력 텐서에 복사
+    - .pt 가중치가 아닌 모델(ONNX/TensorRT 등)은 TypeError
+    """
+
+    def __init__(self, yolo, imgsz: int = 640, device=None) -> None:
+        """
+        Args:
+            device: ultralytics device 인자 ("0", "cpu" 등, None이면 predict() 기본값:
+                CUDA가 있으면 0번 GPU, 없으면 CPU)
+        """
+        import torch
+        from ultralytics.utils.torch_utils import select_device
+
+        module = getattr(yolo, "model", None)
+        if not isinstance(module, torch.nn.Module):
+            raise TypeError("RawYoloRunner requires a PyTorch (.pt) YOLO model")
+
+        self._torch = torch
+        self.device = select_device("" if device is None else device, verbose=False)
+        # predict()의 AutoBackend와 같이 fuse 후 장치로 이동 (yolo.model을 제자리에서 변경)
+        if hasattr(module, "fuse") and not (
+            hasattr(module, "is_fused") and module.is_fused()
+        ):
+            module = module.fuse(verbose=False)
+        self.module = module.to(self.device).eval()
+        param = next(self.module.parameters())
+        self._input = torch.empty(
+            (1, 3, imgsz, imgsz), dtype=param.dtype, device=param.device
+        )
+
+    def __call__(self, buffer: np.ndarray) -> np.ndarray:
+        torch = self._torch
+        with torch.inference_mode():
+            src = torch.from_numpy(buffer).to(self._input.device, non_blocking=True)
+            # HWC BGR uint8 -> CHW RGB [0, 1]
+            self._input[0].copy_(src.permute(2, 0, 1)[[2, 1, 0]])
+            self._input.mul_(1.0 / 255.0)
+            out = self.module(self._input)
+            y = out[0] if isinstance(out, (list, tuple)) else out
+            return y[0].float().cpu().numpy()
+
+
+def results_match(a, b, atol: float = 1e-3) -> bool:
+    """
+    두 후처리 결과 (bboxes, cls, conf)가 같은지 (원시 출력 경로 ↔ Results 경로 비교)
+    - 클래스와 박스 수는 정확히 같아야 하고, 좌표/신뢰도는 atol 이내
+    """
+    boxes_a, cls_a, conf_a = (np.asarray(x) for x in a)
+    boxes_b, cls_b, conf_b = (np.asarray(x) for x in b)
+    return (
+        len(cls_a) == len(cls_b)
+        and np.array_equal(cls_a.astype(np.int64), cls_b.astype(np.int64))
+        and np.allclose(boxes_a.reshape(-1, 4), boxes_b.reshape(-1, 4), atol=atol)
+        and np.allclose(conf_a, conf_b, atol=atol)
+    )
@@ -0,0 +1,81 @@
+"""
+Detector input preprocessing
+- 프레임을 고정 크기 입력 버퍼에 직접 letterbox (프레임마다 새 배열 할당 없음)
+- 모델 좌표계 박스를 원본 프레임 좌표로 되돌리는 scale/pad 파라미터 제공
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+@dataclass(frozen=True)
+class LetterboxParams:
+    """원본 프레임 → 입력 버퍼 변환 파라미터 (input = src * scale + pad)"""
+
+    scale: float
+    pad_x: int
+    pad_y: int
+    src_shape_hw: tuple[int, int]
+
+
+class LetterboxBuffer:
+    """
+    스트림별 고정 shape(imgsz x imgsz x 3) 입력 버퍼
+    - 비율 유지 resize 결과를 버퍼 내부 영역에 바로 기록 (cv2.resize dst)
+    - 패딩 영역은 원본 해상도가 바뀔 때만 다시 채움
+    - 반환되는 버퍼는 다음 호출에서 덮어쓰므로 결과를 꺼낸 뒤 재사용할 것
+    """
+
+    def __init__(self, imgsz: int = 640, pad_value: int = 114) -> None:
+        self.imgsz = int(imgsz)
+        self.pad_value = pad_value
+        self.buffer = np.full((self.imgsz, self.imgsz, 3), pad_value, dtype=np.uint8)
+        self.params: LetterboxParams | None = None
+        self._roi = None
+
+    def _layout(self, h: int, w: int) -> None:
+        # ultralytics LetterBox와 같은 반올림 규칙
+        r = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = round(w * r), round(h * r)
+        left = round((self.imgsz - new_w) / 2 - 0.1)
+        top = round((self.imgsz - new_h) / 2 - 0.1)
+
+        self.buffer[...] = self.pad_value
+        self._roi = self.buffer[top : top + new_h, left : left + new_w]
+        self.params = LetterboxParams(
+            scale=r, pad_x=left, pad_y=top, src_shape_hw=(h, w)
+        )
+
+    def __call__(self, frame: np.ndarray) -> tuple[np.ndarray, LetterboxParams]:
+        h, w = frame.shape[:2]
+        if self.params is None or self.params.src_shape_hw != (h, w):
+            self._layout(h, w)
+
+        roi = self._roi
+        if roi.shape[:2] == (h, w):
+            np.copyto(roi, frame)
+        else:
+            cv2.resize(
+                frame,
+                (roi.shape[1], roi.shape[0]),
+                dst=roi,
+                interpolation=cv2.INTER_LINEAR,
+            )
+        return self.buffer, self.params
+
+
+def map_boxes(xyxy: np.ndarray, params: LetterboxParams | None) -> np.ndarray:
+    """입력 버퍼 좌표 xyxy (N, 4)를 원본 프레임 좌표로 변환 (경계로 clip)"""
+    if params is None or len(xyxy) == 0:
+        return xyxy
+    H, W = params.src_shape_hw
+    out = (xyxy - (params.pad_x, params.pad_y, params.pad_x, params.pad_y)) / (
+        params.scale
+    )
+    np.clip(out[:, 0::2], 0.0, W, out=out[:, 0::2])
+    np.clip(out[:, 1::2], 0.0, H, out=out[:, 1::2])
+    return out
@@ -1,7 +1,46 @@
 from ultralytics import YOLO
 from common.config import config
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Dict
 import time
+import cv2
 import numpy as np
+from detectors.preprocess import LetterboxBuffer, map_boxes
+from common.tuning import to_int
+from detectors.postprocess import (
+    RawYoloRunner,
+    pairwise_iou,
+    postprocess_detect,
+    postprocess_obb,
+    results_match,
+    xywhr_to_corners,
+)
+
+
+def _to_host(x):
+    """torch tensor / numpy / list를 한 번에 host numpy 배열로 변환"""
+    if x is None:
+        return None
+    if hasattr(x, "detach"):
+        x = x.detach()
+    if hasattr(x, "cpu"):
+        x = x.cpu()
+    if hasattr(x, "numpy"):
+        return x.numpy()
+    return np.asarray(x)
+
+
+def load_frames(frames_dir, limit=None):
+    """녹화 프레임 디렉터리의 이미지 (파일 이름 순, 원시 출력 경로 parity 확인용)"""
+    paths = sorted(
+        p for p in Path(frames_dir).iterdir() if p.suffix.lower() in (".jpg", ".png")
+    )
+    frames = []
+    for path in paths[:limit]:
+        frame = cv2.imread(str(path))
+        if frame is not None:
+            frames.append((path.name, frame))
+    return frames
 
 
 class ProductRecognizer:
@@ -14,6 +53,12 @@ class ProductRecognizer:
             )
         self.model = YOLO(model_path)
         self.threshold = config.model.product_recognizer.confidence if config else 0.7
+        self.iou_threshold = (
+            config.model.product_recognizer.iou_threshold if config else None
+        ) or 0.7
+        # 고정 shape 입력 버퍼 (프레임마다 letterbox 배열을 새로 만들지 않음)
+        self.imgsz = config.model.product_recognizer.imgsz if config else None
+        self.preprocess = LetterboxBuffer(self._input_size(self.model))
 
         # Check if model is OBB (Oriented Bounding Box) or regular detection
         self.is_obb = self.model.task == "obb"
@@ -21,13 +66,326 @@ class ProductRecognizer:
             f"[ProductRecognizer] Model type: {'OBB' if self.is_obb else 'Detection'}"
         )
 
-        # 시간 기반 인식 시스템
+        # 추론 장치 (ultralytics device 인자, None이면 CUDA 0번 / 없으면 CPU)
+        self.device = config.model.product_recognizer.device if config else None
+
+        # Results 객체를 거치지 않는 원시 출력 후처리 경로 (.pt 모델만 가능)
+        # parity_frames가 있으면 사용 전에 녹화 프레임으로 predict() 결과와 비교
+        self.fast_postprocess = bool(
+            config and config.model.product_recognizer.fast_postprocess
+        )
+        self.parity_frames = (
+            config.model.product_recognizer.parity_frames if config else None
+        )
+        self._raw_runner = None
+        self._raw_runner_model = None  # raw runner를 만든 모델 (모델 교체 감지용)
+
+        # 시간 기반 인식 시스템 (같은 상품도 물체(instance)별로 따로 추적)
         self.tracked_objects = (
             {}
-        )  # {product_id: {"first_seen": time, "last_seen": time, "bbox": list}}
-        self.last_added = {}  # {product_id: timestamp} - 쿨다운용
-        self.cooldown_seconds = 3  # 같은 물건 3초 내 재인식 방지
-        self.required_duration = 1.5  # 1.5초간 지속적으로 인식되어야 추가됨
+        )  # {instance_id: {"product_id": int, "first_seen": time, "last_seen": time, "bbox": list}}
+        self.last_added = {}  # {instance_id: timestamp} - 쿨다운용
+        trigger_cfg = (
+            config.model.product_recognizer.trigger
+            if config and config.model.product_recognizer.trigger
+            else {}
+        )
+        self.cooldown_seconds = trigger_cfg.get(
+            "cooldown_seconds", 3
+        )  # 같은 물체 3초 내 재인식 방지
+        self.required_duration = trigger_cfg.get(
+            "required_duration", 1.5
+        )  # 근거가 부족해도 1.5초간 지속 인식되면 추가됨
+        self.lost_timeout = 2.0  # 2초 이상 보이지 않으면 추적 종료
+
+        # 신뢰도 가중 근거(evidence) 누적: 확실하고 안정적인 감지는 빨리 추가
+        self.evidence_threshold = trigger_cfg.get("evidence_threshold", 2.0)
+        self.evidence_decay = trigger_cfg.get(
+            "evidence_decay", 0.5
+        )  # 1초당 근거 잔존 비율
+        self.min_frames = trigger_cfg.get("min_frames", 2)  # 최소 관측 프레임 수
+
+        # 정적 장면 결과 재사용 (직전 추론 프레임과 거의 같으면 YOLO 생략)
+        reuse_cfg = (
+            config.model.product_recognizer.reuse
+            if config and config.model.product_recognizer.reuse
+            else {}
+        )
+        self.reuse_enabled = reuse_cfg.get("enabled", True)
+        self.reuse_mad_threshold = reuse_cfg.get(
+            "mad_threshold", 2.0
+        )  # 축소 흑백 이미지 평균 절대 차이 (0~255)
+        self.reuse_thumb_size = reuse_cfg.get("thumb_size", 32)
+        self.max_reuse_frames = reuse_cfg.get(
+            "max_reuse_frames", 10
+        )  # 연속 재사용 상한 (주기적으로 강제 추론)
+        self.reuse_roi = reuse_cfg.get("roi", [0.0, 0.0, 1.0, 1.0])  # 비율 x1,y1,x2,y2
+        self._last_thumb = None
+        self._cached_boxes = None
+        self._reuse_streak = 0
+        self.reuse_stats = {"frames": 0, "inferred": 0, "reused": 0}
+
+        # 감지 ↔ 추적 물체 매칭 기준 (같은 클래스 내에서만 매칭)
+        self.match_iou = 0.3  # IoU가 이 값 이상이면 매칭 후보
+        self.match_center_dist = 0.5  # 또는 중심 거리 / 박스 대각선이 이 값 이하
+        self._next_instance_id = 0
+
+    def _extract_boxes(self, result, letterbox=None):
+        """
+        프레임 결과의 모든 박스를 한 번의 host 전송으로 컬럼 배열화
+        (letterbox 파라미터가 있으면 원본 프레임 좌표로 복원)
+
+        Returns:
+            tuple: (bboxes (N, 4) xyxy, cls (N,) int64, conf (N,))
+        """
+        empty = (
+            np.zeros((0, 4), dtype=np.float32),
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.float32),
+        )
+        if result is None:
+            return empty
+
+        if self.is_obb:
+            obb = getattr(result, "obb", None)
+            if obb is None or len(obb) == 0:
+                return empty
+            # OBB 코너 (N, 4, 2) -> 축 정렬 bbox (N, 4), 전체 박스를 한 번에 변환
+            corners = _to_host(obb.xyxyxyxy).reshape(-1, 4, 2)
+            bboxes = np.concatenate([corners.min(axis=1), corners.max(axis=1)], axis=1)
+            cls = _to_host(obb.cls)
+            conf = _to_host(obb.conf)
+        else:
+            boxes = getattr(result, "boxes", None)
+            if boxes is None or len(boxes) == 0:
+                return empty
+            bboxes = _to_host(boxes.xyxy).reshape(-1, 4)
+            cls = _to_host(boxes.cls)
+            conf = _to_host(boxes.conf)
+
+        bboxes = map_boxes(bboxes.astype(np.float64), letterbox)
+        return bboxes, cls.reshape(-1).astype(np.int64), conf.reshape(-1)
+
+    def _postprocess_raw(self, raw, letterbox=None):
+        """
+        원시 모델 출력 (C, A)을 NumPy NMS로 후처리해 컬럼 배열화
+
+        Returns:
+            tuple: (bboxes (N, 4) xyxy, cls (N,) int64, conf (N,))
+        """
+        nc = len(self.model.names)
+        if self.is_obb:
+            xywhr, conf, cls = postprocess_obb(
+                raw, nc, self.threshold, self.iou_threshold
+            )
+            corners = xywhr_to_corners(xywhr)
+            bboxes = np.concatenate([corners.min(axis=1), corners.max(axis=1)], axis=1)
+        else:
+            bboxes, conf, cls = postprocess_detect(
+                raw, nc, self.threshold, self.iou_threshold
+            )
+        return map_boxes(bboxes.astype(np.float64), letterbox), cls, conf
+
+    def _get_raw_runner(self):
+        """
+        현재 모델용 RawYoloRunner (사용 불가하면 None, 모델이 바뀌면 재생성)
+        - parity_frames가 있으면 녹화 프레임에서 predict()와 결과가 다를 때 사용하지 않음
+        """
+        if not self.fast_postprocess:
+            return None
+        if self._raw_runner_model is not self.model:
+            self._raw_runner_model = self.model
+            self._raw_runner = None
+            try:
+                runner = RawYoloRunner(
+                    self.model, self.preprocess.imgsz, device=self.device
+                )
+                if self.parity_frames:
+                    frames = load_frames(self.parity_frames, limit=20)
+                    mismatches = self.check_raw_parity(frames, runner)
+                    if mismatches:
+                        print(
+                            "[ProductRecognizer] Raw post-processing disabled: "
+                            f"{len(mismatches)}/{len(frames)} recorded frames differ "
+                            f"from predict() ({', '.join(mismatches[:5])})"
+                        )
+                        return None
+                    print(
+                        "[ProductRecognizer] Raw post-processing matches predict() "
+                        f"on {len(frames)} recorded frames"
+                    )
+                self._raw_runner = runner
+                print(
+                    "[ProductRecognizer] Raw output post-processing enabled "
+                    f"(device: {runner.device})"
+                )
+            except Exception as e:
+                print(f"[ProductRecognizer] Raw post-processing unavailable: {e}")
+        return self._raw_runner
+
+    def check_raw_parity(self, frames, runner=None, atol=1e-3):
+        """
+        녹화 프레임에서 원시 출력 경로와 predict() 경로의 결과 비교
+
+        Args:
+            frames: [(이름, BGR 프레임), ...] (load_frames)
+
+        Returns:
+            list: 결과가 다른 프레임 이름
+        """
+        if runner is None:
+            runner = RawYoloRunner(
+                self.model, self.preprocess.imgsz, device=self.device
+            )
+        empty = (np.zeros((0, 4)), np.zeros((0,), np.int64), np.zeros((0,)))
+        mismatches = []
+        for name, frame in frames:
+            inp, letterbox = self.preprocess(frame)
+            ref = self._predict_boxes(inp, letterbox)
+            fast = self._postprocess_raw(runner(inp), letterbox)
+            if not results_match(ref if ref is not None else empty, fast, atol=atol):
+                mismatches.append(name)
+        return mismatches
+
+    def _infer(self, frame):
+        """
+        letterbox 버퍼로 추론 후 원본 좌표 컬럼 배열 반환 (결과 없음이면 None)
+        - raw runner가 있으면 ultralytics Results 생성 없이 직접 후처리
+        """
+        inp, letterbox = self.preprocess(frame)
+        raw_runner = self._get_raw_runner()
+        if raw_runner is not None:
+            try:
+                return self._postprocess_raw(raw_runner(inp), letterbox)
+            except Exception as e:
+                # 이 모델은 predict() 경로로 계속 (모델이 바뀌면 다시 시도)
+                self._raw_runner = None
+                print(
+                    f"[ProductRecognizer] Raw post-processing failed, using predict(): {e}"
+                )
+        return self._predict_boxes(inp, letterbox)
+
+    def _input_size(self, model):
+        """입력 크기: 설정값 → 모델 학습/내보내기 크기 → 640"""
+        size = self.imgsz or (getattr(model, "overrides", None) or {}).get("imgsz")
+        if isinstance(size, (list, tuple)):
+            size = max(size)
+        return int(size or 640)
+
+    def _device_kwargs(self):
+        """predict() device 인자 (설정하지 않았으면 ultralytics 기본 선택에 맡김)"""
+        return {} if self.device is None else {"device": self.device}
+
+    def _predict_boxes(self, inp, letterbox):
+        """ultralytics predict() 경로 (결과 없음이면 None)"""
+        results = self.model.predict(
+            inp,
+            conf=self.threshold,
+            iou=self.iou_threshold,
+            verbose=False,
+            **self._device_kwargs(),
+        )
+        if results is None or len(results) == 0:
+            return None
+        # OBB vs Detection 모델 처리 (박스/클래스/신뢰도를 프레임당 한 번에 host로 전송)
+        return self._extract_boxes(results[0], letterbox)
+
+    def _thumbnail(self, frame):
+        """ROI를 축소한 흑백 썸네일 (프레임 유사도 비교용)"""
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = self.reuse_roi
+        roi = frame[int(y1 * h) : int(y2 * h), int(x1 * w) : int(x2 * w)]
+        if roi.ndim == 3:
+            roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        size = (self.reuse_thumb_size, self.reuse_thumb_size)
+        return cv2.resize(roi, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _can_reuse(self, thumb):
+        """직전 추론 프레임과 거의 같고 연속 재사용 상한 이내인지"""
+        if thumb is None or self._last_thumb is None or self._cached_boxes is None:
+            return False
+        if self._reuse_streak >= self.max_reuse_frames:
+            return False
+        mad = float(np.mean(np.abs(thumb - self._last_thumb)))
+        return mad <= self.reuse_mad_threshold
+
+    def get_reuse_stats(self):
+        """
+        결과 재사용 통계
+
+        Returns:
+            dict: {"frames", "inferred", "reused", "reuse_ratio"}
+        """
+        stats = dict(self.reuse_stats)
+        stats["reuse_ratio"] = (
+            stats["reused"] / stats["frames"] if stats["frames"] else 0.0
+        )
+        return stats
+
+    def _match_instances(self, bboxes, product_ids):
+        """
+        감지 박스를 기존 추적 물체에 매칭 (클래스별 IoU/중심거리 비용 행렬, greedy)
+
+        Returns:
+            tuple: (감지별 instance_id (새 물체는 새 ID 발급), 감지별 매칭 IoU)
+        """
+        n = len(product_ids)
+        instance_ids = [None] * n
+        match_iou = [1.0] * n  # 새 물체는 비교 대상이 없으므로 1.0
+        track_ids = list(self.tracked_objects.keys())
+
+        if n > 0 and track_ids:
+            tracks = [self.tracked_objects[iid] for iid in track_ids]
+            track_boxes = np.array([t["bbox"] for t in tracks], dtype=np.float64)
+            track_pids = np.array([t["product_id"] for t in tracks], dtype=np.int64)
+            det_boxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+
+            iou = pairwise_iou(det_boxes, track_boxes)
+            det_c = 0.5 * (det_boxes[:, :2] + det_boxes[:, 2:])
+            track_c = 0.5 * (track_boxes[:, :2] + track_boxes[:, 2:])
+            track_diag = np.maximum(
+                np.hypot(
+                    track_boxes[:, 2] - track_boxes[:, 0],
+                    track_boxes[:, 3] - track_boxes[:, 1],
+                ),
+                1.0,
+            )
+            center_dist = (
+                np.linalg.norm(det_c[:, None, :] - track_c[None, :, :], axis=2)
+                / track_diag[None, :]
+            )
+
+            valid = (np.asarray(product_ids)[:, None] == track_pids[None, :]) & (
+                (iou >= self.match_iou) | (center_dist <= self.match_center_dist)
+            )
+            cost = np.where(valid, (1.0 - iou) + center_dist, np.inf)
+
+            # 비용이 낮은 쌍부터 greedy 할당
+            used_tracks = set()
+            for flat in np.argsort(cost, axis=None):
+                d, t = divmod(int(flat), len(track_ids))
+                if not np.isfinite(cost[d, t]):
+                    break
+                if instance_ids[d] is not None or t in used_tracks:
+                    continue
+                instance_ids[d] = track_ids[t]
+                match_iou[d] = float(iou[d, t])
+                used_tracks.add(t)
+
+        for d in range(n):
+            if instance_ids[d] is None:
+                instance_ids[d] = self._next_instance_id
+                self._next_instance_id += 1
+        return instance_ids, match_iou
+
+    def _evidence_weight(self, confidence, stability):
+        """
+        프레임 1회 관측의 근거 가중치 (0~1)
+
+        감지 임계값을 넘는 신뢰도 여유분 × 직전 박스와의 IoU(안정성)
+        """
+        margin = (confidence - self.threshold) / max(1.0 - self.threshold, 1e-6)
+        return min(max(margin, 0.0), 1.0) * stability
 
     def recognize(self, frame):
         """
@@ -35,62 +393,21 @@ class ProductRecognizer:
         바운딩 박스 정보도 포함
         """
         try:
-            results = self.model.predict(frame, conf=self.threshold, verbose=False)
+            inferred = self._infer(frame)
 
             # 안전한 None 체크
-            if results is None:
+            if inferred is None:
                 return {"status": "none"}
 
-            # OBB vs Detection 모델 처리
-            if self.is_obb:
-                if (
-                    len(results) > 0
-                    and results[0].obb is not None
-                    and len(results[0].obb) > 0
-                ):
-                    # OBB 모델: obb 속성 사용
-                    top_box = results[0].obb[0]
-                    yolo_class = int(top_box.cls[0])
-                    confidence = float(top_box.conf[0])
-
-                    # OBB는 회전된 박스이므로 xyxyxyxy (8개 좌표) 형식
-                    # 하지만 간단하게 하려면 xyxy 형식으로 변환
-                    xyxyxyxy = top_box.xyxyxyxy[0].cpu().numpy()
-                    x_coords = xyxyxyxy[::2]  # x 좌표들
-                    y_coords = xyxyxyxy[1::2]  # y 좌표들
-                    bbox = [
-                        float(x_coords.min()),
-                        float(y_coords.min()),
-                        float(x_coords.max()),
-                        float(y_coords.max()),
-                    ]
-
-                    product_id = yolo_class + 1
-                    return {
-                        "product_id": product_id,
-                        "confidence": confidence,
-                        "bbox": bbox,
-                        "status": "detected",
-                    }
-            else:
-                if (
-                    len(results) > 0
-                    and results[0].boxes is not None
-                    and len(results[0].boxes) > 0
-                ):
-                    # 일반 Detection 모델: boxes 속성 사용
-                    top_box = results[0].boxes[0]
-                    yolo_class = int(top_box.cls[0])
-                    product_id = yolo_class + 1
-                    confidence = float(top_box.conf[0])
-                    bbox = top_box.xyxy[0].cpu().numpy().tolist()
-
-                    return {
-                        "product_id": product_id,
-                        "confidence": confidence,
-                        "bbox": bbox,
-                        "status": "detected",
-                    }
+            # OBB는 회전된 박스이므로 축 정렬 xyxy로 변환된 값 사용
+            bboxes, classes, confs = inferred
+            if len(classes) > 0:
+                return {
+                    "product_id": int(classes[0]) + 1,
+                    "confidence": float(confs[0]),
+                    "bbox": bboxes[0].tolist(),
+                    "status": "detected",
+                }
 
         except Exception as e:
             print(f"[ProductRecognizer] Error in recognize: {e}")
@@ -102,9 +419,11 @@ class ProductRecognizer:
         시간 기반 상품 인식 메서드
 
         동작 원리:
-        1. 물체 감지 시작 → 추적 시작
-        2. 1.5초간 지속적으로 인식되면 → "카트에 추가됨" 이벤트 발생
-        3. 쿨다운: 같은 물건을 3초 내에 재인식하지 않음
+        1. 물체 감지 시작 → 추적 시작 (같은 상품이라도 물체별로 따로 추적)
+        2. 신뢰도 가중 근거가 evidence_threshold를 넘거나
+           1.5초간 지속적으로 인식되면 → "카트에 추가됨" 이벤트 발생
+        3. 쿨다운: 같은 물체를 3초 내에 재인식하지 않음
+        4. 같은 프레임에 같은 상품 여러 개가 추가되면 quantity로 합산
 
         Args:
             frame: 입력 프레임
@@ -114,76 +433,71 @@ class ProductRecognizer:
             dict: {
                 "status": "added" | "tracking" | "none",
                 "main_event": {...},  # 주요 이벤트 (added 또는 tracking)
+                "added_events": [...],  # 이번 프레임에 추가된 상품별 이벤트 (quantity 포함)
                 "all_detections": [...]  # 모든 감지된 물체들 (바운딩 박스 표시용)
             }
         """
         if current_time is None:
             current_time = time.time()
 
-        try:
-            results = self.model.predict(frame, conf=self.threshold, verbose=False)
-        except Exception as e:
-            print(f"[ProductRecognizer] Error in predict: {e}")
-            return {"status": "none", "all_detections": []}
+        # 직전 추론 프레임과 거의 같으면 YOLO를 생략하고 이전 결과로 트리거 상태만 진행
+        thumb = self._thumbnail(frame) if self.reuse_enabled else None
+        self.reuse_stats["frames"] += 1
+
+        if self._can_reuse(thumb):
+            bboxes, classes, confs = self._cached_boxes
+            self._reuse_streak += 1
+            self.reuse_stats["reused"] += 1
+        else:
+            try:
+                inferred = self._infer(frame)
+            except Exception as e:
+                print(f"[ProductRecognizer] Error in predict: {e}")
+                self._last_thumb = None
+                return {"status": "none", "all_detections": []}
+
+            # 안전한 None 체크
+            if inferred is None:
+                self._last_thumb = None
+                return {"status": "none", "all_detections": []}
+
+            bboxes, classes, confs = inferred
+            self._cached_boxes = (bboxes, classes, confs)
+            self._last_thumb = thumb
+            self._reuse_streak = 0
+            self.reuse_stats["inferred"] += 1
 
         # 현재 프레임에서 감지된 모든 물체들
         all_detections = []
         main_event = None
+        added_events = {}  # {product_id: event} - 프레임 내 상품별 추가 집계
 
-        # 안전한 None 체크
-        if results is None or len(results) == 0:
-            return {"status": "none", "all_detections": []}
-
-        # OBB vs Detection 모델 처리
-        boxes_data = []
-        if self.is_obb:
-            if results[0].obb is not None and len(results[0].obb) > 0:
-                for obb_box in results[0].obb:
-                    # OBB를 일반 bbox로 변환
-                    xyxyxyxy = obb_box.xyxyxyxy[0].cpu().numpy()
-                    x_coords = xyxyxyxy[::2]
-                    y_coords = xyxyxyxy[1::2]
-                    bbox = np.array(
-                        [x_coords.min(), y_coords.min(), x_coords.max(), y_coords.max()]
-                    )
+        if len(classes) > 0:
+            product_ids = (classes + 1).tolist()
+            instance_ids, match_iou = self._match_instances(bboxes, product_ids)
 
-                    boxes_data.append(
-                        {
-                            "bbox": bbox,
-                            "cls": int(obb_box.cls[0]),
-                            "conf": float(obb_box.conf[0]),
-                        }
-                    )
-        else:
-            if results[0].boxes is not None and len(results[0].boxes) > 0:
-                for box in results[0].boxes:
-                    boxes_data.append(
-                        {
-                            "bbox": box.xyxy[0].cpu().numpy(),
-                            "cls": int(box.cls[0]),
-                            "conf": float(box.conf[0]),
-                        }
-                    )
-
-        if len(boxes_data) > 0:
-            for box_data in boxes_data:
-                product_id = box_data["cls"] + 1
-                bbox = box_data["bbox"]
+            for product_id, instance_id, stability, confidence, bbox in zip(
+                product_ids, instance_ids, match_iou, confs.tolist(), bboxes.tolist()
+            ):
                 center_y = (bbox[1] + bbox[3]) / 2
-                confidence = box_data["conf"]
 
                 # 모든 물체 정보 수집 (바운딩 박스 표시용)
                 detection_info = {
                     "product_id": product_id,
+                    "instance_id": instance_id,
                     "confidence": confidence,
-                    "bbox": bbox.tolist(),
+                    "bbox": bbox,
                     "center_y": center_y,
                 }
 
-                # 쿨다운 체크 - 최근에 추가한 물건
-                if product_id in self.last_added:
-                    time_since_added = current_time - self.last_added[product_id]
+                # 쿨다운 체크 - 최근에 추가한 물체 (위치만 갱신)
+                if instance_id in self.last_added:
+                    time_since_added = current_time - self.last_added[instance_id]
                     if time_since_added < self.cooldown_seconds:
+                        obj = self.tracked_objects[instance_id]
+                        obj["last_seen"] = current_time
+                        obj["bbox"] = bbox
+
                         detection_info["state"] = "cooldown"
                         detection_info["cooldown_remaining"] = (
                             self.cooldown_seconds - time_since_added
@@ -192,52 +506,86 @@ class ProductRecognizer:
                         continue
 
                 # 추적 상태 업데이트
-                if product_id not in self.tracked_objects:
+                if instance_id not in self.tracked_objects:
                     # 새로 발견된 물체 - 추적 시작
-                    self.tracked_objects[product_id] = {
+                    self.tracked_objects[instance_id] = {
+                        "product_id": product_id,
                         "first_seen": current_time,
                         "last_seen": current_time,
-                        "bbox": bbox.tolist(),
+                        "bbox": bbox,
+                        "evidence": self._evidence_weight(confidence, 1.0),
+                        "frames": 1,
                     }
 
                     detection_info["state"] = "tracking"
                     detection_info["duration"] = 0.0
+                    detection_info["evidence"] = self.tracked_objects[instance_id][
+                        "evidence"
+                    ]
                     all_detections.append(detection_info)
 
                     if main_event is None:
                         main_event = {
                             "product_id": product_id,
                             "confidence": confidence,
-                            "bbox": bbox.tolist(),
+                            "bbox": bbox,
                             "status": "tracking",
                             "duration": 0.0,
                         }
                 else:
-                    # 이미 추적 중인 물체
-                    obj = self.tracked_objects[product_id]
+                    # 이미 추적 중인 물체 - 근거를 시간 감쇠 후 누적
+                    obj = self.tracked_objects[instance_id]
+                    dt = max(current_time - obj["last_seen"], 0.0)
+                    obj["evidence"] = obj.get(
+                        "evidence", 0.0
+                    ) * self.evidence_decay**dt + self._evidence_weight(
+                        confidence, stability
+                    )
+                    obj["frames"] = obj.get("frames", 1) + 1
                     obj["last_seen"] = current_time
-                    obj["bbox"] = bbox.tolist()
+                    obj["bbox"] = bbox
 
                     duration = current_time - obj["first_seen"]
+                    detection_info["evidence"] = obj["evidence"]
+
+                    # 근거 기반 트리거 (빠른 경로) / 시간 기반 트리거 (기본 경로)
+                    if (
+                        obj["evidence"] >= self.evidence_threshold
+                        and obj["frames"] >= self.min_frames
+                    ):
+                        trigger = "evidence_reached"
+                    elif duration >= self.required_duration:
+                        trigger = "duration_reached"
+                    else:
+                        trigger = None
 
-                    # 시간 기반 트리거 체크
-                    if duration >= self.required_duration:
-                        # 🎉 카트에 추가됨!
-                        self.last_added[product_id] = current_time
-                        del self.tracked_objects[product_id]
+                    if trigger is not None:
+                        # 🎉 카트에 추가됨! (쿨다운 동안 위치 추적은 유지)
+                        self.last_added[instance_id] = current_time
 
                         detection_info["state"] = "added"
                         detection_info["duration"] = duration
                         all_detections.append(detection_info)
 
-                        main_event = {
-                            "product_id": product_id,
-                            "confidence": confidence,
-                            "bbox": bbox.tolist(),
-                            "status": "added",
-                            "trigger": "duration_reached",
-                            "duration": duration,
-                        }
+                        event = added_events.get(product_id)
+                        if event is None:
+                            event = {
+                                "product_id": product_id,
+                                "confidence": confidence,
+                                "bbox": bbox,
+                                "status": "added",
+                                "trigger": trigger,
+                                "duration": duration,
+                                "quantity": 0,
+                                "instance_ids": [],
+                            }
+                            added_events[product_id] = event
+                        event["quantity"] += 1
+                        event["instance_ids"].append(instance_id)
+                        event["confidence"] = max(event["confidence"], confidence)
+
+                        if main_event is None or main_event["status"] != "added":
+                            main_event = event
                     else:
                         # 아직 시간이 안됨 - 계속 추적
                         detection_info["state"] = "tracking"
@@ -249,35 +597,37 @@ class ProductRecognizer:
                             main_event = {
                                 "product_id": product_id,
                                 "confidence": confidence,
-                                "bbox": bbox.tolist(),
+                                "bbox": bbox,
                                 "status": "tracking",
                                 "duration": duration,
                                 "remaining": self.required_duration - duration,
                             }
 
-        # 오래된 추적 정보 정리 (2초 이상 보이지 않으면 제거)
+        # 오래된 추적 정보 정리 (lost_timeout 이상 보이지 않으면 제거)
         lost_ids = []
-        for pid, data in self.tracked_objects.items():
-            if current_time - data.get("last_seen", current_time) > 2.0:
-                lost_ids.append(pid)
+        for iid, data in self.tracked_objects.items():
+            if current_time - data.get("last_seen", current_time) > self.lost_timeout:
+                lost_ids.append(iid)
 
-        for pid in lost_ids:
-            del self.tracked_objects[pid]
+        for iid in lost_ids:
+            del self.tracked_objects[iid]
 
-        # 쿨다운 정리 (쿨다운 시간이 지난 항목 제거)
+        # 쿨다운 정리 (쿨다운이 끝난 물체는 추적도 새로 시작)
         cooldown_cleanup = []
-        for pid, added_time in self.last_added.items():
+        for iid, added_time in self.last_added.items():
             if current_time - added_time > self.cooldown_seconds:
-                cooldown_cleanup.append(pid)
+                cooldown_cleanup.append(iid)
 
-        for pid in cooldown_cleanup:
-            del self.last_added[pid]
+        for iid in cooldown_cleanup:
+            del self.last_added[iid]
+            self.tracked_objects.pop(iid, None)
 
         # 결과 반환
         if main_event and main_event["status"] == "added":
             return {
                 "status": "added",
                 "main_event": main_event,
+                "added_events": list(added_events.values()),
                 "all_detections": all_detections,
             }
         elif main_event:
@@ -297,16 +647,139 @@ class ProductRecognizer:
             dict: {
                 "tracked_count": int,
                 "cooldown_count": int,
-                "required_duration": float
+                "required_duration": float,
+                "evidence_threshold": float
             }
         """
         return {
             "tracked_count": len(self.tracked_objects),
             "cooldown_count": len(self.last_added),
             "required_duration": self.required_duration,
+            "evidence_threshold": self.evidence_threshold,
         }
 
-    def reset_tracking(self):
-        """추적 상태 초기화"""
+    # 런타임 튜닝 가능한 trigger 파라미터 (이름: 타입)
+    _TRIGGER_FIELDS: ClassVar[Dict[str, Callable[[Any], Any]]] = {
+        "evidence_threshold": float,
+        "evidence_decay": float,
+        "min_frames": to_int,
+        "required_duration": float,
+        "cooldown_seconds": float,
+    }
+
+    def get_tuning(self):
+        """런타임 튜닝 가능한 현재 값"""
+        return {
+            "confidence": self.threshold,
+            "iou_threshold": self.iou_threshold,
+            "trigger": {name: getattr(self, name) for name in self._TRIGGER_FIELDS},
+        }
+
+    @classmethod
+    def parse_tuning(cls, params):
+        """
+        apply_tuning()의 값 검사/변환만 수행 (모델 없이 미리 검증할 때 사용)
+
+        Returns:
+            dict: 변환된 값 (잘못된 키/값이면 ValueError)
+        """
+        unknown = set(params) - {"confidence", "iou_threshold", "trigger"}
+        if unknown:
+            raise ValueError(f"Unknown product tuning keys: {sorted(unknown)}")
+
+        parsed = {}
+        for key in ("confidence", "iou_threshold"):
+            if key in params:
+                value = float(params[key])
+                if not 0.0 < value < 1.0:
+                    raise ValueError(f"{key} must be in (0, 1): {value}")
+                parsed[key] = value
+
+        trigger_params = params.get("trigger") or {}
+        if not isinstance(trigger_params, dict):
+            raise TypeError(f"trigger must be a dict: {type(trigger_params).__name__}")
+        trigger = {}
+        for name, value in trigger_params.items():
+            if name not in cls._TRIGGER_FIELDS:
+                raise ValueError(f"Unknown trigger field: {name}")
+            trigger[name] = cls._TRIGGER_FIELDS[name](value)
+        if trigger:
+            parsed["trigger"] = trigger
+        return parsed
+
+    def apply_tuning(self, params):
+        """
+        런타임 튜닝 (재시작 없이 다음 프레임부터 적용)
+        - confidence / iou_threshold: 감지 임계값
+        - trigger: 상품 추가 판정 파라미터 {name: value}
+
+        Returns:
+            dict: 실제 적용된 값 (잘못된 키/값이면 ValueError, 아무것도 바꾸지 않음)
+        """
+        applied = self.parse_tuning(params)
+        if "confidence" in applied:
+            self.threshold = applied["confidence"]
+        if "iou_threshold" in applied:
+            self.iou_threshold = applied["iou_threshold"]
+        for name, value in applied.get("trigger", {}).items():
+            setattr(self, name, value)
+        if "confidence" in applied or "iou_threshold" in applied:
+            # 이전 임계값으로 얻은 결과는 재사용하지 않음
+            self._last_thumb = None
+            self._cached_boxes = None
+        return applied
+
+    def reset_tracking(self, compact=False):
+        """
+        추적 상태 초기화 (세션 전환, 호환되지 않는 모델 교체 시)
+        - dict는 clear()로 메모리까지 반환되므로 compact는 ObstacleDetector와의 호환용
+        """
         self.tracked_objects.clear()
         self.last_added.clear()
+        self._last_thumb = None
+        self._cached_boxes = None
+        self._reuse_streak = 0
+
+    def load_model(self, weights):
+        """
+        교체용 모델 로드 + 예열 (백그라운드 스레드에서 호출)
+        - 현재 모델은 그대로 사용되며, 실제 교체는 swap_model()에서 수행
+        """
+        model = YOLO(weights)
+        imgsz = self._input_size(model)
+        blank = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        for _ in range(2):
+            model.predict(
+                blank,
+                conf=self.threshold,
+                iou=self.iou_threshold,
+                verbose=False,
+                **self._device_kwargs(),
+            )
+        return model
+
+    def swap_model(self, model):
+        """
+        모델 교체 (추론 스레드에서 프레임 사이에 호출)
+        - 클래스 맵이 같으면 추적 중인 물체/쿨다운 상태 유지, 다르면 초기화
+        - 이전 모델 결과(재사용 캐시)와 raw runner는 항상 폐기
+        - 입력 크기가 다른 모델이면 letterbox 버퍼를 새 크기로 다시 만듦
+
+        Returns:
+            dict: {"weights": str, "state_kept": bool}
+        """
+        kept = dict(model.names) == dict(self.model.names)
+        self.model = model
+        self.is_obb = model.task == "obb"
+        imgsz = self._input_size(model)
+        if imgsz != self.preprocess.imgsz:
+            self.preprocess = LetterboxBuffer(imgsz)
+        self._raw_runner = None
+        self._raw_runner_model = None  # 이전 모델 참조 해제
+        if kept:
+            self._last_thumb = None
+            self._cached_boxes = None
+            self._reuse_streak = 0
+        else:
+            self.reset_tracking()
+        return {"weights": getattr(model, "ckpt_path", None), "state_kept": kept}
@@ -5,11 +5,24 @@ Integrated from test/changhee/obstacle_v2/risk_engine.py
 
 from __future__ import annotations
 
-import math
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
-
-from detectors.obstacle_tracker import Detection
+from dataclasses import dataclass, field, fields
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+import numpy as np
+
+from common.tuning import to_int
+from detectors.obstacle_tracker import Detection, DetectionBatch
 
 RISK_SAFE = 0
 RISK_CAUTION = 1
@@ -68,12 +81,71 @@ class RiskEngineConfig:
     hysteresis_frames: int = 10
     stale_frames: int = 30
 
+    # 시간(초) 기준 설정 (timestamp_s가 주어질 때만 사용, None이면 프레임 기준)
+    streak_warn_s: Optional[float] = None
+    streak_caution_s: Optional[float] = None
+    hysteresis_s: Optional[float] = None
+    stale_s: Optional[float] = None
+    max_streak_step_s: float = (
+        0.25  # 접근 누적 시 한 번에 더할 최대 시간 (프레임 공백 보호)
+    )
+
     class_weights: Dict[str, float] = field(
         default_factory=lambda: {"Person": 1.0, "Cart": 0.8}
     )
     center_bonus: float = 0.2
     approach_bonus: float = 0.2
 
+    def update(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        런타임 튜닝: 필드 타입에 맞게 변환 후 적용
+        (하나라도 잘못된 값이면 ValueError, 아무것도 바꾸지 않음)
+
+        Returns:
+            dict: 실제 적용된 값
+
+        Raises:
+            TypeError: changes가 dict가 아닌 경우
+        """
+        parsed = self.parse(changes)
+        for name, value in parsed.items():
+            setattr(self, name, value)
+        return parsed
+
+    @classmethod
+    def parse(cls, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """update()의 값 검사/변환만 수행 (인스턴스 없이 미리 검증할 때 사용)"""
+        if not isinstance(changes, dict):
+            raise TypeError(
+                f"RiskEngineConfig changes must be a dict: {type(changes).__name__}"
+            )
+        hints = get_type_hints(cls)
+        names = {f.name for f in fields(cls)}
+        parsed: Dict[str, Any] = {}
+        for name, value in changes.items():
+            if name not in names:
+                raise ValueError(f"Unknown RiskEngineConfig field: {name}")
+            ftype = hints[name]
+            optional = get_origin(ftype) is Union and type(None) in get_args(ftype)
+            if optional:
+                ftype = next(t for t in get_args(ftype) if t is not type(None))
+            try:
+                if value is None:
+                    if not optional:
+                        raise ValueError("value is required")
+                    parsed[name] = None
+                elif get_origin(ftype) is dict:
+                    if not isinstance(value, dict):
+                        raise TypeError("expected a dict")
+                    parsed[name] = {str(k): float(v) for k, v in value.items()}
+                elif ftype is int:
+                    parsed[name] = to_int(value)
+                else:
+                    parsed[name] = float(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid value for {name}: {value!r} ({e})") from e
+        return parsed
+
 
 class RiskEngine:
     """
@@ -81,173 +153,497 @@ class RiskEngine:
     - 절대거리 대신 bbox 기반 dist_proxy (작을수록 가까움)
     - dist_proxy가 줄어들면 approaching
     - pTTC = dist_proxy / closing_rate (작을수록 임박)
+    - timestamp_s가 주어지면 Track별 실제 dt로 closing_rate 계산 (고정 fps 불필요)
+
+    Track 상태는 slot 인덱스 기반 NumPy 컬럼 배열로 보관하고,
+    프레임당 한 번의 벡터 연산으로 전체 객체를 갱신한다.
     """
 
+    _INITIAL_CAPACITY = 64
+
     def __init__(self, cfg: RiskEngineConfig):
         self.cfg = cfg
-        self.states: Dict[Tuple[str, int], TrackState] = {}
+        self._class_codes: Dict[str, int] = {}
+        self._class_names: List[str] = []
+        self._table_codes: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._alloc(self._INITIAL_CAPACITY)
+
+    # =========================
+    # Track slot storage
+    # =========================
+    def _alloc(self, capacity: int) -> None:
+        self._key = np.zeros(capacity, dtype=np.int64)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._has_ema = np.zeros(capacity, dtype=bool)
+        self._dist_ema = np.zeros(capacity, dtype=np.float64)
+        self._approach_streak = np.zeros(capacity, dtype=np.int64)
+        self._risk_level = np.zeros(capacity, dtype=np.int64)
+        self._hold_frames = np.zeros(capacity, dtype=np.int64)
+        self._last_seen = np.zeros(capacity, dtype=np.int64)
+        self._last_ts = np.zeros(capacity, dtype=np.float64)
+        self._approach_s = np.zeros(capacity, dtype=np.float64)
+        self._hold_s = np.zeros(capacity, dtype=np.float64)
+
+    def _grow(self, min_capacity: int) -> None:
+        old = len(self._key)
+        capacity = max(min_capacity, old * 2)
+        for name in (
+            "_key",
+            "_active",
+            "_has_ema",
+            "_dist_ema",
+            "_approach_streak",
+            "_risk_level",
+            "_hold_frames",
+            "_last_seen",
+            "_last_ts",
+            "_approach_s",
+            "_hold_s",
+        ):
+            arr = getattr(self, name)
+            grown = np.zeros(capacity, dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+
+    def register_class(self, cls_name: str) -> int:
+        """클래스 이름에 대한 정수 코드 반환 (처음 보는 이름이면 등록)"""
+        code = self._class_codes.get(cls_name)
+        if code is None:
+            code = len(self._class_names)
+            self._class_codes[cls_name] = code
+            self._class_names.append(cls_name)
+        return code
+
+    def class_codes(self, names: Tuple[str, ...]) -> np.ndarray:
+        """모델 클래스 테이블(cls_id -> 이름)에 대한 코드 배열 (테이블별 캐시)"""
+        codes = self._table_codes.get(names)
+        if codes is None:
+            codes = np.array(
+                [self.register_class(name) for name in names], dtype=np.int64
+            )
+            self._table_codes[names] = codes
+        return codes
+
+    @staticmethod
+    def _make_keys(cls_codes: np.ndarray, track_ids: np.ndarray) -> np.ndarray:
+        """(class, track_id) 쌍을 int64 단일 키로 인코딩"""
+        return (cls_codes.astype(np.int64) << 32) | (
+            track_ids.astype(np.int64) & 0xFFFFFFFF
+        )
+
+    def _lookup_slots(self, keys: np.ndarray, frame_index: int) -> np.ndarray:
+        """키별 slot 인덱스 반환 (없으면 새 slot 할당)"""
+        active_slots = np.flatnonzero(self._active)
+        slots = np.full(len(keys), -1, dtype=np.int64)
+
+        if len(active_slots) > 0:
+            active_keys = self._key[active_slots]
+            order = np.argsort(active_keys, kind="stable")
+            sorted_keys = active_keys[order]
+            pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+            found = sorted_keys[pos] == keys
+            slots[found] = active_slots[order[pos[found]]]
+
+        missing = slots < 0
+        if missing.any():
+            new_keys, inverse = np.unique(keys[missing], return_inverse=True)
+            free = np.flatnonzero(~self._active)
+            if len(free) < len(new_keys):
+                self._grow(len(self._key) + len(new_keys))
+                free = np.flatnonzero(~self._active)
+            new_slots = free[: len(new_keys)]
+
+            # 새 TrackState 초기화
+            self._key[new_slots] = new_keys
+            self._active[new_slots] = True
+            self._has_ema[new_slots] = False
+            self._dist_ema[new_slots] = 0.0
+            self._approach_streak[new_slots] = 0
+            self._risk_level[new_slots] = RISK_SAFE
+            self._hold_frames[new_slots] = 0
+            self._last_seen[new_slots] = frame_index
+            self._approach_s[new_slots] = 0.0
+            self._hold_s[new_slots] = 0.0
+
+            slots[missing] = new_slots[inverse.reshape(-1)]
+        return slots
 
+    @staticmethod
+    def _occurrence_rank(keys: np.ndarray) -> Optional[np.ndarray]:
+        """
+        같은 키가 한 프레임에 여러 번 나오면(예: track_id=-1) 순서대로 0, 1, 2...
+        순차 처리와 동일한 결과를 위해 rank별로 나누어 갱신한다.
+        중복 키가 없으면 None.
+        """
+        n = len(keys)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.ones(n, dtype=bool)
+        starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        if starts.all():
+            return None
+        group_start = np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n) - group_start
+        return rank
+
+    @property
+    def states(self) -> Dict[Tuple[str, int], TrackState]:
+        """디버깅용: 현재 Track 상태를 TrackState 딕셔너리로 반환"""
+        out: Dict[Tuple[str, int], TrackState] = {}
+        for slot in np.flatnonzero(self._active):
+            key = int(self._key[slot])
+            track_id = int(np.int32(np.uint32(key & 0xFFFFFFFF)))
+            cls_name = self._class_names[key >> 32]
+            out[(cls_name, track_id)] = TrackState(
+                dist_ema=(float(self._dist_ema[slot]) if self._has_ema[slot] else None),
+                approach_streak=int(self._approach_streak[slot]),
+                risk_level=int(self._risk_level[slot]),
+                hold_frames=int(self._hold_frames[slot]),
+                last_seen_frame=int(self._last_seen[slot]),
+            )
+        return out
+
+    def reset(self, compact: bool = False) -> None:
+        """모든 Track 상태 제거 (compact=True면 늘어난 slot 배열도 초기 크기로 축소)"""
+        if compact:
+            self._alloc(self._INITIAL_CAPACITY)
+        else:
+            self._active[:] = False
+
+    # =========================
+    # Update
+    # =========================
     def update(
         self,
-        detections: List[Detection],
+        detections: Union[DetectionBatch, Sequence[Detection]],
         frame_shape_hw: Tuple[int, int],
         frame_index: int,
         fps: float,
+        timestamp_s: Optional[float] = None,
     ) -> Dict[int, RiskMetrics]:
-        H, W = frame_shape_hw
-
-        metrics_by_idx: Dict[int, RiskMetrics] = {}
-
-        for idx, det in enumerate(detections):
-            key = (det.cls_name, int(det.track_id))
-            st = self.states.get(key)
-            if st is None:
-                st = TrackState(last_seen_frame=frame_index)
-                self.states[key] = st
-            st.last_seen_frame = frame_index
-
-            x1, y1, x2, y2 = det.xyxy
-            box_w = max(1.0, x2 - x1)
-            box_h = max(1.0, y2 - y1)
-            area = box_w * box_h
-
-            cx = 0.5 * (x1 + x2)
-            center_left = (1.0 - self.cfg.center_band_ratio) * 0.5 * W
-            center_right = W - center_left
-            in_center = center_left <= cx <= center_right
-
-            near_left = (1.0 - self.cfg.near_center_band_ratio) * 0.5 * W
-            near_right = W - near_left
-            in_near_center = near_left <= cx <= near_right
+        if not isinstance(detections, DetectionBatch):
+            detections = DetectionBatch.from_detections(list(detections))
+        cols = self.update_batch(
+            detections, frame_shape_hw, frame_index, fps, timestamp_s
+        )
+        return self.to_metrics(cols)
+
+    def update_batch(
+        self,
+        batch: DetectionBatch,
+        frame_shape_hw: Tuple[int, int],
+        frame_index: int,
+        fps: float,
+        timestamp_s: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """DetectionBatch 컬럼을 그대로 사용해 갱신 (update_arrays 결과 반환)"""
+        codes = self.class_codes(batch.names)
+        if len(batch) > 0 and 0 <= batch.cls.min() and batch.cls.max() < len(codes):
+            cls_codes = codes[batch.cls]
+        else:
+            # 빈 배치 또는 테이블 밖의 cls_id(str(cls_id)로 등록)
+            cls_codes = np.array(
+                [self.register_class(name) for name in batch.cls_names],
+                dtype=np.int64,
+            )
+        return self.update_arrays(
+            batch.xyxy,
+            cls_codes,
+            batch.track_id,
+            frame_shape_hw,
+            frame_index,
+            fps,
+            timestamp_s,
+        )
 
-            dist_proxy = self._dist_proxy(box_h=box_h, area=area, y2=y2, H=H)
+    @staticmethod
+    def to_metrics(cols: Dict[str, np.ndarray]) -> Dict[int, RiskMetrics]:
+        """update_arrays 결과를 {detection index: RiskMetrics}로 변환"""
+        rows = zip(
+            cols["risk_level"].tolist(),
+            cols["score"].tolist(),
+            cols["pttc_s"].tolist(),
+            cols["dist_proxy"].tolist(),
+            cols["closing_rate"].tolist(),
+            cols["in_center"].tolist(),
+            cols["approaching"].tolist(),
+            cols["box_h"].tolist(),
+            cols["area"].tolist(),
+        )
+        return {
+            idx: RiskMetrics(
+                risk_level=level,
+                risk_name=RISK_NAME[level],
+                score=score,
+                pttc_s=pttc_s,
+                dist_proxy=dist_proxy,
+                closing_rate=closing_rate,
+                in_center=in_center,
+                approaching=approaching,
+                box_h=box_h,
+                area=area,
+            )
+            for idx, (
+                level,
+                score,
+                pttc_s,
+                dist_proxy,
+                closing_rate,
+                in_center,
+                approaching,
+                box_h,
+                area,
+            ) in enumerate(rows)
+        }
+
+    def update_arrays(
+        self,
+        xyxy: np.ndarray,
+        cls_codes: np.ndarray,
+        track_ids: np.ndarray,
+        frame_shape_hw: Tuple[int, int],
+        frame_index: int,
+        fps: float,
+        timestamp_s: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        컬럼 배열 입력으로 한 프레임 갱신
+
+        Args:
+            xyxy: (N, 4) float64 박스
+            cls_codes: (N,) 클래스 코드 (register_class로 등록한 값)
+            track_ids: (N,) Track ID
+            fps: timestamp_s가 없거나 dt를 구할 수 없을 때 사용할 프레임 속도
+            timestamp_s: 프레임 캡처 시각 (초), 주어지면 Track별 실제 dt 사용
+
+        Returns:
+            dict: RiskMetrics 필드명 -> (N,) 배열
+        """
+        cfg = self.cfg
+        H, W = frame_shape_hw
+        n = len(xyxy)
+        if n == 0:
+            self._cleanup(frame_index, timestamp_s)
+            return {
+                name: np.zeros(0, dtype=dtype)
+                for name, dtype in (
+                    ("risk_level", np.int64),
+                    ("score", np.float64),
+                    ("pttc_s", np.float64),
+                    ("dist_proxy", np.float64),
+                    ("closing_rate", np.float64),
+                    ("in_center", bool),
+                    ("approaching", bool),
+                    ("box_h", np.float64),
+                    ("area", np.float64),
+                )
+            }
+
+        x1, y1, x2, y2 = xyxy[:, 0], xyxy[:, 1], xyxy[:, 2], xyxy[:, 3]
+        box_w = np.maximum(1.0, x2 - x1)
+        box_h = np.maximum(1.0, y2 - y1)
+        area = box_w * box_h
+
+        cx = 0.5 * (x1 + x2)
+        center_left = (1.0 - cfg.center_band_ratio) * 0.5 * W
+        center_right = W - center_left
+        in_center = (center_left <= cx) & (cx <= center_right)
+
+        near_left = (1.0 - cfg.near_center_band_ratio) * 0.5 * W
+        near_right = W - near_left
+        in_near_center = (near_left <= cx) & (cx <= near_right)
+
+        dist_proxy = self._dist_proxy(box_h=box_h, area=area, y2=y2, H=H)
+
+        mega_close = ((box_h / max(1.0, H)) >= cfg.mega_close_boxh_ratio) | (
+            (area / max(1.0, (W * H))) >= cfg.mega_close_area_ratio
+        )
+
+        w_cls = np.array(
+            [float(cfg.class_weights.get(name, 1.0)) for name in self._class_names],
+            dtype=np.float64,
+        )[cls_codes]
+
+        keys = self._make_keys(cls_codes, track_ids)
+        slots = self._lookup_slots(keys, frame_index)
+        rank = self._occurrence_rank(keys)
+
+        dist_ema = np.empty(n, dtype=np.float64)
+        closing_rate = np.empty(n, dtype=np.float64)
+        risk_level = np.empty(n, dtype=np.int64)
+
+        alpha = cfg.ema_alpha
+        use_fps = fps > 1e-6
+        use_ts = timestamp_s is not None
+        fallback_step = 1.0 / fps if use_fps else 0.0
+
+        max_rank = 0 if rank is None else int(rank.max())
+        for r in range(max_rank + 1):
+            # 중복 키가 없으면(일반적인 경우) 마스크 없이 전체를 한 번에 처리
+            m = slice(None) if max_rank == 0 else (rank == r)
+            s = slots[m]
+            dp = dist_proxy[m]
 
             # EMA
-            alpha = self.cfg.ema_alpha
-            st.prev_dist_ema = st.dist_ema
-            st.dist_ema = (
-                dist_proxy
-                if st.dist_ema is None
-                else (alpha * dist_proxy + (1 - alpha) * st.dist_ema)
+            had_ema = self._has_ema[s]
+            prev_ema = self._dist_ema[s]
+            ema = np.where(had_ema, alpha * dp + (1 - alpha) * prev_ema, dp)
+
+            # 초당 변화율 계산용 1/dt (timestamp가 없으면 고정 fps)
+            inv_dt = fps
+            dt = np.full(len(s), fallback_step)
+            if use_ts:
+                ts_dt = timestamp_s - self._last_ts[s]
+                valid_dt = had_ema & (ts_dt > 1e-6)
+                dt = np.where(valid_dt, ts_dt, fallback_step)
+                inv_dt = np.where(
+                    valid_dt,
+                    1.0 / np.where(valid_dt, ts_dt, 1.0),
+                    fps if use_fps else 0.0,
+                )
+
+            cr = np.zeros(len(s), dtype=np.float64)
+            if use_fps or use_ts:
+                cr = np.where(had_ema, np.maximum(0.0, (prev_ema - ema) * inv_dt), 0.0)
+                cr = cr + 0.0  # -0.0 정규화
+
+            approaching = cr >= cfg.closing_rate_min
+            approach_in_band = approaching & (in_center[m] | in_near_center[m])
+
+            streak = self._approach_streak[s]
+            streak = np.where(
+                approach_in_band,
+                streak + 1,
+                np.maximum(0, streak - 1),
             )
 
-            closing_rate = 0.0
-            if st.prev_dist_ema is not None and fps > 1e-6:
-                closing_rate = max(0.0, (st.prev_dist_ema - st.dist_ema) * fps)
-
-            approaching = closing_rate >= self.cfg.closing_rate_min
+            # 접근 지속 시간 (초)
+            step = np.minimum(dt, cfg.max_streak_step_s)
+            approach_s = self._approach_s[s]
+            approach_s = np.where(
+                approach_in_band, approach_s + step, np.maximum(0.0, approach_s - step)
+            )
 
-            if approaching and (in_center or in_near_center):
-                st.approach_streak += 1
+            if use_ts and cfg.streak_caution_s is not None:
+                streak_caution = approach_s >= cfg.streak_caution_s
+            else:
+                streak_caution = streak >= cfg.streak_caution
+            if use_ts and cfg.streak_warn_s is not None:
+                streak_warn = approach_s >= cfg.streak_warn_s
             else:
-                st.approach_streak = max(0, st.approach_streak - 1)
+                streak_warn = streak >= cfg.streak_warn
 
-            pttc_s = self._pttc_seconds(
-                dist_proxy=st.dist_ema, closing_rate=closing_rate
-            )
+            pttc = self._pttc_seconds(dist_proxy=ema, closing_rate=cr)
 
-            mega_close = (box_h / max(1.0, H)) >= self.cfg.mega_close_boxh_ratio or (
-                area / max(1.0, (W * H))
-            ) >= self.cfg.mega_close_area_ratio
-
-            candidate_level = RISK_SAFE
-            if mega_close and in_near_center:
-                candidate_level = RISK_WARN
-            elif (
-                in_center
-                and st.approach_streak >= self.cfg.streak_warn
-                and pttc_s <= self.cfg.pttc_warn_s
-            ):
-                candidate_level = RISK_WARN
-            elif (
-                in_near_center
-                and st.approach_streak >= self.cfg.streak_caution
-                and pttc_s <= self.cfg.pttc_caution_s
-            ):
-                candidate_level = RISK_CAUTION
+            candidate = np.full(len(s), RISK_SAFE, dtype=np.int64)
+            caution = in_near_center[m] & streak_caution & (pttc <= cfg.pttc_caution_s)
+            warn = (mega_close[m] & in_near_center[m]) | (
+                in_center[m] & streak_warn & (pttc <= cfg.pttc_warn_s)
+            )
+            candidate[caution] = RISK_CAUTION
+            candidate[warn] = RISK_WARN
 
             # hysteresis
-            if candidate_level > st.risk_level:
-                # 위험도 상승: 즉시 반영
-                st.risk_level = candidate_level
-                st.hold_frames = self.cfg.hysteresis_frames
-            elif candidate_level < st.risk_level:
-                # 위험도 하락: hysteresis_frames 동안 유지
-                if st.hold_frames > 0:
-                    st.hold_frames -= 1  # 카운터 감소
-                else:
-                    st.risk_level = candidate_level  # 카운터 소진 후 하락
-
-            score = self._score(
-                cls_name=det.cls_name,
-                risk_level=st.risk_level,
-                dist_proxy=st.dist_ema,
-                pttc_s=pttc_s,
-                in_center=in_center,
-                approaching=approaching,
+            level = self._risk_level[s]
+            hold = self._hold_frames[s]
+            hold_s = self._hold_s[s]
+            rising = candidate > level
+            falling = candidate < level
+            # 위험도 상승: 즉시 반영 / 하락: hysteresis_frames (또는 hysteresis_s) 동안 유지
+            if use_ts and cfg.hysteresis_s is not None:
+                can_fall = hold_s <= 0
+            else:
+                can_fall = hold <= 0
+            new_level = np.where(rising | (falling & can_fall), candidate, level)
+            new_hold = np.where(
+                rising,
+                cfg.hysteresis_frames,
+                np.where(falling & (hold > 0), hold - 1, hold),
             )
-
-            metrics_by_idx[idx] = RiskMetrics(
-                risk_level=st.risk_level,
-                risk_name=RISK_NAME[st.risk_level],
-                score=score,
-                pttc_s=pttc_s,
-                dist_proxy=float(
-                    st.dist_ema if st.dist_ema is not None else dist_proxy
-                ),
-                closing_rate=float(closing_rate),
-                in_center=bool(in_center),
-                approaching=bool(approaching),
-                box_h=float(box_h),
-                area=float(area),
+            new_hold_s = np.where(
+                rising,
+                cfg.hysteresis_s or 0.0,
+                np.where(falling & (hold_s > 0), hold_s - dt, hold_s),
             )
 
-        self._cleanup(frame_index)
-        return metrics_by_idx
-
-    def _cleanup(self, frame_index: int) -> None:
-        stale = self.cfg.stale_frames
-        to_del = [
-            k
-            for k, st in self.states.items()
-            if (frame_index - st.last_seen_frame) > stale
-        ]
-        for k in to_del:
-            del self.states[k]
+            self._has_ema[s] = True
+            self._dist_ema[s] = ema
+            self._approach_streak[s] = streak
+            self._risk_level[s] = new_level
+            self._hold_frames[s] = new_hold
+            self._hold_s[s] = new_hold_s
+            self._approach_s[s] = approach_s
+            self._last_seen[s] = frame_index
+            if use_ts:
+                self._last_ts[s] = timestamp_s
+
+            dist_ema[m] = ema
+            closing_rate[m] = cr
+            risk_level[m] = new_level
+
+        approaching = closing_rate >= cfg.closing_rate_min
+        pttc_s = self._pttc_seconds(dist_proxy=dist_ema, closing_rate=closing_rate)
+        score = self._score(
+            w_cls=w_cls,
+            risk_level=risk_level,
+            dist_proxy=dist_ema,
+            pttc_s=pttc_s,
+            in_center=in_center,
+            approaching=approaching,
+        )
+
+        self._cleanup(frame_index, timestamp_s)
+        return {
+            "risk_level": risk_level,
+            "score": score,
+            "pttc_s": pttc_s,
+            "dist_proxy": dist_ema,
+            "closing_rate": closing_rate,
+            "in_center": in_center,
+            "approaching": approaching,
+            "box_h": box_h,
+            "area": area,
+        }
+
+    def _cleanup(self, frame_index: int, timestamp_s: Optional[float] = None) -> None:
+        if timestamp_s is not None and self.cfg.stale_s is not None:
+            stale = (timestamp_s - self._last_ts) > self.cfg.stale_s
+        else:
+            stale = (frame_index - self._last_seen) > self.cfg.stale_frames
+        self._active &= ~stale
 
     @staticmethod
-    def _dist_proxy(box_h: float, area: float, y2: float, H: float) -> float:
-        inv_h = 1.0 / max(1.0, box_h)
-        inv_sqrt_area = 1.0 / max(1.0, math.sqrt(area))
-        bottom_gap = max(0.0, (H - y2) / max(1.0, H))
+    def _dist_proxy(
+        box_h: np.ndarray, area: np.ndarray, y2: np.ndarray, H: float
+    ) -> np.ndarray:
+        inv_h = 1.0 / np.maximum(1.0, box_h)
+        inv_sqrt_area = 1.0 / np.maximum(1.0, np.sqrt(area))
+        bottom_gap = np.maximum(0.0, (H - y2) / max(1.0, H))
         return 0.60 * inv_h + 0.25 * inv_sqrt_area + 0.15 * bottom_gap
 
     @staticmethod
-    def _pttc_seconds(dist_proxy: Optional[float], closing_rate: float) -> float:
-        if dist_proxy is None or closing_rate <= 1e-9:
-            return 1e9
-        return float(dist_proxy / closing_rate)
+    def _pttc_seconds(dist_proxy: np.ndarray, closing_rate: np.ndarray) -> np.ndarray:
+        safe_rate = np.where(closing_rate <= 1e-9, 1.0, closing_rate)
+        return np.where(closing_rate <= 1e-9, 1e9, dist_proxy / safe_rate)
 
     def _score(
         self,
-        cls_name: str,
-        risk_level: int,
-        dist_proxy: Optional[float],
-        pttc_s: float,
-        in_center: bool,
-        approaching: bool,
-    ) -> float:
-        w_cls = float(self.cfg.class_weights.get(cls_name, 1.0))
-        closeness = 0.0 if dist_proxy is None else (1.0 / max(1e-6, dist_proxy))
-        urgency = 0.0 if pttc_s > 1e6 else (1.0 / max(1e-3, pttc_s))
-
-        score = 0.0
+        w_cls: np.ndarray,
+        risk_level: np.ndarray,
+        dist_proxy: np.ndarray,
+        pttc_s: np.ndarray,
+        in_center: np.ndarray,
+        approaching: np.ndarray,
+    ) -> np.ndarray:
+        closeness = 1.0 / np.maximum(1e-6, dist_proxy)
+        urgency = np.where(pttc_s > 1e6, 0.0, 1.0 / np.maximum(1e-3, pttc_s))
+
+        score = np.zeros(len(risk_level), dtype=np.float64)
         score += risk_level * 1000.0
         score += w_cls * 100.0
         score += 30.0 * closeness
         score += 20.0 * urgency
-        if in_center:
-            score += 50.0 * self.cfg.center_bonus
-        if approaching:
-            score += 50.0 * self.cfg.approach_bonus
+        score += np.where(in_center, 50.0 * self.cfg.center_bonus, 0.0)
+        score += np.where(approaching, 50.0 * self.cfg.approach_bonus, 0.0)
         return score
@@ -1,15 +1,31 @@
+import functools
+import queue
 import threading
+import time
+from typing import Optional
 
 from network.udp_handler import UDPFrameReceiver, UDPFrameSender
+from network.ai_pool import AIWorker, AIWorkerPool
+from network.flow_control import CART_STREAM, FRONT_STREAM, CreditGate
+from network.frame_fanout import FrameFanout, FrameSubscriber
 from network.tcp_server import TCPServer
 from network.tcp_client import TCPClient
 from core.engine import SmartCartEngine
+from core.event_pipeline import EventPipeline
+from core.session_registry import CartSession, SessionRegistry
 from database.db_handler import DBHandler
 from database.product_dao import ProductDAO
 from database.transaction_dao import TransactionDAO
 from database.obstacle_log_dao import ObstacleLogDAO
-from common.config import config
-from common.protocols import Protocol, MessageType, AIEvent, UICommand, UIRequest
+from common.config import AIWorkerConfig, config
+from common.protocols import (
+    Protocol,
+    MessageType,
+    AIEvent,
+    AIControl,
+    UICommand,
+    UIRequest,
+)
 from utils.logger import SystemLogger
 
 
@@ -38,65 +54,113 @@ class MainPC2Hub:
         self.obstacle_dao = ObstacleLogDAO(self.db_handler)
 
         # -------------------------
-        # UI Client (for sending commands to UI)
+        # Carts (cart_code별 세션 / Business Engine / UI Client)
         # -------------------------
-        self.ui_client = TCPClient(
-            host=config.network.pc3_ui.ip,
-            port=config.network.pc3_ui.ui_port,
+        pc2 = config.network.pc2_main
+        self._ui_endpoints = {
+            pc2.cart_code: (config.network.pc3_ui.ip, config.network.pc3_ui.ui_port)
+        }
+        for cart in pc2.carts or []:
+            self._ui_endpoints[cart.cart_code] = (cart.ui_ip, cart.ui_port)
+        self.carts = SessionRegistry(
+            self._create_cart,
+            cart_codes=self._ui_endpoints,
+            default_cart=pc2.cart_code,
         )
 
         # -------------------------
-        # Business Engine
+        # AI Event Pipeline (카트 세션별 순서 유지, TCP handler는 큐에 넣고 바로 응답)
+        # 모든 카트가 고정 크기 worker pool을 공유
         # -------------------------
-        self.engine = SmartCartEngine(
-            product_dao=self.product_dao,
-            transaction_dao=self.tx_dao,
-            obstacle_dao=self.obstacle_dao,
-            ui_client=self.ui_client,
+        self.events = EventPipeline(
+            self._apply_ai_event,
+            **dict(pc2.event_pipeline or {}),
         )
 
         # -------------------------
         # Session (will be started by UI request)
         # -------------------------
-        self.session_id = None
-        self.logger.log_event("SESSION", "No active session. Waiting for UI to start.")
+        self.logger.log_event(
+            "SESSION",
+            f"Serving carts {sorted(self._ui_endpoints)}. Waiting for UI to start.",
+        )
 
         # -------------------------
-        # UDP Forwarders (PC2 → AI)
+        # AI Worker Pool (카트를 AI 서버 인스턴스에 부하 상한이 있는 일관 해싱으로 배정,
+        # worker 하나가 여러 카트를 맡음, health check), ai_workers가 없으면 pc1_ai 하나
         # -------------------------
-        ai_ip = config.network.pc1_ai.ip
-        self.front_forwarder = UDPFrameSender(
-            host=ai_ip,
-            port=config.network.pc1_ai.udp_port_front,
-        )
-        self.cart_forwarder = UDPFrameSender(
-            host=ai_ip,
-            port=config.network.pc1_ai.udp_port_cart,
+        ai = config.network.pc1_ai
+        workers = pc2.ai_workers or [
+            AIWorkerConfig(
+                name="ai",
+                ip=ai.ip,
+                udp_port_front=ai.udp_port_front,
+                udp_port_cart=ai.udp_port_cart,
+                control_port=ai.control_port,
+            )
+        ]
+        # AI 서버 통보 (카트 배정 / 세션 시작·종료), 순서 보장을 위해 단일 전송 스레드
+        self._ai_control_queue = queue.Queue()
+        self._ai_unavailable = set()  # AI worker가 없어 UI에 알린 카트
+        self.ai_pool = AIWorkerPool(
+            [
+                AIWorker(
+                    w.name,
+                    w.ip,
+                    w.udp_port_front,
+                    w.udp_port_cart,
+                    w.control_port,
+                    max_carts=w.max_carts,
+                )
+                for w in workers
+            ],
+            on_change=self._on_ai_pool_change,
+            **dict(pc2.ai_pool or {}),
         )
 
         # -------------------------
-        # UDP Receivers (from a hypothetical PC3)
-        # We need to define ports for PC2 to listen on
-        # These are not in the current network config, so we'll use temporary ports
-        # This highlights a gap in the config design.
+        # Camera streams (카트별 UDP 수신 → fan-out, 구독자별 rate limit / drop 정책)
+        # AI 구독자는 credit 확인 후 카트를 맡은 worker로 수신 스레드에서 바로 전송
+        # (다른 구독자가 느려도 AI 경로는 지연 없음)
         # -------------------------
-        self.front_receiver = UDPFrameReceiver(
-            "0.0.0.0",
-            config.network.pc2_main.udp_front_cam_port,
-        )
-        self.cart_receiver = UDPFrameReceiver(
-            "0.0.0.0",
-            config.network.pc2_main.udp_cart_cam_port,
-        )
-        # self.logger.log_event("WARN", "Using placeholder UDP receiver ports (9000, 9001)")
+        camera_ports = {pc2.cart_code: (pc2.udp_front_cam_port, pc2.udp_cart_cam_port)}
+        for cart in pc2.carts or []:
+            if cart.udp_front_cam_port and cart.udp_cart_cam_port:
+                camera_ports[cart.cart_code] = (
+                    cart.udp_front_cam_port,
+                    cart.udp_cart_cam_port,
+                )
+        self.credit_stale_s = (ai.frame_credits or {}).get("stale_s", 2.0)
+        self.frame_credits = {}  # cart_code → {stream: CreditGate}
+        self.frames = {}  # cart_code → {stream: FrameFanout}
+        self._receivers = []  # (cart_code, stream, UDPFrameReceiver)
+        for cart_code, (front_port, cart_port) in camera_ports.items():
+            self._add_camera(cart_code, front_port, cart_port)
+        # 한 번에 등록해 해시만으로 배치 (등록 순서와 무관)
+        self.ai_pool.add_carts(camera_ports)
+
+        for sub in pc2.frame_subscribers or []:
+            self.add_frame_subscriber(
+                sub.name,
+                sub.stream,
+                sub.host,
+                sub.port,
+                cart_code=sub.cart_code,
+                max_fps=sub.max_fps,
+                max_queue=sub.max_queue,
+                overflow=sub.overflow,
+            )
 
         # -------------------------
         # UI Request Server (TCP PULL from UI)
         # -------------------------
+        server_opts = dict(config.network.pc2_main.tcp_server or {})
+        self.server_stats_interval = server_opts.pop("stats_interval_s", 60)
         self.ui_request_server = TCPServer(
             host="0.0.0.0",
             port=config.network.pc2_main.ui_port,
             handler=self.handle_ui_request,
+            **server_opts,
         )
 
         # -------------------------
@@ -106,6 +170,7 @@ class MainPC2Hub:
             host="0.0.0.0",
             port=config.network.pc2_main.event_port,
             handler=self.handle_ai_event,
+            **server_opts,
         )
 
         self.logger.log_event(
@@ -114,17 +179,242 @@ class MainPC2Hub:
         )
 
     # =========================
-    # UDP Forwarding Loops
+    # Carts
     # =========================
-    def forward_front_cam(self):
-        self.logger.log_event("NET", "Front cam forwarding started")
-        for jpeg_bytes in self.front_receiver.receive_packets():
-            self.front_forwarder.send_frame_raw(jpeg_bytes)
+    def _create_cart(self, cart_code: str) -> CartSession:
+        """카트별 UI 연결과 엔진 (위험 단계 / 상품 중복 제거 상태는 카트마다 따로)"""
+        ui_ip, ui_port = self._ui_endpoints[cart_code]
+        ui_client = TCPClient(host=ui_ip, port=ui_port)
+        engine = SmartCartEngine(
+            product_dao=self.product_dao,
+            transaction_dao=self.tx_dao,
+            obstacle_dao=self.obstacle_dao,
+            ui_client=ui_client,
+        )
+        return CartSession(cart_code, ui_client, engine)
 
-    def forward_cart_cam(self):
-        self.logger.log_event("NET", "Cart cam forwarding started")
-        for jpeg_bytes in self.cart_receiver.receive_packets():
-            self.cart_forwarder.send_frame_raw(jpeg_bytes)
+    # =========================
+    # AI Workers (카트 배정 / 세션 통보)
+    # =========================
+    def _on_ai_pool_change(self, moves: dict) -> None:
+        """
+        AI worker 배정/상태 변경
+        - 옮겨진 카트는 credit 초기화 (새 worker가 광고할 때까지 제한 없이 전달)
+        - worker가 없는 카트는 ERROR 기록 + 카트 UI에 장애물/상품 인식 중단 알림
+        - 정상 worker마다 맡은 카트 목록 (진행 중 세션 / UI 주소 / 프레임 출발 포트)을
+          다시 알림 (바뀐 것이 없으면 AI 서버가 무시)
+        """
+        for cart_code, (previous, worker) in moves.items():
+            for gate in self.frame_credits.get(cart_code, {}).values():
+                gate.reset()
+            if worker is None:
+                self.logger.log_event(
+                    "ERROR",
+                    f"{cart_code} has no AI worker (was {previous}): "
+                    f"obstacle/product detection unavailable, frames dropped",
+                )
+            else:
+                self.logger.log_event(
+                    "NET", f"{cart_code} AI worker: {previous} → {worker}"
+                )
+            self._notify_ai_availability(cart_code, worker is not None)
+        for name, worker in self.ai_pool.workers.items():
+            if not worker.healthy or worker.control is None:
+                continue
+            carts = [
+                {
+                    "cart_code": cart_code,
+                    "session_id": self.carts.get(cart_code).session_id,
+                    "ui": list(self._ui_endpoints[cart_code]),
+                    "sources": worker.source_ports(cart_code),
+                }
+                for cart_code in self.ai_pool.carts_of(name)
+            ]
+            self._ai_control_queue.put(
+                (worker, Protocol.ai_control(AIControl.ASSIGN_CART, {"carts": carts}))
+            )
+
+    def _notify_ai_availability(self, cart_code: str, available: bool) -> None:
+        """카트 UI에 AI 인식 중단/복구 상태 알림 (상태가 바뀔 때만, 백그라운드 전송)"""
+        if available == (cart_code not in self._ai_unavailable):
+            return
+        if available:
+            self._ai_unavailable.discard(cart_code)
+            content = {"status": "AI_OK", "message": ""}
+        else:
+            self._ai_unavailable.add(cart_code)
+            content = {
+                "status": "AI_UNAVAILABLE",
+                "message": "AI detection unavailable (obstacle / product)",
+            }
+        msg = Protocol.ui_command(UICommand.UPDATE_STATUS, content)
+        threading.Thread(
+            target=self.carts.get(cart_code).ui_client.send_oneshot,
+            args=(msg,),
+            daemon=True,
+        ).start()
+
+    def _notify_ai_session(
+        self, command: AIControl, cart: CartSession, session_id
+    ) -> None:
+        """
+        카트를 맡은 AI worker에만 세션 시작/종료 통보 (큐에 넣고 바로 반환)
+        - ui: 카트 UI 주소 (장애물 알람 직접 전송 대상)
+        """
+        worker = self.ai_pool.worker_for(cart.cart_code)
+        if worker is None or worker.control is None:
+            return
+        data = {
+            "session_id": session_id,
+            "cart_code": cart.cart_code,
+            "ui": list(self._ui_endpoints[cart.cart_code]),
+        }
+        self._ai_control_queue.put((worker, Protocol.ai_control(command, data)))
+
+    def ai_control_loop(self):
+        while True:
+            worker, msg = self._ai_control_queue.get()
+            response = worker.control.send_request(msg)
+            if response is None or not response.get("payload", {}).get("status"):
+                self.logger.log_event(
+                    "WARN",
+                    f"AI worker {worker.name} did not accept "
+                    f"{AIControl(msg['payload']['command']).name}: {response}",
+                )
+
+    def server_stats_loop(self):
+        """TCP 서버 큐 깊이 / handler 지연 시간 주기 로그"""
+        while True:
+            time.sleep(self.server_stats_interval)
+            for name, server in (
+                ("ui_request", self.ui_request_server),
+                ("ai_event", self.ai_event_server),
+            ):
+                stats = server.stats()
+                latency = stats["handler"]["latency_ms"] or {}
+                self.logger.log_event(
+                    "NET",
+                    f"{name} server: conns={stats['connections']} "
+                    f"queue={stats['queue_depth']} (max {stats['max_queue_depth']}) "
+                    f"pending={stats['pending']} requests={stats['requests']} "
+                    f"errors={stats['errors']} p99={latency.get('p99')}ms",
+                )
+
+            stats = self.events.stats()
+            latency = stats["latency"]["latency_ms"] or {}
+            self.logger.log_event(
+                "NET",
+                f"event pipeline: depth={stats['depth']} (max {stats['max_depth']}) "
+                f"processed={stats['processed']} dropped={stats['dropped']} "
+                f"errors={stats['errors']} p99={latency.get('p99')}ms "
+                f"active_sessions={len(self.carts.active_sessions())}",
+            )
+
+            for cart_code, gates in self.frame_credits.items():
+                for stream, gate in gates.items():
+                    stats = gate.stats()
+                    self.logger.log_event(
+                        "NET",
+                        f"{cart_code} {stream} cam forwarding: "
+                        f"forwarded={stats['forwarded']} dropped={stats['dropped']} "
+                        f"ungated={stats['ungated']} credits={stats['credits']} "
+                        f"gated={stats['gated']}",
+                    )
+
+            for cart_code, fanouts in self.frames.items():
+                for stream, fanout in fanouts.items():
+                    for name, stats in fanout.stats()["subscribers"].items():
+                        self.logger.log_event(
+                            "NET",
+                            f"{cart_code} {stream} cam subscriber {name}: "
+                            f"delivered={stats['delivered']} "
+                            f"rate_limited={stats['rate_limited']} "
+                            f"refused={stats['refused']} dropped={stats['dropped']} "
+                            f"errors={stats['errors']} depth={stats['depth']}",
+                        )
+
+            stats = self.ai_pool.stats()
+            workers = " ".join(
+                f"{name}={'up' if w['healthy'] else 'down'}:{','.join(w['carts'])}"
+                for name, w in stats["workers"].items()
+            )
+            self.logger.log_event(
+                "NET",
+                f"AI workers: {workers} unassigned={stats['unassigned']} "
+                f"moves={stats['moves']} failed_checks={stats['failures']}",
+            )
+
+    # =========================
+    # Camera Streams / Frame Subscribers
+    # =========================
+    def _add_camera(self, cart_code: str, front_port: int, cart_port: int) -> None:
+        """카트 카메라 수신 + fan-out (AI worker 배정은 모든 카트 등록 후 한 번에)"""
+        self.frame_credits[cart_code] = {}
+        self.frames[cart_code] = {}
+        for stream, port in ((FRONT_STREAM, front_port), (CART_STREAM, cart_port)):
+            gate = CreditGate(self.credit_stale_s)
+            fanout = FrameFanout(stream)
+            fanout.subscribe(
+                "ai",
+                functools.partial(self._send_to_ai, cart_code, stream),
+                inline=True,
+                admit=functools.partial(self._admit_ai_frame, cart_code, gate),
+            )
+            self.frame_credits[cart_code][stream] = gate
+            self.frames[cart_code][stream] = fanout
+            self._receivers.append(
+                (cart_code, stream, UDPFrameReceiver("0.0.0.0", port))
+            )
+
+    def _admit_ai_frame(self, cart_code: str, gate: CreditGate) -> bool:
+        """카트를 맡은 worker가 있고 credit이 남아 있으면 True"""
+        return self.ai_pool.worker_for(cart_code) is not None and gate.try_acquire()
+
+    def _send_to_ai(self, cart_code: str, stream: str, jpeg_bytes, capture_ts):
+        worker = self.ai_pool.worker_for(cart_code)
+        if worker is not None:
+            worker.send_frame(cart_code, stream, jpeg_bytes, capture_ts)
+
+    def add_frame_subscriber(
+        self,
+        name: str,
+        stream: str,
+        host: str,
+        port: int,
+        cart_code: Optional[str] = None,
+        **options,
+    ) -> FrameSubscriber:
+        """
+        UDP 프레임 구독자 등록 (녹화기 / 디버그 뷰어 / 추가 AI 등)
+        options: max_fps / max_queue / overflow (network/frame_fanout.py)
+        """
+        cart_code = cart_code or self.carts.default_cart
+        fanouts = self.frames.get(cart_code, {})
+        if stream not in fanouts:
+            raise ValueError(f"Unknown frame stream: {cart_code} {stream}")
+        sender = UDPFrameSender(host=host, port=port)
+        subscriber = fanouts[stream].subscribe(name, sender.send_frame_raw, **options)
+        self.logger.log_event(
+            "NET",
+            f"Frame subscriber {name} added: "
+            f"{cart_code} {stream} cam → {host}:{port}",
+        )
+        return subscriber
+
+    def remove_frame_subscriber(
+        self, name: str, stream: str, cart_code: Optional[str] = None
+    ) -> bool:
+        cart_code = cart_code or self.carts.default_cart
+        return self.frames[cart_code][stream].unsubscribe(name)
+
+    # =========================
+    # UDP Forwarding Loops
+    # =========================
+    def forward_cam(self, cart_code: str, stream: str, receiver: UDPFrameReceiver):
+        self.logger.log_event("NET", f"{cart_code} {stream} cam forwarding started")
+        fanout = self.frames[cart_code][stream]
+        for jpeg_bytes, capture_ts in receiver.receive_frames():
+            fanout.publish(jpeg_bytes, capture_ts)
 
     # =========================
     # UI Request Handler
@@ -137,45 +427,59 @@ class MainPC2Hub:
             return {"status": "IGNORED"}
 
         cmd = UIRequest(message["payload"]["event"])
+        data = message["payload"].get("data") or {}
+
+        cart = self.carts.get(data.get("cart_code"))
+        if cart is None:
+            return {"status": "ERROR", "reason": f"Unknown cart: {data['cart_code']}"}
+
+        # UI가 알린 Protocol 버전 → UI로 보내는 명령의 인코딩 선택 (바이너리 / JSON)
+        cart.ui_client.set_peer_version(message["header"]["version"])
 
         if cmd == UIRequest.START_SESSION:
-            return self._handle_ui_start()
+            with cart.lock:
+                return self._handle_ui_start(cart)
 
         if cmd == UIRequest.CHECKOUT:
-            return self._handle_ui_checkout()
+            with cart.lock:
+                return self._handle_ui_checkout(cart)
 
         if cmd == UIRequest.UPDATE_QUANTITY:
-            return self._handle_ui_update_quantity(message["payload"]["data"])
+            return self._handle_ui_update_quantity(cart, data)
 
         if cmd == UIRequest.REMOVE_ITEM:
-            return self._handle_ui_remove_item(message["payload"]["data"])
+            return self._handle_ui_remove_item(cart, data)
 
         return {"status": "UNKNOWN_CMD"}
 
-    def _handle_ui_start(self) -> dict:
+    def _handle_ui_start(self, cart: CartSession) -> dict:
         # If there's an existing session, end it first
-        if self.session_id:
+        if cart.session_id:
             self.logger.log_event(
                 "SESSION",
-                f"Ending previous session {self.session_id} before starting new one",
+                f"Ending previous session {cart.session_id} before starting new one",
             )
-            self.tx_dao.end_session(self.session_id)
-            self.engine.reset()
+            self._drain_session_events(cart)
+            self.tx_dao.end_session(cart.session_id)
+            cart.engine.reset()
+            cart.obstacle_level = None
 
-        cart_code = config.network.pc2_main.cart_code
+        cart_code = cart.cart_code
         try:
             # Get cart_id from cart_code
             cart_id = self.tx_dao.get_cart_id_by_code(cart_code)
             if not cart_id:
                 raise ValueError(f"Cart not found for code: {cart_code}")
 
-            self.session_id = self.tx_dao.start_session(cart_id)
+            cart.session_id = self.tx_dao.start_session(cart_id)
             self.logger.log_event(
                 "SESSION",
-                f"✅ Session started by UI: session_id={self.session_id}, cart_id={cart_id}",
+                f"✅ Session started by UI: session_id={cart.session_id}, cart_id={cart_id}, cart={cart_code}",
             )
-            print(f"[Main Hub] ✅ NEW SESSION: {self.session_id}")
-            return {"status": "OK", "session_id": self.session_id}
+            print(f"[Main Hub] ✅ NEW SESSION: {cart.session_id} ({cart_code})")
+            # AI 서버도 이전 쇼핑객 상태를 비우고 상품 인식 재개
+            self._notify_ai_session(AIControl.SESSION_START, cart, cart.session_id)
+            return {"status": "OK", "session_id": cart.session_id}
         except Exception as e:
             self.logger.log_event(
                 "ERROR", f"UI-initiated session failed for cart {cart_code}: {e}"
@@ -183,16 +487,19 @@ class MainPC2Hub:
             print(f"[Main Hub] ❌ SESSION START FAILED: {e}")
             return {"status": "ERROR", "reason": "Failed to start session"}
 
-    def _handle_ui_checkout(self) -> dict:
-        print("[Main Hub] 🛒 CHECKOUT REQUEST RECEIVED")
-        print(f"[Main Hub]   Current session_id: {self.session_id}")
+    def _handle_ui_checkout(self, cart: CartSession) -> dict:
+        print(f"[Main Hub] 🛒 CHECKOUT REQUEST RECEIVED ({cart.cart_code})")
+        print(f"[Main Hub]   Current session_id: {cart.session_id}")
 
-        if not self.session_id:
+        if not cart.session_id:
             print("[Main Hub] ❌ NO ACTIVE SESSION")
             return {"status": "NO_ACTIVE_SESSION"}
 
         # 1. Get all cart items from the database for the current session
-        cart_items = self.tx_dao.list_cart_items(self.session_id)
+        #    (이미 받은 상품 이벤트가 모두 반영된 뒤에 계산)
+        self._drain_session_events(cart)
+        session_id = cart.session_id
+        cart_items = self.tx_dao.list_cart_items(session_id)
         print(f"[Main Hub]   Found {len(cart_items)} cart items")
 
         if not cart_items:
@@ -211,7 +518,7 @@ class MainPC2Hub:
 
         # 3. Create the order with the calculated totals
         order_id = self.tx_dao.create_order(
-            session_id=self.session_id,
+            session_id=session_id,
             total_amount=total_amount,
             total_items=total_items,
         )
@@ -227,8 +534,8 @@ class MainPC2Hub:
         print(f"[Main Hub] ✅ Order details saved: {len(cart_items)} items")
 
         # 5. End the session
-        self.tx_dao.end_session(self.session_id)
-        print(f"[Main Hub] ✅ Session {self.session_id} ended")
+        self.tx_dao.end_session(session_id)
+        print(f"[Main Hub] ✅ Session {session_id} ended")
 
         self.logger.log_event(
             "SESSION",
@@ -240,15 +547,17 @@ class MainPC2Hub:
             UICommand.CHECKOUT_DONE,
             {"order_id": order_id, "total_amount": total_amount},
         )
-        self.ui_client.send_request(msg)
+        cart.ui_client.send_oneshot(msg)
 
         # 7. Reset session state
-        self.session_id = None
-        self.engine.reset()
+        cart.session_id = None
+        cart.obstacle_level = None
+        cart.engine.reset()
+        self._notify_ai_session(AIControl.SESSION_END, cart, session_id)
 
         return {"status": "OK", "order_id": order_id}
 
-    def _handle_ui_update_quantity(self, data: dict) -> dict:
+    def _handle_ui_update_quantity(self, cart: CartSession, data: dict) -> dict:
         """Handle quantity update request from UI"""
         session_id = data.get("session_id")
         product_id = data.get("product_id")
@@ -262,13 +571,13 @@ class MainPC2Hub:
             return {"status": "ERROR", "reason": "Missing parameters"}
 
         try:
-            self.engine.update_item_quantity(session_id, product_id, quantity)
+            cart.engine.update_item_quantity(session_id, product_id, quantity)
             return {"status": "OK"}
         except Exception as e:
             self.logger.log_event("ERROR", f"Failed to update quantity: {e}")
             return {"status": "ERROR", "reason": str(e)}
 
-    def _handle_ui_remove_item(self, data: dict) -> dict:
+    def _handle_ui_remove_item(self, cart: CartSession, data: dict) -> dict:
         """Handle item removal request from UI"""
         session_id = data.get("session_id")
         product_id = data.get("product_id")
@@ -279,7 +588,7 @@ class MainPC2Hub:
             return {"status": "ERROR", "reason": "Missing parameters"}
 
         try:
-            self.engine.remove_cart_item(session_id, product_id)
+            cart.engine.remove_cart_item(session_id, product_id)
             return {"status": "OK"}
         except Exception as e:
             self.logger.log_event("ERROR", f"Failed to remove item: {e}")
@@ -289,6 +598,7 @@ class MainPC2Hub:
     # AI Event Handler
     # =========================
     def handle_ai_event(self, message: dict) -> dict:
+        """카트 세션 큐에 넣고 바로 응답 (DB/UI 처리는 EventPipeline worker에서)"""
         if not Protocol.validate(message):
             return {"status": "ERROR"}
 
@@ -298,51 +608,118 @@ class MainPC2Hub:
         event = AIEvent(message["payload"]["event"])
         data = message["payload"]["data"]
 
-        if event == AIEvent.OBSTACLE_DANGER:
-            self._handle_obstacle(data)
-        elif event == AIEvent.PRODUCT_DETECTED:
-            self._handle_product(data)
+        if event == AIEvent.FRAME_CREDIT:
+            return self._handle_frame_credit(data)
 
-        return {"status": "OK"}
-
-    def _handle_obstacle(self, data: dict):
-        if self.session_id is None:
+        # cart_code가 없는 이벤트(단일 카트 AI 서버)는 기본 카트
+        cart = self.carts.get(data.get("cart_code"))
+        if cart is None:
             self.logger.log_event(
-                "WARN", "Obstacle event received but no active session"
+                "WARN", f"{event.name} event for unknown cart {data.get('cart_code')}"
             )
-            return
-        self.engine.process_obstacle_event(data, self.session_id)
+            return {"status": "ERROR", "reason": "Unknown cart"}
+
+        key = cart.key
+        if cart.session_id is None:
+            if event == AIEvent.OBSTACLE_DANGER:
+                self.logger.log_event(
+                    "WARN",
+                    f"Obstacle event received but no active session ({cart.cart_code})",
+                )
+            else:
+                self.logger.log_event(
+                    "WARN",
+                    f"Product event received but no active session ({cart.cart_code}): {data}",
+                )
+            return {"status": "OK"}
+
+        # 장애물 위험 단계 전환은 overflow 정책과 무관하게 항상 처리
+        critical = False
+        if event == AIEvent.OBSTACLE_DANGER:
+            level = data.get("level")
+            critical = cart.obstacle_level != level
+            cart.obstacle_level = level
 
-    def _handle_product(self, data: dict):
-        if self.session_id is None:
+        if not self.events.submit(key, event, data, critical=critical):
             self.logger.log_event(
-                "WARN", f"Product event received but no active session: {data}"
+                "WARN",
+                f"Event queue full for {cart.cart_code} session {key[1]}, "
+                f"dropped {event.name}",
             )
-            return
+            return {"status": "DROPPED"}
+        return {"status": "OK"}
+
+    def _handle_frame_credit(self, data: dict) -> dict:
+        """AI worker credit 광고 반영 (세션과 무관, 큐를 거치지 않음)"""
+        cart_code = data.get("cart_code") or self.carts.default_cart
+        gate = self.frame_credits.get(cart_code, {}).get(data.get("stream"))
+        if gate is None:
+            return {"status": "ERROR", "reason": "Unknown stream"}
+        gate.grant(data.get("credits", 0))
+        return {"status": "OK"}
+
+    def _apply_ai_event(self, key: tuple, event: AIEvent, data: dict):
+        """EventPipeline worker: 이벤트를 받은 시점의 카트 세션에 적용"""
+        cart_code, session_id = key
+        cart = self.carts.get(cart_code)
+        if event == AIEvent.OBSTACLE_DANGER:
+            self._handle_obstacle(cart, data, session_id)
+        elif event == AIEvent.PRODUCT_DETECTED:
+            self._handle_product(cart, data, session_id)
+
+    def _handle_obstacle(self, cart: CartSession, data: dict, session_id: int):
+        cart.engine.process_obstacle_event(data, session_id)
+
+    def _handle_product(self, cart: CartSession, data: dict, session_id: int):
         self.logger.log_event(
-            "DEBUG", f"Processing product event for session {self.session_id}: {data}"
+            "DEBUG", f"Processing product event for session {session_id}: {data}"
         )
-        self.engine.process_product_event(data, self.session_id)
+        cart.engine.process_product_event(data, session_id)
+
+    def _drain_session_events(self, cart: CartSession, timeout: float = 10.0):
+        """세션 종료 전: 이미 받은 이벤트를 모두 처리할 때까지 대기"""
+        key = cart.key
+        if not self.events.wait_idle(key, timeout=timeout):
+            self.logger.log_event(
+                "WARN",
+                f"Session {key[1]} ({cart.cart_code}) still has "
+                f"{self.events.depth(key)} queued events after {timeout}s",
+            )
 
     # =========================
     # Lifecycle
     # =========================
     def run(self):
+        self.events.start()
+
+        for cart_code, stream, receiver in self._receivers:
+            threading.Thread(
+                target=self.forward_cam,
+                args=(cart_code, stream, receiver),
+                daemon=True,
+            ).start()
+
         threading.Thread(
-            target=self.forward_front_cam,
+            target=self.ui_request_server.start,
             daemon=True,
         ).start()
 
         threading.Thread(
-            target=self.forward_cart_cam,
+            target=self.ai_control_loop,
             daemon=True,
         ).start()
 
         threading.Thread(
-            target=self.ui_request_server.start,
+            target=self.ai_pool.health_loop,
             daemon=True,
         ).start()
 
+        if self.server_stats_interval:
+            threading.Thread(
+                target=self.server_stats_loop,
+                daemon=True,
+            ).start()
+
         self.ai_event_server.start()
 
 
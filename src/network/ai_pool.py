@@ -0,0 +1,302 @@
+# src/network/ai_pool.py
+"""
+AI worker pool (Main Hub → 여러 AI 서버 인스턴스)
+- 카트를 AI 서버 인스턴스(worker)에 부하 상한이 있는 일관 해싱으로 배정
+  (bounded-load consistent hashing, worker 하나가 여러 카트를 맡고 카트마다 추적 상태를 따로 유지)
+- worker당 상한 = ceil(load_factor * 카트 수 / 정상 worker 수), max_carts가 있으면 그 이하
+  해시 위치의 worker가 상한에 닿았거나 비정상이면 ring을 따라 다음 worker
+- 배치는 카트 해시 순서로 결정 (등록 순서와 무관), 상한 안에서는 이미 맡은 worker 유지
+- control 포트로 주기적 health check, fail_threshold 연속 실패 시 제외하고 재배치
+  복구된 worker는 상한을 넘은 worker의 카트(선호 순위가 낮은 카트부터)를 넘겨받음
+"""
+
+import bisect
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from common.protocols import AIControl, Protocol
+from network.flow_control import CART_STREAM, FRONT_STREAM
+from network.tcp_client import TCPClient
+from network.udp_handler import UDPFrameSender
+
+
+class HashRing:
+    """일관 해싱 ring (node마다 replicas개의 가상 노드)"""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64) -> None:
+        self.replicas = replicas
+        self._hashes: List[int] = []
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # 프로세스와 무관하게 같은 값 (내장 hash()는 실행마다 달라짐)
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def add(self, node: str) -> None:
+        for i in range(self.replicas):
+            h = self._hash(f"{node}#{i}")
+            idx = bisect.bisect(self._hashes, h)
+            self._hashes.insert(idx, h)
+            self._nodes.insert(idx, node)
+
+    def walk(self, key: str) -> Iterator[str]:
+        """key 위치부터 시계 방향으로 서로 다른 node (선호 순서)"""
+        if not self._hashes:
+            return
+        start = bisect.bisect(self._hashes, self._hash(key))
+        seen = set()
+        for i in range(len(self._hashes)):
+            node = self._nodes[(start + i) % len(self._hashes)]
+            if node not in seen:
+                seen.add(node)
+                yield node
+
+
+class AIWorker:
+    """AI 서버 인스턴스 하나 (프레임 UDP 전송 + control TCP)"""
+
+    def __init__(
+        self,
+        name: str,
+        host: str,
+        udp_port_front: int,
+        udp_port_cart: int,
+        control_port: Optional[int] = None,
+        timeout: float = 2.0,
+        max_carts: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            max_carts: 동시에 맡을 최대 카트 수 (AI 서버는 카트마다 모델을 로드, None이면 제한 없음)
+        """
+        self.name = name
+        self.host = host
+        self.ports = {FRONT_STREAM: udp_port_front, CART_STREAM: udp_port_cart}
+        self.control = (
+            TCPClient(host, control_port, timeout=timeout) if control_port else None
+        )
+        self.max_carts = max_carts
+        self.healthy = True
+        self.failures = 0  # 연속 health check 실패 수
+        # (cart_code, stream) → 송신 소켓, AI 서버는 출발 포트로 카트를 구분
+        self._senders: Dict[Tuple[str, str], UDPFrameSender] = {}
+        self._senders_lock = threading.Lock()
+
+    def sender(self, cart_code: str, stream: str) -> UDPFrameSender:
+        sender = self._senders.get((cart_code, stream))
+        if sender is None:
+            with self._senders_lock:
+                sender = self._senders.get((cart_code, stream))
+                if sender is None:
+                    sender = UDPFrameSender(host=self.host, port=self.ports[stream])
+                    self._senders[(cart_code, stream)] = sender
+        return sender
+
+    def source_ports(self, cart_code: str) -> Dict[str, int]:
+        """카트 프레임의 출발 포트 {stream: port} (ASSIGN_CART로 AI 서버에 알림)"""
+        return {
+            stream: self.sender(cart_code, stream).source_port for stream in self.ports
+        }
+
+    def send_frame(
+        self,
+        cart_code: str,
+        stream: str,
+        jpeg_bytes: bytes,
+        capture_ts: Optional[float],
+    ) -> None:
+        self.sender(cart_code, stream).send_frame_raw(jpeg_bytes, capture_ts)
+
+    def probe(self) -> bool:
+        """health check (control 포트가 없으면 확인할 수 없으므로 정상으로 간주)"""
+        if self.control is None:
+            return True
+        response = self.control.send_request(
+            Protocol.ai_control(AIControl.MODEL_STATUS, {})
+        )
+        return bool(response and response.get("payload", {}).get("status"))
+
+
+class AIWorkerPool:
+    def __init__(
+        self,
+        workers: Iterable[AIWorker],
+        on_change: Optional[Callable[[Dict[str, Tuple]], None]] = None,
+        fail_threshold: int = 2,
+        health_interval_s: float = 2.0,
+        replicas: int = 64,
+        load_factor: float = 1.25,
+    ) -> None:
+        """
+        Args:
+            workers: AI 서버 인스턴스 (이름은 ring 위치를 정하므로 배포 간 고정)
+            on_change: on_change(moves), 배정 또는 worker 상태가 바뀐 뒤 호출
+                moves = {cart_code: (이전 worker 이름, 새 worker 이름)} (없으면 None)
+            load_factor: worker당 부하 상한 배수 (>= 1, 작을수록 고르게 / 클수록 덜 옮김)
+        """
+        self.workers: Dict[str, AIWorker] = {w.name: w for w in workers}
+        if not self.workers:
+            raise ValueError("AI worker pool needs at least one worker")
+        if load_factor < 1.0:
+            raise ValueError(f"load_factor must be at least 1: {load_factor}")
+        self.ring = HashRing(self.workers, replicas)
+        self.on_change = on_change
+        self.fail_threshold = fail_threshold
+        self.health_interval_s = health_interval_s
+        self.load_factor = load_factor
+
+        self._lock = threading.Lock()
+        self._carts: List[str] = []  # 카트 해시 순서
+        self._preference: Dict[str, List[str]] = {}  # cart_code → ring 순서 worker
+        self._assignment: Dict[str, Optional[str]] = {}  # cart_code → worker 이름
+        self._counters = {"rebalances": 0, "moves": 0, "checks": 0, "failures": 0}
+
+    def add_carts(self, cart_codes: Iterable[str]) -> Dict[str, Tuple]:
+        """
+        배정 대상 카트 등록 (카메라 스트림이 있는 카트)
+        등록 시에는 기존 배정을 유지하지 않고 해시만으로 다시 배치 (등록 순서와 무관)
+        """
+        with self._lock:
+            for cart_code in cart_codes:
+                if cart_code not in self._preference:
+                    self._preference[cart_code] = list(self.ring.walk(cart_code))
+                    self._carts.append(cart_code)
+            self._carts.sort(key=lambda c: (HashRing._hash(c), c))
+        return self.rebalance(keep=False)
+
+    def add_cart(self, cart_code: str) -> Optional[AIWorker]:
+        self.add_carts([cart_code])
+        return self.worker_for(cart_code)
+
+    def worker_for(self, cart_code: str) -> Optional[AIWorker]:
+        """카트를 맡은 worker (배정 안 됐으면 None), 프레임마다 호출되므로 lock 없이 조회"""
+        name = self._assignment.get(cart_code)
+        return self.workers[name] if name is not None else None
+
+    def carts_of(self, worker_name: str) -> List[str]:
+        """worker가 맡은 카트 목록"""
+        assignment = self._assignment
+        return [c for c in self._carts if assignment.get(c) == worker_name]
+
+    def unassigned(self) -> List[str]:
+        assignment = self._assignment
+        return [c for c in self._carts if assignment.get(c) is None]
+
+    def _limits(self) -> Dict[str, int]:
+        """정상 worker별 최대 카트 수 (_lock 안에서 호출)"""
+        healthy = [w for w in self.workers.values() if w.healthy]
+        if not healthy:
+            return {}
+        bound = math.ceil(self.load_factor * len(self._carts) / len(healthy))
+        return {
+            w.name: bound if w.max_carts is None else min(bound, w.max_carts)
+            for w in healthy
+        }
+
+    def rebalance(
+        self, health_changed: bool = False, keep: bool = True
+    ) -> Dict[str, Tuple]:
+        """
+        카트 재배치 (카트 해시 순서로 처리)
+        1) keep이면 정상 worker에 있던 카트는 상한 안에서 그대로 (추적 상태 유지)
+           상한을 넘으면 그 worker를 더 앞 순위로 선호하는 카트부터 남김
+        2) 나머지는 ring 순서에서 상한에 닿지 않은 첫 정상 worker
+           (모든 정상 worker가 max_carts에 닿았거나 정상 worker가 없으면 미배정)
+
+        Returns:
+            dict: 배정이 바뀐 카트 {cart_code: (이전, 새 worker 이름)}
+                  (새로 등록됐는데 배정되지 못한 카트는 (None, None))
+        """
+        with self._lock:
+            previous = self._assignment
+            limits = self._limits()
+            load = dict.fromkeys(limits, 0)
+            assignment: Dict[str, Optional[str]] = {}
+
+            staying = [c for c in self._carts if keep and previous.get(c) in limits]
+            staying.sort(key=lambda c: self._preference[c].index(previous[c]))
+            for cart_code in staying:
+                name = previous[cart_code]
+                if load[name] < limits[name]:
+                    assignment[cart_code] = name
+                    load[name] += 1
+
+            for cart_code in self._carts:
+                if cart_code in assignment:
+                    continue
+                assignment[cart_code] = None
+                for name in self._preference[cart_code]:
+                    if name in limits and load[name] < limits[name]:
+                        assignment[cart_code] = name
+                        load[name] += 1
+                        break
+
+            moves = {
+                cart_code: (previous.get(cart_code), name)
+                for cart_code, name in assignment.items()
+                if previous.get(cart_code) != name or cart_code not in previous
+            }
+            # 교체는 dict 통째로 (worker_for는 lock 없이 읽음)
+            self._assignment = assignment
+            self._counters["rebalances"] += 1
+            self._counters["moves"] += sum(1 for p, n in moves.values() if p != n)
+
+        if (moves or health_changed) and self.on_change is not None:
+            self.on_change(moves)
+        return moves
+
+    def check_health(self) -> Dict[str, Tuple]:
+        """모든 worker health check 한 번, 상태가 바뀌면 재배치"""
+        changed = False
+        for worker in list(self.workers.values()):
+            ok = worker.probe()
+            with self._lock:
+                self._counters["checks"] += 1
+                if ok:
+                    worker.failures = 0
+                    if not worker.healthy:
+                        worker.healthy = changed = True
+                        print(f"[AIWorkerPool] Worker {worker.name} recovered")
+                    continue
+                self._counters["failures"] += 1
+                worker.failures += 1
+                if worker.healthy and worker.failures >= self.fail_threshold:
+                    worker.healthy = False
+                    changed = True
+                    print(
+                        f"[AIWorkerPool] Worker {worker.name} down "
+                        f"after {worker.failures} failed checks"
+                    )
+        if not changed:
+            return {}
+        return self.rebalance(health_changed=True)
+
+    def health_loop(self) -> None:
+        while True:
+            time.sleep(self.health_interval_s)
+            try:
+                self.check_health()
+            except Exception as e:
+                print(f"[AIWorkerPool] Health check error: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            assignment = dict(self._assignment)
+            out = dict(self._counters)
+            out["limits"] = self._limits()
+            out["workers"] = {
+                name: {
+                    "healthy": worker.healthy,
+                    "failures": worker.failures,
+                    "carts": [c for c, n in assignment.items() if n == name],
+                }
+                for name, worker in self.workers.items()
+            }
+        out["unassigned"] = [c for c, n in assignment.items() if n is None]
+        return out
@@ -0,0 +1,73 @@
+# src/network/flow_control.py
+"""
+Credit-based flow control for UDP frame forwarding (Main Hub → AI)
+- AI 서버가 스트림별로 받을 수 있는 프레임 수(credit)를 광고 (AIEvent.FRAME_CREDIT)
+- Hub는 credit이 남아 있을 때만 전달하고 프레임마다 1씩 차감, 없으면 Hub에서 폐기
+- 광고는 누적이 아닌 현재 값 (유실/중복/재시작에 안전, AI가 주기적으로 다시 광고)
+- 광고를 한 번도 받지 못했거나 stale_s 동안 끊기면 제한 없이 전달 (구버전 AI 서버 호환)
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# AI 서버가 광고하는 스트림 이름 (Hub forwarder / AI UDP 포트와 대응)
+FRONT_STREAM = "front"  # 전방 카메라 → 장애물 모델 (udp_port_front)
+CART_STREAM = "cart"  # 카트 카메라 → 상품 모델 (udp_port_cart)
+
+
+class CreditGate:
+    """한 스트림의 전달 credit (Hub 쪽)"""
+
+    def __init__(self, stale_s: float = 2.0) -> None:
+        self.stale_s = stale_s
+        self._lock = threading.Lock()
+        self._credits = 0
+        self._granted_at: Optional[float] = None  # 마지막 광고 수신 시각 (monotonic)
+        self._counters = {
+            "forwarded": 0,
+            "dropped": 0,
+            "ungated": 0,  # 광고 없음/끊김으로 제한 없이 전달한 프레임
+            "grants": 0,
+        }
+
+    def grant(self, credits: int) -> None:
+        """AI 서버 광고 반영 (현재 받을 수 있는 프레임 수로 교체)"""
+        with self._lock:
+            self._credits = max(0, int(credits))
+            self._granted_at = time.monotonic()
+            self._counters["grants"] += 1
+
+    def reset(self) -> None:
+        """광고 전 상태로 (스트림을 받는 AI 서버가 바뀐 경우, 새 광고 전까지 제한 없이 전달)"""
+        with self._lock:
+            self._credits = 0
+            self._granted_at = None
+
+    def try_acquire(self) -> bool:
+        """프레임 하나를 전달해도 되면 credit을 차감하고 True, 폐기할 프레임이면 False"""
+        with self._lock:
+            if not self._gated():
+                self._counters["forwarded"] += 1
+                self._counters["ungated"] += 1
+                return True
+            if self._credits <= 0:
+                self._counters["dropped"] += 1
+                return False
+            self._credits -= 1
+            self._counters["forwarded"] += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._counters)
+            out["credits"] = self._credits
+            out["gated"] = self._gated()
+        return out
+
+    def _gated(self) -> bool:
+        """최근 광고가 유효한지 (_lock 안에서 호출)"""
+        return (
+            self._granted_at is not None
+            and time.monotonic() - self._granted_at < self.stale_s
+        )
@@ -0,0 +1,214 @@
+# src/network/frame_fanout.py
+"""
+Frame fan-out (Main Hub publish/subscribe)
+- 카메라 스트림마다 프레임을 한 번만 재조립해 공유 버퍼에 두고 등록된 구독자에게 전달
+  (JPEG bytes는 복사하지 않고 모든 구독자가 같은 객체를 공유)
+- 구독자별 rate limit (max_fps)과 queue overflow 정책:
+  - drop_oldest: 큐에서 가장 오래된 프레임 폐기 (max_queue=1이면 최신 프레임만 유지)
+  - drop_newest: 새 프레임 폐기
+- inline 구독자(AI 서버)는 수신 스레드에서 바로 전송, 나머지는 구독자별 전송 스레드
+  → 느린 구독자(녹화기 / 디버그 뷰어)가 AI 경로를 지연시키지 않음
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+FrameSend = Callable[[bytes, Optional[float]], None]
+
+
+class FrameSubscriber:
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+    def __init__(
+        self,
+        name: str,
+        send: FrameSend,
+        max_fps: Optional[float] = None,
+        max_queue: int = 1,
+        overflow: str = "drop_oldest",
+        inline: bool = False,
+        admit: Optional[Callable[[], bool]] = None,
+    ):
+        """
+        Args:
+            send: send(jpeg_bytes, capture_ts), 구독자 전송 스레드(inline이면 수신 스레드)에서 호출
+            max_fps: 구독자 최대 전달률 (None이면 제한 없음)
+            admit: rate limit을 통과한 프레임마다 호출, False면 폐기 (예: CreditGate.try_acquire)
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}' "
+                f"(expected one of {self.OVERFLOW_POLICIES})"
+            )
+        if max_fps is not None and max_fps <= 0:
+            raise ValueError(f"max_fps must be positive: {max_fps}")
+        self.name = name
+        self.send = send
+        self.max_fps = max_fps
+        self.max_queue = max(1, max_queue)
+        self.overflow = overflow
+        self.inline = inline
+        self.admit = admit
+
+        self._cond = threading.Condition()
+        self._queue: Deque[Tuple[bytes, Optional[float]]] = deque()
+        self._next_at = 0.0  # 다음 프레임을 받을 수 있는 시각 (monotonic)
+        self._closed = False
+        self._counters = {
+            "offered": 0,
+            "delivered": 0,
+            "rate_limited": 0,
+            "refused": 0,  # admit 거부 (credit 없음)
+            "dropped": 0,  # queue overflow
+            "errors": 0,
+            "max_depth": 0,
+        }
+        if not inline:
+            threading.Thread(
+                target=self._run, name=f"frame-sub-{name}", daemon=True
+            ).start()
+
+    def offer(self, jpeg_bytes: bytes, capture_ts: Optional[float]) -> None:
+        """새 프레임 (publish 스레드에서 호출, inline이 아니면 큐에 넣고 바로 반환)"""
+        now = time.monotonic()
+        with self._cond:
+            self._counters["offered"] += 1
+            if self.max_fps is not None:
+                if now < self._next_at:
+                    self._counters["rate_limited"] += 1
+                    return
+                interval = 1.0 / self.max_fps
+                # 한 간격 이내로 늦은 프레임은 일정 유지 (수신 지터를 흡수해 평균 max_fps)
+                if now - self._next_at < interval:
+                    self._next_at += interval
+                else:
+                    self._next_at = now + interval
+
+        if self.admit is not None and not self.admit():
+            with self._cond:
+                self._counters["refused"] += 1
+            return
+
+        if self.inline:
+            self._deliver(jpeg_bytes, capture_ts)
+            return
+
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._queue) >= self.max_queue:
+                self._counters["dropped"] += 1
+                if self.overflow == "drop_newest":
+                    return
+                self._queue.popleft()
+            self._queue.append((jpeg_bytes, capture_ts))
+            self._counters["max_depth"] = max(
+                self._counters["max_depth"], len(self._queue)
+            )
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out = dict(self._counters)
+            out["depth"] = len(self._queue)
+        out["max_fps"] = self.max_fps
+        out["inline"] = self.inline
+        return out
+
+    # =========================
+    # Internal
+    # =========================
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                jpeg_bytes, capture_ts = self._queue.popleft()
+            self._deliver(jpeg_bytes, capture_ts)
+
+    def _deliver(self, jpeg_bytes: bytes, capture_ts: Optional[float]) -> None:
+        try:
+            self.send(jpeg_bytes, capture_ts)
+        except Exception as e:
+            with self._cond:
+                self._counters["errors"] += 1
+            print(f"[FrameFanout] Error sending frame to {self.name}: {e}")
+            return
+        with self._cond:
+            self._counters["delivered"] += 1
+
+
+class FrameFanout:
+    """카메라 스트림 하나의 공유 프레임 버퍼 + 구독자 레지스트리"""
+
+    def __init__(self, stream: str) -> None:
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, FrameSubscriber] = {}
+        # publish가 매 프레임 복사하지 않도록 등록/해제 시에만 갱신 (inline 구독자 먼저)
+        self._snapshot: Tuple[FrameSubscriber, ...] = ()
+        self._latest: Optional[Tuple[bytes, Optional[float], int]] = None
+        self._published = 0
+
+    def subscribe(self, name: str, send: FrameSend, **options) -> FrameSubscriber:
+        """
+        구독자 등록 (options: max_fps / max_queue / overflow / inline / admit)
+
+        Raises:
+            ValueError: 같은 이름의 구독자가 이미 있거나 옵션이 잘못된 경우
+        """
+        with self._lock:
+            if name in self._subscribers:
+                raise ValueError(f"Subscriber '{name}' already registered")
+            subscriber = FrameSubscriber(name, send, **options)
+            self._subscribers[name] = subscriber
+            self._refresh()
+        return subscriber
+
+    def unsubscribe(self, name: str) -> bool:
+        with self._lock:
+            subscriber = self._subscribers.pop(name, None)
+            self._refresh()
+        if subscriber is None:
+            return False
+        subscriber.close()
+        return True
+
+    def publish(self, jpeg_bytes: bytes, capture_ts: Optional[float]) -> None:
+        """재조립된 프레임을 공유 버퍼에 두고 모든 구독자에게 전달"""
+        with self._lock:
+            self._published += 1
+            self._latest = (jpeg_bytes, capture_ts, self._published)
+            subscribers = self._snapshot
+        for subscriber in subscribers:
+            subscriber.offer(jpeg_bytes, capture_ts)
+
+    def latest(self) -> Optional[Tuple[bytes, Optional[float], int]]:
+        """가장 최근 프레임 (jpeg_bytes, capture_ts, seq), 아직 없으면 None"""
+        with self._lock:
+            return self._latest
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            published = self._published
+            subscribers = self._snapshot
+        return {
+            "published": published,
+            "subscribers": {s.name: s.stats() for s in subscribers},
+        }
+
+    def _refresh(self) -> None:
+        """_lock 안에서 호출"""
+        self._snapshot = tuple(
+            sorted(self._subscribers.values(), key=lambda s: not s.inline)
+        )
@@ -1,8 +1,19 @@
 # tcp_client.py
 import socket
+import itertools
 import json
 import struct
-from typing import Any, Dict, Optional
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from common import codec
+from common.protocols import Protocol
+
+
+class _NoResponse(ConnectionError):
+    """응답 바이트를 하나도 받기 전에 서버가 연결을 닫음"""
 
 
 class TCPClient:
@@ -10,56 +21,392 @@ class TCPClient:
     Length-prefixed JSON TCP client.
     Protocol:
     - 4 bytes: big-endian unsigned int (payload length) ">I"
-    - N bytes: JSON payload (utf-8)
+    - N bytes: JSON payload (utf-8) 또는 바이너리 payload (common/codec.py)
+
+    Encoding:
+    - 상대의 Protocol 버전을 알기 전까지는 JSON으로 전송
+    - 응답 header.version 또는 set_peer_version()으로 알게 된 버전이
+      Protocol.BINARY_VERSION 이상이면 바이너리로 전송 (응답은 형식 자동 판별)
+
+    Connections:
+    - 목적지별로 persistent 연결을 최대 pool_size개 유지 (TCP keepalive, NODELAY)
+    - 꺼낼 때마다 health check (상대가 닫았거나 max_idle 초과면 폐기)
+    - 재사용한 연결이 끊겨 있어 요청 전송 자체가 실패하면 새 연결로 한 번 재시도
+      (전송을 마친 뒤 응답이 없으면 재시도하지 않음: 서버가 이미 처리했을 수 있음)
+    - 연결 실패 시 지수 backoff 동안은 바로 실패 (이벤트 루프가 timeout에 묶이지 않음)
+    - 한 요청씩 처리하고 닫는 서버(one-shot)와도 그대로 동작
+    - send_oneshot(): 응답 없는 one-shot 서버(UI)에 연결당 한 메시지 전송
+
+    Pipelining (TCPServer 전용):
+    - request_async(): header에 request_id를 붙여 전용 연결 하나로 연달아 전송,
+      수신 스레드가 응답의 request_id로 Future를 찾아 완료 (응답 순서 무관)
+    - send_nowait(): no_reply 표시 후 전송만 하고 반환 (서버는 응답을 만들지 않음)
     """
 
     HEADER_SIZE = 4
 
-    def __init__(self, host: str, port: int, timeout: float = 5.0):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float = 5.0,
+        pool_size: int = 2,
+        max_idle: float = 30.0,
+        backoff_initial: float = 0.2,
+        backoff_max: float = 5.0,
+        peer_version: Optional[int] = None,
+    ):
         # 접속하려는 클라이언트 서버 정보 저장
         self.host = host
         self.port = port
         self.timeout = timeout
 
+        self.pool_size = pool_size
+        self.max_idle = max_idle  # 서버 idle timeout보다 짧게 유지
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[socket.socket, float]] = []  # (소켓, 마지막 사용 시각)
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+        # 상대가 해석할 수 있는 Protocol 버전 (None = 모름 → JSON)
+        self.peer_version = peer_version
+
+        # pipelining 전용 연결 (전송은 _mux_lock으로 직렬화, 수신은 전용 스레드)
+        self._mux_lock = threading.Lock()
+        self._mux_sock: Optional[socket.socket] = None
+        self._inflight: Dict[int, Future] = {}
+        self._request_ids = itertools.count(1)
+
     def send_request(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         try:
             # 직렬화 (dict -> JSON -> bytes)
             payload = self._serialize(data)
-            # 소켓 생성
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                # 소켓 특성 저장 
-                sock.settimeout(self.timeout)
-                # 서버 연결
-                sock.connect((self.host, self.port))
+        except (TypeError, ValueError) as e:
+            print(f"[TCP ERROR] Serialization error: {e}")
+            return None
+
+        for attempt in range(2):
+            try:
+                sock, reused = self._checkout()
+            except (socket.timeout, OSError) as e:
+                print(f"[TCP ERROR] Network error: {e}")
+                return None
+
+            try:
                 # 메시지 전송 (헤더와 함께 전송)
                 self._send(sock, payload)
-                # 응답 수신
+            except (BrokenPipeError, ConnectionResetError) as e:
+                self._discard(sock)
+                if reused and attempt == 0:
+                    continue  # 오래된 연결: 요청이 나가지 않았으므로 새 연결로 재시도
+                print(f"[TCP ERROR] Network error: {e}")
+                return None
+            except OSError as e:
+                self._discard(sock)
+                print(f"[TCP ERROR] Network error: {e}")
+                return None
+
+            try:
+                # 응답 수신 (요청은 이미 전송됨 → 재시도하면 중복 처리될 수 있음)
                 response_payload = self._receive(sock)
-            # 역직렬화 후 리턴
-            return self._deserialize(response_payload)
+                response = self._deserialize(response_payload)
+            except (socket.timeout, ConnectionError, OSError) as e:
+                self._discard(sock)
+                print(f"[TCP ERROR] Network error: {e}")
+                return None
+            except (ValueError, json.JSONDecodeError) as e:
+                self._discard(sock)
+                print(f"[TCP ERROR] Serialization error: {e}")
+                return None
+            except Exception as e:
+                self._discard(sock)
+                print(f"[TCP ERROR] Unexpected error: {e}")
+                return None
 
-        except (socket.timeout, ConnectionError) as e:
-            print(f"[TCP ERROR] Network error: {e}")
-        except (ValueError, json.JSONDecodeError) as e:
-            print(f"[TCP ERROR] Serialization error: {e}")
-        except Exception as e:
-            print(f"[TCP ERROR] Unexpected error: {e}")
+            self._checkin(sock)
+            return response
 
         return None
 
+    def request_async(self, data: Dict[str, Any]) -> Future:
+        """
+        pipelining 요청: 응답을 기다리지 않고 Future 반환
+        (연결이 끊기면 처리 중인 Future는 ConnectionError로 완료)
+        """
+        future: Future = Future()
+        message = self._tag(data, no_reply=False)
+        request_id = message["header"][Protocol.REQUEST_ID]
+        try:
+            payload = self._serialize(message)
+        except (TypeError, ValueError) as e:
+            future.set_exception(e)
+            return future
+
+        with self._mux_lock:
+            sock = None
+            try:
+                sock = self._mux_socket()
+                self._inflight[request_id] = future
+                self._send(sock, payload)
+            except OSError as e:
+                self._inflight.pop(request_id, None)
+                self._drop_mux_locked(sock, e)
+                future.set_exception(e)
+        return future
+
+    def send_pipelined(
+        self, data: Dict[str, Any], timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """request_async() 후 응답 대기 (실패/timeout 시 None)"""
+        try:
+            return self.request_async(data).result(timeout or self.timeout)
+        except Exception as e:
+            print(f"[TCP ERROR] Pipelined request failed: {e}")
+            return None
+
+    def send_nowait(self, data: Dict[str, Any]) -> bool:
+        """
+        fire-and-forget: no_reply 표시 후 전송만 하고 반환
+        (서버에 도착했는지는 알 수 없음, 전송 실패 시 False)
+        """
+        try:
+            payload = self._serialize(self._tag(data, no_reply=True))
+        except (TypeError, ValueError) as e:
+            print(f"[TCP ERROR] Serialization error: {e}")
+            return False
+
+        with self._mux_lock:
+            for attempt in range(2):
+                sock = None
+                try:
+                    sock = self._mux_socket()
+                    self._send(sock, payload)
+                    return True
+                except (BrokenPipeError, ConnectionResetError) as e:
+                    # 서버가 막 닫은 연결: 새 연결로 한 번 재시도
+                    self._drop_mux_locked(sock, e)
+                    if attempt == 0:
+                        continue
+                    print(f"[TCP ERROR] Network error: {e}")
+                except OSError as e:
+                    self._drop_mux_locked(sock, e)
+                    print(f"[TCP ERROR] Network error: {e}")
+                    break
+        return False
+
+    def send_oneshot(self, data: Dict[str, Any]) -> bool:
+        """
+        새 연결로 한 메시지만 보내고 닫음 (응답을 보내지 않는 one-shot 서버용, UI)
+        - pool/pipelining 연결을 쓰지 않음: 상대가 메시지 하나 읽고 닫아도 유실 없음
+        """
+        try:
+            payload = self._serialize(data)
+        except (TypeError, ValueError) as e:
+            print(f"[TCP ERROR] Serialization error: {e}")
+            return False
+
+        sock = None
+        try:
+            sock = self._open()
+            self._send(sock, payload)
+            return True
+        except OSError as e:
+            print(f"[TCP ERROR] Network error: {e}")
+            return False
+        finally:
+            if sock is not None:
+                self._discard(sock)
+
+    def set_peer_version(self, version: Any) -> None:
+        """상대가 보낸 메시지의 header.version 반영 (다음 전송부터 인코딩 선택에 사용)"""
+        if isinstance(version, int) and version != self.peer_version:
+            self.peer_version = version
+
+    @property
+    def binary(self) -> bool:
+        return Protocol.supports_binary(self.peer_version)
+
+    def close(self) -> None:
+        """pool과 pipelining 연결 모두 종료"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for sock, _ in idle:
+            self._discard(sock)
+        with self._mux_lock:
+            self._drop_mux_locked(self._mux_sock, ConnectionError("Client closed"))
+
+    # =========================
+    # Pipelining
+    # =========================
+    def _tag(self, data: Dict[str, Any], no_reply: bool) -> Dict[str, Any]:
+        """원본은 두고 header에 request_id / no_reply를 붙인 사본 반환"""
+        header = dict(data.get("header") or {})
+        header[Protocol.REQUEST_ID] = next(self._request_ids)
+        if no_reply:
+            header[Protocol.NO_REPLY] = True
+        return {**data, "header": header}
+
+    def _mux_socket(self) -> socket.socket:
+        """pipelining 연결 (없으면 연결 후 수신 스레드 시작), _mux_lock 안에서 호출"""
+        if self._mux_sock is None:
+            sock = self._open()
+            sock.settimeout(self.timeout)
+            self._mux_sock = sock
+            threading.Thread(target=self._mux_reader, args=(sock,), daemon=True).start()
+        return self._mux_sock
+
+    def _mux_reader(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                first = sock.recv(self.HEADER_SIZE)
+            except socket.timeout:
+                if self._mux_sock is sock:
+                    continue  # 프레임 경계에서 대기 중 (응답 대기 또는 idle)
+                return
+            except OSError as e:
+                with self._mux_lock:
+                    self._drop_mux_locked(sock, e)
+                return
+
+            try:
+                response = self._deserialize(self._receive_rest(sock, first))
+            except (OSError, ValueError) as e:
+                with self._mux_lock:
+                    self._drop_mux_locked(sock, e)
+                return
+
+            header = response.get("header") if isinstance(response, dict) else None
+            request_id = (header or {}).get(Protocol.REQUEST_ID)
+            with self._mux_lock:
+                future = self._inflight.pop(request_id, None)
+            if future is not None:
+                future.set_result(response)
+
+    def _drop_mux_locked(self, sock: Optional[socket.socket], error) -> None:
+        """pipelining 연결 폐기, 응답을 기다리던 요청은 실패 처리 (_mux_lock 안에서 호출)"""
+        if sock is None or self._mux_sock is not sock:
+            if sock is not None:
+                self._discard(sock)
+            return
+        self._mux_sock = None
+        self._discard(sock)
+        inflight, self._inflight = self._inflight, {}
+        for future in inflight.values():
+            future.set_exception(ConnectionError(f"Connection lost: {error}"))
+
+    # =========================
+    # Connection pool
+    # =========================
+    def _checkout(self) -> Tuple[socket.socket, bool]:
+        """사용 가능한 연결 반환 (재사용 여부 포함), 없으면 새로 연결"""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                sock, last_used = self._idle.pop()
+            if now - last_used <= self.max_idle and self._is_alive(sock):
+                return sock, True
+            self._discard(sock)
+
+        return self._open(), False
+
+    def _open(self) -> socket.socket:
+        """새 연결 (실패가 이어지면 backoff 동안은 연결 시도 없이 실패)"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._retry_at:
+                raise ConnectionError(
+                    f"{self.host}:{self.port} unavailable, retrying in "
+                    f"{self._retry_at - now:.1f}s"
+                )
+        try:
+            sock = self._connect()
+        except OSError:
+            with self._lock:
+                self._backoff = min(
+                    self.backoff_max, max(self.backoff_initial, self._backoff * 2)
+                )
+                self._retry_at = time.monotonic() + self._backoff
+            raise
+
+        with self._lock:
+            self._backoff = 0.0
+            self._retry_at = 0.0
+        return sock
+
+    def _checkin(self, sock: socket.socket) -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((sock, time.monotonic()))
+                return
+        self._discard(sock)
+
+    def _connect(self) -> socket.socket:
+        # 소켓 생성 및 서버 연결
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for opt, value in (
+            ("TCP_KEEPIDLE", 30),
+            ("TCP_KEEPINTVL", 10),
+            ("TCP_KEEPCNT", 3),
+        ):
+            if hasattr(socket, opt):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, opt), value)
+        return sock
+
+    @staticmethod
+    def _is_alive(sock: socket.socket) -> bool:
+        """idle 연결 health check: 상대가 닫았거나 예상치 못한 데이터가 있으면 False"""
+        try:
+            sock.setblocking(False)
+            try:
+                sock.recv(1, socket.MSG_PEEK)
+                return False  # b"" = 상대가 닫음, 그 외 = 예상치 못한 데이터
+            finally:
+                sock.setblocking(True)
+        except BlockingIOError:
+            return True  # 읽을 것 없음 = 정상
+        except OSError:
+            return False
+
+    def _discard(self, sock: socket.socket) -> None:
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    # =========================
+    # Framing
+    # =========================
     def _serialize(self, data: Dict[str, Any]) -> bytes:
-        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+        return codec.encode(data, binary=self.binary)
 
     def _deserialize(self, payload: bytes) -> Dict[str, Any]:
-        return json.loads(payload.decode("utf-8"))
+        response = codec.decode(payload)
+        header = response.get("header") if isinstance(response, dict) else None
+        if isinstance(header, dict) and "version" in header:
+            self.set_peer_version(header["version"])
+        return response
 
     def _send(self, sock: socket.socket, payload: bytes) -> None:
         # payload의 길이를 고정크기로 만듬 (4bytes + len(payload))
         header = struct.pack(">I", len(payload))
+        sock.settimeout(self.timeout)
         sock.sendall(header + payload)
 
     def _receive(self, sock: socket.socket) -> bytes:
-        header = self._recv_exact(sock, self.HEADER_SIZE)
+        return self._receive_rest(sock, sock.recv(self.HEADER_SIZE))
+
+    def _receive_rest(self, sock: socket.socket, first: bytes) -> bytes:
+        """header 앞부분(first)을 이미 읽은 프레임의 나머지 수신"""
+        if not first:
+            raise _NoResponse("Connection closed by server")
+        header = first + self._recv_exact(sock, self.HEADER_SIZE - len(first))
         payload_length = struct.unpack(">I", header)[0]
         return self._recv_exact(sock, payload_length)
 
@@ -72,7 +419,7 @@ class TCPClient:
             buffer.extend(chunk)
         return bytes(buffer)
 
-        
+
 if __name__ == "__main__":
     client = TCPClient("127.0.0.1", 9000)
     response = client.send_request({"cmd": "ping"})
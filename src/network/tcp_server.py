@@ -1,9 +1,33 @@
 # tcp_server.py
 import socket
+import selectors
 import json
+import queue
 import struct
 import threading
-from typing import Any, Dict, Callable
+import time
+from collections import deque
+from typing import Any, Dict, Callable, Optional
+
+from common import codec
+from common.metrics import LoopStats
+from common.protocols import Protocol
+
+
+class _Connection:
+    """selector 루프가 관리하는 클라이언트 연결 상태"""
+
+    def __init__(self, sock: socket.socket, addr) -> None:
+        self.sock = sock
+        self.addr = addr
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.pending = deque()  # 아직 worker에 넘기지 않은 요청 payload (수신 순서)
+        self.in_flight = False  # 연결당 한 요청만 처리 → 응답 순서 = 요청 순서
+        self.eof = False  # 클라이언트가 쓰기를 끝냄 (남은 요청은 처리 후 닫음)
+        self.closed = False
+        self.events = 0
+        self.last_active = time.monotonic()
 
 
 class TCPServer:
@@ -11,15 +35,60 @@ class TCPServer:
     Length-prefixed JSON TCP server.
     Protocol:
     - 4 bytes: big-endian unsigned int (payload length)
-    - N bytes: JSON payload (utf-8)
+    - N bytes: JSON payload (utf-8) 또는 바이너리 payload (common/codec.py)
+
+    - 요청 형식은 payload 첫 바이트로 판별, 응답은 요청과 같은 형식으로 전송
+    - 요청 header에 version이 있으면 응답 header.version에 서버의 Protocol.VERSION을 붙임
+      (클라이언트가 바이너리 인코딩 사용 여부를 결정)
+    - selector 루프 하나가 모든 연결의 accept/수신/송신을 처리 (연결당 스레드 없음)
+    - handler는 고정 크기 worker pool에서 실행, 연결별로는 한 번에 하나씩 (요청 순서 유지)
+    - 연결당 대기 요청이 max_pending을 넘으면 그 연결은 읽기를 멈춤 (TCP back-pressure)
+    - 한 연결에서 여러 요청 처리 (persistent 클라이언트), one-shot 클라이언트도 지원
+    - header.request_id가 있으면 응답 header에 그대로 붙임 (pipelining 매칭)
+    - header.no_reply가 True면 handler만 실행하고 응답은 보내지 않음
     """
 
     HEADER_SIZE = 4
+    _RECV_SIZE = 65536
 
-    def __init__(self, host: str, port: int, handler: Callable[[Dict[str, Any]], Dict[str, Any]]):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+        idle_timeout: Optional[float] = 120.0,
+        max_workers: int = 4,
+        max_connections: int = 64,
+        max_pending: int = 32,
+    ):
         self.host = host
         self.port = port
         self.handler = handler
+        self.idle_timeout = idle_timeout  # 요청 없는 연결을 닫기까지의 시간 (초)
+        self.max_workers = max_workers
+        self.max_connections = max_connections
+        self.max_pending = max_pending
+        self.ready = threading.Event()
+
+        self._selector = selectors.DefaultSelector()
+        self._conns: Dict[int, _Connection] = {}
+        self._jobs: queue.Queue = queue.Queue()  # (conn, payload), 연결당 최대 1개
+        self._done = deque()  # worker → 루프: (conn, 응답 frame 또는 None=연결 종료)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+
+        self._latency = LoopStats()
+        self._counter_lock = threading.Lock()
+        self._counters = {
+            "accepted": 0,
+            "rejected": 0,
+            "requests": 0,
+            "errors": 0,
+            "no_reply": 0,
+            "binary": 0,  # 바이너리 인코딩 요청 수
+            "max_queue_depth": 0,
+        }
 
     def start(self) -> None:
         server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -27,59 +96,251 @@ class TCPServer:
         server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         # 지정한 포트에 서버소켓 고정
         server_sock.bind((self.host, self.port))
+        self.port = server_sock.getsockname()[1]  # port=0이면 할당된 포트
         # 클라이언트 연결 대기상태로 전환
         server_sock.listen()
+        server_sock.setblocking(False)
         print(f"Server listening on {self.host}:{self.port}")
 
-        # 서버를 계속 실행
+        self._selector.register(server_sock, selectors.EVENT_READ, "accept")
+        self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+        for i in range(self.max_workers):
+            threading.Thread(
+                target=self._worker,
+                name=f"tcp-worker-{self.port}-{i}",
+                daemon=True,
+            ).start()
+        self.ready.set()
+
+        # 서버를 계속 실행 (idle 연결 정리를 위해 주기적으로 깨어남)
+        tick = 1.0 if not self.idle_timeout else min(1.0, self.idle_timeout / 2)
         while True:
-            # 클라이언트와 연결
+            for key, mask in self._selector.select(timeout=tick):
+                if key.data == "accept":
+                    self._accept(server_sock)
+                elif key.data == "wake":
+                    self._drain_wakeups()
+                else:
+                    conn = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._on_readable(conn)
+                    if mask & selectors.EVENT_WRITE and not conn.closed:
+                        self._flush(conn)
+            self._process_done()
+            self._close_idle()
+
+    def stats(self) -> Dict[str, Any]:
+        """연결 수, worker 큐 깊이, 대기/처리 중 요청 수, handler 지연 시간"""
+        conns = list(self._conns.values())
+        with self._counter_lock:
+            out = dict(self._counters)
+        out.update(
+            connections=len(conns),
+            queue_depth=self._jobs.qsize(),
+            pending=sum(len(c.pending) for c in conns),
+            in_flight=sum(1 for c in conns if c.in_flight),
+            handler=self._latency.snapshot(),
+        )
+        return out
+
+    # =========================
+    # Selector loop (단일 스레드)
+    # =========================
+    def _accept(self, server_sock: socket.socket) -> None:
+        try:
             client_sock, addr = server_sock.accept()
-            # 클라이언트 1명당 전용 스레드 생성
-            # _client_handler가 실제 통신 처리
-            thread = threading.Thread(
-                target=self._client_handler,
-                args=(client_sock, addr),
-                daemon=True,
+        except BlockingIOError:
+            return
+        if len(self._conns) >= self.max_connections:
+            self._counters["rejected"] += 1
+            print(f"[CLIENT {addr}] Rejected: {len(self._conns)} connections open")
+            client_sock.close()
+            return
+
+        client_sock.setblocking(False)
+        client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = _Connection(client_sock, addr)
+        self._conns[client_sock.fileno()] = conn
+        self._counters["accepted"] += 1
+        self._update_interest(conn)
+
+    def _on_readable(self, conn: _Connection) -> None:
+        try:
+            chunk = conn.sock.recv(self._RECV_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"[CLIENT {conn.addr}] Error: {e}")
+            self._close(conn)
+            return
+
+        conn.last_active = time.monotonic()
+        if not chunk:
+            conn.eof = True
+        else:
+            conn.inbuf.extend(chunk)
+            while len(conn.inbuf) >= self.HEADER_SIZE:
+                size = struct.unpack_from(">I", conn.inbuf)[0]
+                end = self.HEADER_SIZE + size
+                if len(conn.inbuf) < end:
+                    break
+                conn.pending.append(bytes(conn.inbuf[self.HEADER_SIZE : end]))
+                del conn.inbuf[:end]
+        self._dispatch(conn)
+
+    def _dispatch(self, conn: _Connection) -> None:
+        """처리 중인 요청이 없으면 다음 요청을 worker pool에 넘김"""
+        if not conn.in_flight and conn.pending:
+            conn.in_flight = True
+            self._jobs.put((conn, conn.pending.popleft()))
+            self._counters["max_queue_depth"] = max(
+                self._counters["max_queue_depth"], self._jobs.qsize()
             )
-            thread.start()
+        self._update_interest(conn)
+
+    def _process_done(self) -> None:
+        while self._done:
+            conn, frame = self._done.popleft()
+            conn.in_flight = False
+            if conn.closed:
+                continue
+            if frame is None:
+                self._close(conn)
+                continue
+            conn.outbuf.extend(frame)
+            conn.last_active = time.monotonic()
+            self._flush(conn)
+            if not conn.closed:
+                self._dispatch(conn)
+
+    def _flush(self, conn: _Connection) -> None:
+        if conn.outbuf:
+            try:
+                sent = conn.sock.send(conn.outbuf)
+                del conn.outbuf[:sent]
+            except BlockingIOError:
+                pass
+            except OSError:
+                # 응답을 기다리지 않고 닫은 클라이언트 (fire-and-forget)
+                conn.outbuf.clear()
+                conn.eof = True
+        self._update_interest(conn)
 
-    def _client_handler(self, client_sock: socket.socket, addr) -> None:
-        with client_sock:
+    def _update_interest(self, conn: _Connection) -> None:
+        if conn.closed:
+            return
+        if conn.eof and not (conn.in_flight or conn.pending or conn.outbuf):
+            self._close(conn)
+            return
+
+        events = 0
+        if not conn.eof and len(conn.pending) < self.max_pending:
+            events |= selectors.EVENT_READ
+        if conn.outbuf:
+            events |= selectors.EVENT_WRITE
+        if events == conn.events:
+            return
+        if conn.events == 0:
+            self._selector.register(conn.sock, events, conn)
+        elif events == 0:
+            self._selector.unregister(conn.sock)
+        else:
+            self._selector.modify(conn.sock, events, conn)
+        conn.events = events
+
+    def _close_idle(self) -> None:
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        for conn in list(self._conns.values()):
+            busy = conn.in_flight or conn.pending or conn.outbuf or conn.inbuf
+            if not busy and now - conn.last_active > self.idle_timeout:
+                self._close(conn)
+
+    def _close(self, conn: _Connection) -> None:
+        if conn.closed:
+            return
+        conn.closed = True
+        if conn.events:
+            self._selector.unregister(conn.sock)
+            conn.events = 0
+        self._conns.pop(conn.sock.fileno(), None)
+        conn.sock.close()
+
+    def _drain_wakeups(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    # =========================
+    # Worker pool
+    # =========================
+    def _worker(self) -> None:
+        while True:
+            conn, payload = self._jobs.get()
+            frame = self._handle(conn, payload)
+            self._done.append((conn, frame))
             try:
-                request_payload = self._receive(client_sock)
-                request = self._deserialize(request_payload)
+                self._wake_w.send(b"\0")
+            except BlockingIOError:
+                pass  # 이미 깨우기 신호가 쌓여 있음
 
-                response = self.handler(request)
-                response_payload = self._serialize(response)
+    def _count(self, name: str) -> None:
+        with self._counter_lock:
+            self._counters[name] += 1
 
-                self._send(client_sock, response_payload)
+    def _handle(self, conn: _Connection, payload: bytes) -> Optional[bytes]:
+        """요청 하나 처리 → 응답 frame (None이면 연결 종료, b""이면 보낼 응답 없음)"""
+        self._count("requests")
+        try:
+            request = self._deserialize(payload)
+        except (json.JSONDecodeError, ValueError) as e:
+            self._count("errors")
+            print(f"[CLIENT {conn.addr}] Error: {e}")
+            return None
 
-            except (ConnectionError, json.JSONDecodeError, ValueError) as e:
-                print(f"[CLIENT {addr}] Error: {e}")
-            except Exception as e:
-                print(f"[CLIENT {addr}] Unexpected error: {e}")
+        binary = codec.is_binary(payload)
+        if binary:
+            self._count("binary")
+        header = request.get("header") if isinstance(request, dict) else None
+        header = header if isinstance(header, dict) else {}
 
-    def _send(self, sock: socket.socket, payload: bytes) -> None:
-        header = struct.pack(">I", len(payload))
-        sock.sendall(header + payload)
+        started = time.monotonic()
+        try:
+            response = self.handler(request)
+        except Exception as e:
+            # 연결은 유지하고 오류 응답 (persistent 클라이언트가 재전송하지 않도록)
+            self._count("errors")
+            print(f"[CLIENT {conn.addr}] Unexpected error: {e}")
+            response = {"status": "ERROR", "reason": str(e)}
+        self._latency.record(time.monotonic() - started)
 
-    def _receive(self, sock: socket.socket) -> bytes:
-        header = self._recv_exact(sock, self.HEADER_SIZE)
-        payload_length = struct.unpack(">I", header)[0]
-        return self._recv_exact(sock, payload_length)
+        if header.get(Protocol.NO_REPLY):
+            self._count("no_reply")
+            return b""
+        stamp = {}
+        if header.get(Protocol.REQUEST_ID) is not None:
+            stamp[Protocol.REQUEST_ID] = header[Protocol.REQUEST_ID]
+        if "version" in header:
+            stamp["version"] = Protocol.VERSION
+        if stamp and isinstance(response, dict):
+            response = {
+                **response,
+                "header": {**(response.get("header") or {}), **stamp},
+            }
 
-    def _recv_exact(self, sock: socket.socket, size: int) -> bytes:
-        buffer = bytearray()
-        while len(buffer) < size:
-            chunk = sock.recv(size - len(buffer))
-            if not chunk:
-                raise ConnectionError("Client disconnected")
-            buffer.extend(chunk)
-        return bytes(buffer)
+        try:
+            response_payload = self._serialize(response, binary)
+        except (TypeError, ValueError) as e:
+            self._count("errors")
+            print(f"[CLIENT {conn.addr}] Unexpected error: {e}")
+            return None
+        return struct.pack(">I", len(response_payload)) + response_payload
 
-    def _serialize(self, data: Dict[str, Any]) -> bytes:
-        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+    def _serialize(self, data: Dict[str, Any], binary: bool = False) -> bytes:
+        return codec.encode(data, binary=binary)
 
     def _deserialize(self, payload: bytes) -> Dict[str, Any]:
-        return json.loads(payload.decode("utf-8"))
+        return codec.decode(payload)
@@ -1,14 +1,16 @@
 import socket
 import struct
+import time
 import cv2
 import numpy as np
-from typing import Generator, Dict
+from typing import Generator, Dict, Optional, Tuple
 
 # =========================
 # UDP Frame Protocol
 # =========================
-# [frame_id(2)][chunk_id(2)][total_chunks(2)][payload]
-HEADER_FORMAT = "!HHH"
+# [frame_id(2)][chunk_id(2)][total_chunks(2)][capture_ts_us(8)][payload]
+# capture_ts_us: 엣지(카메라)에서 프레임을 캡처한 시각 (epoch microseconds)
+HEADER_FORMAT = "!HHHQ"
 HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
 
 MAX_UDP_PACKET_SIZE = 65507
@@ -29,23 +31,31 @@ class UDPFrameSender:
     def __init__(self, host: str, port: int, jpeg_quality: int = 80):
         self.addr = (host, port)
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # 출발 포트를 미리 고정 (수신 측이 보낸 쪽을 구분할 수 있도록)
+        self.sock.bind(("0.0.0.0", 0))
+        self.source_port = self.sock.getsockname()[1]
         self.jpeg_quality = jpeg_quality
         self._frame_id = 0
 
-    def send_frame(self, frame) -> None:
+    def send_frame(self, frame, capture_ts: Optional[float] = None) -> None:
         encoded = self._encode_frame(frame)
-        self._send_encoded(encoded)
+        self._send_encoded(encoded, capture_ts)
 
-    def send_frame_raw(self, jpeg_bytes: bytes) -> None:
-        """Send already-encoded JPEG bytes directly"""
-        self._send_encoded(jpeg_bytes)
+    def send_frame_raw(
+        self, jpeg_bytes: bytes, capture_ts: Optional[float] = None
+    ) -> None:
+        """Send already-encoded JPEG bytes directly (keeps the edge capture time)"""
+        self._send_encoded(jpeg_bytes, capture_ts)
 
-    def _send_encoded(self, encoded: bytes) -> None:
+    def _send_encoded(self, encoded: bytes, capture_ts: Optional[float] = None) -> None:
         """Internal method to send encoded bytes"""
         chunks = self._split_chunks(encoded)
 
         total_chunks = len(chunks)
         frame_id = self._next_frame_id()
+        if capture_ts is None:
+            capture_ts = time.time()
+        capture_ts_us = int(capture_ts * 1_000_000)
 
         for chunk_id, payload in enumerate(chunks):
             header = struct.pack(
@@ -53,6 +63,7 @@ class UDPFrameSender:
                 frame_id,
                 chunk_id,
                 total_chunks,
+                capture_ts_us,
             )
             self.sock.sendto(header + payload, self.addr)
 
@@ -93,30 +104,51 @@ class UDPFrameReceiver:
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.bind((bind_ip, bind_port))
 
-        self._frames: Dict[int, Dict] = {}
+        self._frames: Dict[Tuple[Tuple[str, int], int], Dict] = {}
+        self.last_capture_ts: Optional[float] = None
 
     def receive_packets(self) -> Generator[bytes, None, None]:
         """
         Yield reassembled JPEG bytes (NOT decoded frame)
         """
+        for data, _ in self.receive_frames():
+            yield data
+
+    def receive_frames(self) -> Generator[Tuple[bytes, float], None, None]:
+        """
+        Yield (reassembled JPEG bytes, edge capture timestamp in seconds)
+        """
+        for data, capture_ts, _ in self.receive_frames_from():
+            yield data, capture_ts
+
+    def receive_frames_from(
+        self,
+    ) -> Generator[Tuple[bytes, float, Tuple[str, int]], None, None]:
+        """
+        Yield (reassembled JPEG bytes, edge capture timestamp, sender address)
+        Frames from different senders are reassembled separately.
+        """
         while True:
-            packet, _ = self.sock.recvfrom(MAX_UDP_PACKET_SIZE)
-            data = self._handle_packet(packet)
+            packet, addr = self.sock.recvfrom(MAX_UDP_PACKET_SIZE)
+            data = self._handle_packet(packet, addr)
             if data is not None:
-                yield data
+                yield data, self.last_capture_ts, addr
 
-    def _handle_packet(self, packet: bytes):
+    def _handle_packet(self, packet: bytes, addr: Optional[Tuple[str, int]] = None):
         if len(packet) < HEADER_SIZE:
             return None
 
         header = packet[:HEADER_SIZE]
         payload = packet[HEADER_SIZE:]
 
-        frame_id, chunk_id, total_chunks = struct.unpack(HEADER_FORMAT, header)
+        frame_id, chunk_id, total_chunks, capture_ts_us = struct.unpack(
+            HEADER_FORMAT, header
+        )
 
+        key = (addr, frame_id)
         frame_entry = self._frames.setdefault(
-            frame_id,
-            {"total": total_chunks, "chunks": {}},
+            key,
+            {"total": total_chunks, "chunks": {}, "capture_ts": capture_ts_us / 1e6},
         )
 
         frame_entry["chunks"][chunk_id] = payload
@@ -125,7 +157,8 @@ class UDPFrameReceiver:
             data = b"".join(
                 frame_entry["chunks"][i] for i in range(frame_entry["total"])
             )
-            del self._frames[frame_id]
+            self.last_capture_ts = frame_entry["capture_ts"]
+            del self._frames[key]
             return data
 
         return None
@@ -512,6 +512,14 @@ class CartDashboard(QMainWindow):
         layout.addLayout(led_container)
 
         # Removed obstacle_text - LED indicator is sufficient
+        # AI 인식 중단 등 상태 알림 (평소에는 숨김)
+        self.status_label = QLabel("")
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.status_label.setFont(QFont("Arial", 11, QFont.Weight.Bold))
+        self.status_label.setStyleSheet("color: #F44336;")
+        self.status_label.setWordWrap(True)
+        self.status_label.hide()
+        layout.addWidget(self.status_label)
 
         layout.addSpacing(30)
 
@@ -663,6 +671,11 @@ class CartDashboard(QMainWindow):
         self.led.set_level(level)
         # LED indicator only - no text message needed
 
+    def set_status(self, message: str):
+        """Show a status notice under the LED (empty message hides it)"""
+        self.status_label.setText(message)
+        self.status_label.setVisible(bool(message))
+
     def reset_cart(self):
         """Reset cart to empty state"""
         self.cart_items.clear()
@@ -132,7 +132,7 @@ class UIController:
 
     def _handle_message(self, raw: bytes):
         try:
-            message = Protocol.parse(raw.decode())
+            message = Protocol.parse(raw)
         except ValueError as e:
             print(f"[UI] Error parsing message: {e}", flush=True)
             return
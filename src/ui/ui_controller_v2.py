@@ -9,12 +9,15 @@ Enhanced UI Controller with full DB integration
 import threading
 import socket
 import json
+import queue
+import time
 from typing import Optional, List, Dict
 
 from PyQt6.QtCore import QObject, pyqtSignal
 
 from ui.dashboard_v2 import CartDashboard, DangerLevel
 from common.config import config
+from common.metrics import LoopStats
 from common.protocols import (
     Protocol,
     MessageType,
@@ -33,6 +36,7 @@ class UIEventSignals(QObject):
     cart_updated = pyqtSignal(list, int)  # items, total
     product_added = pyqtSignal(str)  # product_name
     danger_updated = pyqtSignal(int, str)  # level, message
+    alarm_shown = pyqtSignal(object)  # capture_ts (float 또는 None)
     status_changed = pyqtSignal(str)
 
 
@@ -75,6 +79,13 @@ class UIController:
         # or after manual resets.
         self._expect_initial_cart: bool = False
 
+        # Obstacle alarm latency (glass-to-LED: 프레임 캡처 → 위험 표시 갱신)
+        self.alarm_latency = LoopStats()
+
+        # DB 기록은 별도 스레드에서 (알람 수신/표시가 RDS 왕복을 기다리지 않도록)
+        self._db_tasks = queue.Queue()
+        threading.Thread(target=self._db_writer_loop, daemon=True).start()
+
         # Signals
         self.signals = UIEventSignals()
         self._bind_signals()
@@ -97,7 +108,9 @@ class UIController:
         self.signals.cart_updated.connect(self.dashboard.update_cart_display)
         self.signals.product_added.connect(self.dashboard.show_product_added)
         self.signals.danger_updated.connect(self.dashboard.set_danger_level)
-        self.signals.status_changed.connect(lambda msg: print(f"[UI] Status: {msg}"))
+        # danger_updated 다음에 emit → 같은 순서로 Qt 스레드에서 실행 (표시 갱신 후 기록)
+        self.signals.alarm_shown.connect(self._on_alarm_shown)
+        self.signals.status_changed.connect(self.dashboard.set_status)
 
     def _bind_buttons(self):
         """Connect dashboard buttons to handlers"""
@@ -128,7 +141,7 @@ class UIController:
 
         try:
             # Send START_SESSION request to Main Hub
-            msg = Protocol.ui_request(UIRequest.START_SESSION, {})
+            msg = self._ui_request(UIRequest.START_SESSION, {})
 
             # Send and wait for response
             response = self._send_to_main_sync(msg)
@@ -161,7 +174,7 @@ class UIController:
             # - Getting cart items
             # - Creating order with totals
             # - Ending session
-            msg = Protocol.ui_request(
+            msg = self._ui_request(
                 UIRequest.CHECKOUT,
                 {"session_id": self.current_session_id},
             )
@@ -190,7 +203,7 @@ class UIController:
             return
 
         try:
-            msg = Protocol.ui_request(
+            msg = self._ui_request(
                 UIRequest.UPDATE_QUANTITY,
                 {
                     "session_id": self.current_session_id,
@@ -212,7 +225,7 @@ class UIController:
             return
 
         try:
-            msg = Protocol.ui_request(
+            msg = self._ui_request(
                 UIRequest.REMOVE_ITEM,
                 {
                     "session_id": self.current_session_id,
@@ -227,6 +240,12 @@ class UIController:
     # =========================
     # TCP Communication
     # =========================
+    def _ui_request(self, request: UIRequest, data: dict) -> dict:
+        """UI 요청 메시지 (Hub가 카트를 구분하도록 cart_code 포함)"""
+        network = config.network
+        cart_code = network.pc3_ui.cart_code or network.pc2_main.cart_code
+        return Protocol.ui_request(request, dict(data, cart_code=cart_code))
+
     def _send_to_main(self, message: dict):
         """Send message to Main Hub (fire and forget)"""
         port = config.network.pc2_main.ui_port
@@ -333,7 +352,7 @@ class UIController:
     def _handle_message(self, raw: bytes):
         """Parse and handle incoming message"""
         try:
-            message = Protocol.parse(raw.decode())
+            message = Protocol.parse(raw)
         except Exception as e:
             print(f"[UI Controller] Error parsing message: {e}")
             return
@@ -356,6 +375,8 @@ class UIController:
             self._handle_add_to_cart(payload["content"])
         elif cmd == UICommand.CHECKOUT_DONE:
             self._handle_checkout_done(payload["content"])
+        elif cmd == UICommand.UPDATE_STATUS:
+            self._handle_update_status(payload["content"])
 
     # =========================
     # Command Handlers
@@ -444,18 +465,49 @@ class UIController:
 
         # Update UI
         self.signals.danger_updated.emit(danger_level.value, message)
+        self.signals.alarm_shown.emit(content.get("capture_ts"))
 
-        # Log to database
+        # Log to database (background)
         if self.current_session_id and self.obstacle_dao:
-            try:
-                self.obstacle_dao.log_obstacle(
-                    session_id=self.current_session_id,
-                    object_type=object_type,
-                    distance=distance,
-                    speed=content.get("speed", 0),
-                    direction=content.get("direction", "front"),
-                    is_warning=(danger_level != DangerLevel.NORMAL),
+            self._db_tasks.put(
+                (
+                    self.obstacle_dao.log_obstacle,
+                    dict(
+                        session_id=self.current_session_id,
+                        object_type=object_type,
+                        distance=distance,
+                        speed=content.get("speed", 0),
+                        direction=content.get("direction", "front"),
+                        is_warning=(danger_level != DangerLevel.NORMAL),
+                    ),
                 )
+            )
+
+    def _handle_update_status(self, content: dict):
+        """Handle UPDATE_STATUS command (예: AI worker 없음 → 장애물 인식 중단)"""
+        message = content.get("message", "")
+        print(f"[UI Controller] UPDATE_STATUS: {content.get('status')} {message}")
+        self.signals.status_changed.emit(message)
+
+    def _on_alarm_shown(self, capture_ts: Optional[float]):
+        """Qt 스레드: 위험 표시가 갱신된 직후 glass-to-LED 지연 시간 기록"""
+        if capture_ts is None:
+            return
+        latency_s = time.time() - capture_ts
+        if latency_s < 0:
+            return  # 카메라 PC와 시계가 맞지 않음 (NTP 동기화 필요)
+        self.alarm_latency.record(latency_s)
+        stats = self.alarm_latency.snapshot()["latency_ms"]
+        print(
+            f"[UI Controller] Glass-to-LED: {latency_s * 1000:.1f} ms "
+            f"(p50={stats['p50']} p99={stats['p99']} ms)"
+        )
+
+    def _db_writer_loop(self):
+        while True:
+            func, kwargs = self._db_tasks.get()
+            try:
+                func(**kwargs)
             except Exception as e:
                 print(f"[UI Controller] Error logging obstacle: {e}")
 
@@ -0,0 +1,106 @@
+import sys
+import os
+import threading
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from common.protocols import Protocol
+from network.ai_pool import AIWorker, AIWorkerPool, HashRing
+from network.tcp_server import TCPServer
+
+
+def test_hash_ring_is_stable_and_skips_taken_workers():
+    ring = HashRing(["ai-0", "ai-1", "ai-2"])
+    again = HashRing(["ai-2", "ai-0", "ai-1"])
+    for cart in ("CART-001", "CART-002", "CART-003"):
+        order = list(ring.walk(cart))
+        assert sorted(order) == ["ai-0", "ai-1", "ai-2"]
+        assert order == list(again.walk(cart))  # 등록 순서 / 프로세스와 무관
+
+
+def test_pool_places_several_carts_per_worker_by_hash_with_bounded_load():
+    carts = [f"CART-{i:03d}" for i in range(1, 8)]
+
+    # control 포트가 없는 worker는 항상 정상
+    def make_pool(**kwargs):
+        return AIWorkerPool(
+            [AIWorker(f"ai-{i}", "127.0.0.1", 0, 0) for i in range(3)], **kwargs
+        )
+
+    pool = make_pool()
+    pool.add_carts(carts)
+    stats = pool.stats()
+    assert stats["unassigned"] == []
+    assert stats["limits"] == {"ai-0": 3, "ai-1": 3, "ai-2": 3}  # ceil(1.25 * 7 / 3)
+    assert all(len(w["carts"]) <= 3 for w in stats["workers"].values())
+
+    # 등록 순서 / 한 번에 등록했는지와 무관하게 같은 배치
+    other = make_pool()
+    for cart in reversed(carts):
+        other.add_cart(cart)
+    assert {c: other.worker_for(c).name for c in carts} == {
+        c: pool.worker_for(c).name for c in carts
+    }
+
+    # max_carts에 닿으면 남는 카트는 미배정 (Hub가 ERROR + UI 알람)
+    small = AIWorkerPool(
+        [AIWorker(f"ai-{i}", "127.0.0.1", 0, 0, max_carts=2) for i in range(3)]
+    )
+    moves = small.add_carts(carts)
+    assert len(small.unassigned()) == 1
+    assert moves[small.unassigned()[0]] == (None, None)
+
+
+def _fake_worker(alive):
+    """AI 서버 control 포트 흉내 (alive가 꺼지면 health check 실패)"""
+
+    def handler(request):
+        return Protocol.ai_response(alive.is_set(), {})
+
+    server = TCPServer("127.0.0.1", 0, handler)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert server.ready.wait(2.0)
+    return server
+
+
+def test_unhealthy_worker_carts_move_and_return_on_recovery():
+    alive = {name: threading.Event() for name in ("ai-0", "ai-1", "ai-2")}
+    workers = []
+    for name, flag in alive.items():
+        flag.set()
+        server = _fake_worker(flag)
+        workers.append(AIWorker(name, "127.0.0.1", 0, 0, control_port=server.port))
+
+    changes = []
+    pool = AIWorkerPool(
+        workers, on_change=changes.append, fail_threshold=2, load_factor=1.0
+    )
+    carts = ["CART-001", "CART-002", "CART-003"]
+    pool.add_carts(carts)
+    before = {c: pool.worker_for(c).name for c in carts}
+    assert sorted(before.values()) == ["ai-0", "ai-1", "ai-2"]  # 상한 1
+    assert pool.check_health() == {}
+
+    # CART-001을 맡은 worker가 사라짐: 두 번 연속 실패해야 제외
+    lost = before["CART-001"]
+    alive[lost].clear()
+    assert pool.check_health() == {}
+    assert pool.worker_for("CART-001").name == lost
+    moves = pool.check_health()
+
+    # 나머지 두 worker 중 ring 순서에서 먼저인 worker로 (상한 2), 다른 카트는 그대로
+    target = next(n for n in pool.ring.walk("CART-001") if n != lost)
+    assert moves == {"CART-001": (lost, target)}
+    assert changes[-1] == moves
+    for cart in ("CART-002", "CART-003"):
+        assert pool.worker_for(cart).name == before[cart]  # 추적 상태 유지
+    assert not pool.stats()["workers"][lost]["healthy"]
+
+    # 복구되면 상한(1)을 넘은 worker에서 옮겨 온 카트가 돌아감
+    alive[lost].set()
+    assert pool.check_health() == {"CART-001": (target, lost)}
+    assert pool.carts_of(lost) == ["CART-001"]
+    assert pool.stats()["workers"][lost]["healthy"]
@@ -0,0 +1,71 @@
+import sys
+import os
+import json
+from enum import IntEnum
+
+import pytest
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from common import codec
+from common.protocols import AIEvent, Protocol, UICommand
+
+
+class _Level(IntEnum):
+    WARN = 2
+
+
+def _as_json(value):
+    return json.loads(json.dumps(value, ensure_ascii=False))
+
+
+def test_binary_round_trip_matches_json_semantics():
+    message = Protocol.ai_event(
+        AIEvent.OBSTACLE_DANGER,
+        {
+            "level": _Level.WARN,
+            "objects": [
+                {"track_id": 3, "box": (10, 20, 300, 400), "score": 0.731},
+                {"track_id": -40, "pttc_s": None, "approaching": False},
+            ],
+            "ints": [0, 127, 128, -32, -33, 255, 65536, -70000, 2**40, -(2**40)],
+            "name": "전방 장애물" * 10,
+            1: "int key",
+        },
+    )
+    payload = codec.encode(message, binary=True)
+
+    assert codec.is_binary(payload)
+    assert codec.decode(payload) == _as_json(message)
+    assert len(payload) < len(codec.encode(message))
+
+
+def test_unrepresentable_values_fall_back_to_json():
+    payload = codec.encode({"big": 2**70}, binary=True)
+
+    assert not codec.is_binary(payload)
+    assert codec.decode(payload) == {"big": 2**70}
+    with pytest.raises(TypeError):
+        codec.encode({"obj": object()}, binary=True)
+
+
+def test_corrupt_binary_payload_raises_value_error():
+    payload = codec.encode({"items": list(range(20))}, binary=True)
+
+    with pytest.raises(ValueError):
+        codec.decode(payload[:-3])
+    with pytest.raises(ValueError):
+        codec.decode(payload + b"\x00")
+
+
+def test_protocol_parse_accepts_both_encodings_and_versions():
+    message = Protocol.ui_command(UICommand.UPDATE_CART, {"items": [], "total": 0})
+    old = dict(message, header=dict(message["header"], version=1))
+
+    assert Protocol.parse(codec.encode(message, binary=True)) == message
+    assert Protocol.parse(json.dumps(old)) == old
+    assert Protocol.supports_binary(Protocol.VERSION)
+    assert not Protocol.supports_binary(1) and not Protocol.supports_binary(None)
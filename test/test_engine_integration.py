@@ -12,7 +12,7 @@ class DummyUIClient:
     def __init__(self):
         self.sent_messages = []
 
-    def send_request(self, msg):
+    def send_oneshot(self, msg):
         self.sent_messages.append(msg)
 
 
@@ -96,3 +96,48 @@ def test_debouncing_prevents_duplicate_add(setup_engine):
     time.sleep(engine.DUPLICATE_PRODUCT_INTERVAL_SEC + 0.1)
     engine.process_product_event(event, session_id)
     assert len(tx.added) == 2
+
+
+def test_instance_events_add_quantity_and_skip_repeats(setup_engine):
+    engine, tx, ui_client = setup_engine
+    session_id = 9
+
+    # 같은 상품 2개가 한 번에 추가됨
+    engine.process_product_event(
+        {"product_id": 1, "confidence": 0.9, "quantity": 2, "instance_ids": [3, 4]},
+        session_id,
+    )
+    assert tx.added == [(session_id, 1, 2)]
+
+    # 다른 물체는 바로 추가되고, 이미 반영된 물체는 제외
+    engine.process_product_event(
+        {"product_id": 1, "confidence": 0.9, "quantity": 2, "instance_ids": [4, 5]},
+        session_id,
+    )
+    assert tx.added == [(session_id, 1, 2), (session_id, 1, 1)]
+
+
+def test_obstacle_alarm_is_sent_before_db_log_and_skipped_when_sent_directly():
+    order = []
+
+    class RecordingObstacleDAO:
+        def log_obstacle(self, **kwargs):
+            order.append(("db", kwargs["is_warning"]))
+
+    class RecordingUIClient:
+        def send_oneshot(self, msg):
+            order.append(("ui", msg["payload"]["content"]["level"]))
+
+    engine = SmartCartEngine(
+        DummyProductDAO({}), DummyTXDAO(), RecordingObstacleDAO(), RecordingUIClient()
+    )
+    risky = {"track_id": 3, "pttc_s": 1.2, "score": 0.8, "class_name": "person"}
+
+    engine.process_obstacle_event({"level": 2, "highest_risk_object": risky}, 7)
+    assert order == [("ui", 2), ("db", True)]
+
+    # AI 서버가 UI에 직접 보낸 알람: 상태와 기록만 갱신
+    order.clear()
+    engine.process_obstacle_event({"level": 0, "alarm_sent": True, "capture_ts": 1.0}, 7)
+    assert order == [("db", False)]
+    assert engine.last_obstacle_level == 0
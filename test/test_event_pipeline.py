@@ -0,0 +1,84 @@
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from core.event_pipeline import EventPipeline
+
+
+class _Recorder:
+    """처리 순서 기록, gate가 닫혀 있으면 handler가 대기"""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.lock = threading.Lock()
+
+    def __call__(self, session_id, kind, data):
+        self.gate.wait(2.0)
+        with self.lock:
+            self.calls.append((session_id, kind, data["n"]))
+
+
+def test_submit_returns_before_slow_handler_and_keeps_session_order():
+    recorder = _Recorder()
+    recorder.gate.clear()
+    pipeline = EventPipeline(recorder, max_workers=3)
+    pipeline.start()
+
+    t0 = time.monotonic()
+    for n in range(5):
+        for session_id in (1, 2):
+            assert pipeline.submit(session_id, "product", {"n": n})
+    assert time.monotonic() - t0 < 0.1
+    assert pipeline.depth() >= 8
+
+    recorder.gate.set()
+    assert pipeline.wait_idle(1, timeout=2.0) and pipeline.wait_idle(2, timeout=2.0)
+    for session_id in (1, 2):
+        assert [n for s, _, n in recorder.calls if s == session_id] == list(range(5))
+
+    stats = pipeline.stats()
+    assert stats["processed"] == 10 and stats["depth"] == 0
+    assert stats["latency"]["latency_ms"]["max"] > 0
+
+
+def test_drop_oldest_never_drops_critical_events():
+    recorder = _Recorder()
+    pipeline = EventPipeline(recorder, max_queue=2, overflow="drop_oldest")
+
+    # worker 시작 전: 큐에만 쌓임
+    pipeline.submit(1, "obstacle", {"n": 0}, critical=True)
+    pipeline.submit(1, "product", {"n": 1})
+    pipeline.submit(1, "product", {"n": 2})  # n=1 폐기
+    pipeline.submit(1, "obstacle", {"n": 3}, critical=True)  # 한도 초과해도 유지
+    pipeline.start()
+
+    assert pipeline.wait_idle(1, timeout=2.0)
+    assert [n for _, _, n in recorder.calls] == [0, 2, 3]
+    assert pipeline.stats()["dropped"] == 1
+
+
+def test_drop_newest_and_block_policies():
+    recorder = _Recorder()
+    newest = EventPipeline(recorder, max_queue=1, overflow="drop_newest")
+    assert newest.submit(1, "product", {"n": 0})
+    assert not newest.submit(1, "product", {"n": 1})
+    assert newest.submit(1, "obstacle", {"n": 2}, critical=True)
+
+    blocking = EventPipeline(recorder, max_queue=1, block_timeout_s=0.05)
+    assert blocking.submit(2, "product", {"n": 0})
+    t0 = time.monotonic()
+    assert not blocking.submit(2, "product", {"n": 1})  # worker 없음 → timeout
+    assert time.monotonic() - t0 >= 0.05
+
+    with pytest.raises(ValueError):
+        EventPipeline(recorder, overflow="drop_everything")
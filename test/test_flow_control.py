@@ -0,0 +1,44 @@
+import sys
+import os
+import time
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from network.flow_control import CreditGate
+
+
+def test_frames_forwarded_only_while_credits_remain():
+    gate = CreditGate(stale_s=10.0)
+
+    # 광고 전: 구버전 AI 서버처럼 제한 없이 전달
+    assert gate.try_acquire()
+    assert gate.stats()["ungated"] == 1
+
+    gate.grant(2)
+    assert [gate.try_acquire() for _ in range(4)] == [True, True, False, False]
+
+    # 광고는 누적이 아니라 현재 값으로 교체
+    gate.grant(1)
+    gate.grant(1)
+    assert [gate.try_acquire() for _ in range(2)] == [True, False]
+
+    stats = gate.stats()
+    assert stats["forwarded"] == 4
+    assert stats["dropped"] == 3
+    assert stats["grants"] == 3
+    assert stats["credits"] == 0
+    assert stats["gated"]
+
+
+def test_stale_credits_fall_back_to_forwarding():
+    gate = CreditGate(stale_s=0.05)
+    gate.grant(0)
+    assert not gate.try_acquire()
+
+    time.sleep(0.1)  # AI 광고가 끊김
+    assert not gate.stats()["gated"]
+    assert gate.try_acquire()
+    assert gate.stats()["ungated"] == 1
@@ -0,0 +1,82 @@
+import sys
+import os
+import threading
+import time
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import pytest
+
+from network.frame_fanout import FrameFanout
+
+
+def test_slow_subscriber_does_not_delay_inline_path():
+    fanout = FrameFanout("front")
+    ai_frames = []
+    slow_frames = []
+    release = threading.Event()
+
+    def slow_send(jpeg, ts):
+        release.wait(2.0)  # 녹화기가 멈춘 상황
+        slow_frames.append(jpeg)
+
+    fanout.subscribe("ai", lambda jpeg, ts: ai_frames.append(jpeg), inline=True)
+    fanout.subscribe("recorder", slow_send, max_queue=1, overflow="drop_oldest")
+
+    frames = [bytes([i]) for i in range(5)]
+    started = time.monotonic()
+    for i, jpeg in enumerate(frames):
+        fanout.publish(jpeg, capture_ts=float(i))
+        time.sleep(0.01)  # 첫 프레임을 전송 스레드가 가져가도록
+    assert time.monotonic() - started < 0.5
+
+    # AI 경로는 모든 프레임을 같은 객체로 즉시 받음 (복사 없음)
+    assert len(ai_frames) == 5
+    assert all(a is b for a, b in zip(ai_frames, frames))
+    assert fanout.latest() == (frames[-1], 4.0, 5)
+
+    release.set()
+    deadline = time.monotonic() + 2.0
+    while len(slow_frames) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # 전송 중이던 첫 프레임 + 큐에 남은 최신 프레임만 받음
+    assert slow_frames == [frames[0], frames[-1]]
+    assert fanout.stats()["subscribers"]["recorder"]["dropped"] == 3
+
+
+def test_rate_limit_admit_and_registry():
+    fanout = FrameFanout("cart")
+    viewer = []
+    credits = [1]
+
+    def admit():
+        if credits[0] <= 0:
+            return False
+        credits[0] -= 1
+        return True
+
+    fanout.subscribe(
+        "viewer", lambda jpeg, ts: viewer.append(jpeg), inline=True, max_fps=5
+    )
+    fanout.subscribe("ai", lambda jpeg, ts: None, inline=True, admit=admit)
+    with pytest.raises(ValueError):
+        fanout.subscribe("viewer", lambda jpeg, ts: None)
+    with pytest.raises(ValueError):
+        fanout.subscribe("bad", lambda jpeg, ts: None, overflow="block")
+
+    for i in range(10):
+        fanout.publish(b"frame", capture_ts=None)
+
+    stats = fanout.stats()
+    assert stats["published"] == 10
+    assert stats["subscribers"]["viewer"]["delivered"] == 1
+    assert stats["subscribers"]["viewer"]["rate_limited"] == 9
+    assert stats["subscribers"]["ai"]["delivered"] == 1
+    assert stats["subscribers"]["ai"]["refused"] == 9
+
+    assert fanout.unsubscribe("viewer")
+    assert not fanout.unsubscribe("viewer")
+    assert list(fanout.stats()["subscribers"]) == ["ai"]
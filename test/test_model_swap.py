@@ -0,0 +1,145 @@
+import sys
+import os
+
+import numpy as np
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import detectors.obstacle_dl as obstacle_dl
+from detectors.obstacle_tracker import DetectionBatch, FrameDetections
+
+
+class FakeTracker:
+    def __init__(self, weights, names=("Person", "Cart"), **kwargs):
+        self.weights = weights
+        self.names = names
+        self.adopted = None
+        self.resets = 0
+
+    def reset_tracker(self):
+        self.resets += 1
+
+    def class_names(self):
+        return self.names
+
+    def adopt_tracker_state(self, other):
+        self.adopted = other
+        return True
+
+    def detect_single_frame(self, frame, frame_index=0):
+        batch = DetectionBatch(
+            xyxy=np.array([[280.0, 100.0, 360.0, 470.0]]),
+            conf=np.array([0.9]),
+            cls=np.array([0], dtype=np.int64),
+            track_id=np.array([3], dtype=np.int64),
+            names=self.names,
+        )
+        return FrameDetections(frame_index, 0.0, 0.0, frame.shape[:2], batch)
+
+
+def _detector(monkeypatch):
+    monkeypatch.setattr(obstacle_dl, "YoloTrackerDetector", FakeTracker)
+    det = obstacle_dl.ObstacleDetector(model_path="old.pt")
+    det.light_tracker = None
+    det.detect_interval = det.caution_interval = det.warn_interval = 1
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    for i in range(3):
+        det.detect(frame, timestamp_s=i / 30)
+    return det
+
+
+def test_swap_keeps_state_when_class_map_matches(monkeypatch):
+    det = _detector(monkeypatch)
+    old = det.tracker
+    assert len(det.risk_engine.states) == 1
+
+    result = det.swap_model(FakeTracker("new.pt"))
+    assert result == {"weights": "new.pt", "state_kept": True}
+    assert det.tracker.adopted is old
+    assert len(det.risk_engine.states) == 1
+
+
+def test_swap_resets_state_when_class_map_changes(monkeypatch):
+    det = _detector(monkeypatch)
+
+    result = det.swap_model(FakeTracker("new.pt", names=("Cart", "Person")))
+    assert result["state_kept"] is False
+    assert det.tracker.adopted is None
+    assert len(det.risk_engine.states) == 0
+    assert det._last_detect_frame is None
+
+
+def test_session_reset_clears_and_compacts_state(monkeypatch):
+    det = _detector(monkeypatch)
+    det.risk_engine._grow(1024)
+
+    det.reset_tracking(compact=True)
+    assert det.tracker.resets == 1
+    assert len(det.risk_engine.states) == 0
+    assert len(det.risk_engine._key) == det.risk_engine._INITIAL_CAPACITY
+
+    # 초기화 후에도 정상 동작
+    det.detect(np.zeros((480, 640, 3), dtype=np.uint8), timestamp_s=1.0)
+    assert len(det.risk_engine.states) == 1
+
+
+class FakeSwapModel:
+    def load_model(self, weights):
+        return f"{weights}-model"
+
+    def swap_model(self, model):
+        self.model = model
+        return {"weights": model, "state_kept": True}
+
+
+def _swap_server(cart_codes):
+    import threading
+
+    import ai_server
+
+    srv = ai_server.AIServer.__new__(ai_server.AIServer)
+    srv._control_lock = threading.Lock()
+    srv.swap_status = {
+        target: {"state": "idle", "weights": f"{target}.pt"}
+        for target in ai_server.MODEL_TARGETS
+    }
+    srv._weights = {target: f"{target}.pt" for target in ai_server.MODEL_TARGETS}
+    srv.carts = {}
+    srv._routes = {}
+    srv._assigned = False
+    srv.ui_alarm_direct = False
+    for code in cart_codes:
+        cart = ai_server.CartPipeline(code)
+        cart.models = {"obstacle": FakeSwapModel()}
+        srv.carts[code] = cart
+    return srv
+
+
+def test_swap_is_done_only_after_every_cart_swapped():
+    srv = _swap_server(["CART-001", "CART-002", "CART-003"])
+    srv.swap_status["obstacle"]["state"] = "loading"
+    srv._load_model_worker("obstacle", "new.pt")
+    assert srv.swap_status["obstacle"]["state"] == "ready"
+    assert srv.swap_status["obstacle"]["pending_carts"] == 3
+
+    srv._apply_pending_changes(srv.carts["CART-001"], "obstacle")
+    assert srv.swap_status["obstacle"]["state"] == "ready"
+    accepted, error = srv.request_model_swap("obstacle", "newer.pt")
+    assert not accepted and "in progress" in error
+
+    # 배정 해제된 카트의 교체는 취소로 처리
+    srv.assign_carts([{"cart_code": "CART-001"}, {"cart_code": "CART-002"}])
+    srv._apply_pending_changes(srv.carts["CART-002"], "obstacle")
+    assert srv.swap_status["obstacle"]["state"] == "swapped"
+    assert srv.carts["CART-002"].models["obstacle"].model == "new.pt-model"
+
+
+def test_swap_without_ready_carts_completes_immediately():
+    srv = _swap_server([])
+    srv.swap_status["obstacle"]["state"] = "loading"
+    srv._load_model_worker("obstacle", "new.pt")
+    assert srv.swap_status["obstacle"]["state"] == "swapped"
+    assert srv._weights["obstacle"] == "new.pt"
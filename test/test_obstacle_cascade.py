@@ -0,0 +1,99 @@
+import sys
+import os
+
+import numpy as np
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import detectors.obstacle_dl as obstacle_dl
+from detectors.obstacle_tracker import DetectionBatch, FrameDetections
+
+
+def _batch(track_id, xyxy):
+    return DetectionBatch(
+        xyxy=np.array([xyxy], dtype=np.float64),
+        conf=np.array([0.9]),
+        cls=np.array([0], dtype=np.int64),
+        track_id=np.array([track_id], dtype=np.int64),
+        names=("Person", "Cart"),
+    )
+
+
+class FakeTracker:
+    def __init__(self, weights, **kwargs):
+        self.weights = weights
+        self.next = None
+        self.calls = 0
+
+    def detect_single_frame(self, frame, frame_index=0):
+        self.calls += 1
+        return FrameDetections(frame_index, 0.0, 0.0, frame.shape[:2], self.next)
+
+    def predict_single_frame(self, frame):
+        self.calls += 1
+        return self.next
+
+
+def test_cascade_uses_light_model_and_keeps_track_ids(monkeypatch):
+    monkeypatch.setattr(obstacle_dl, "YoloTrackerDetector", FakeTracker)
+    det = obstacle_dl.ObstacleDetector(model_path="full.pt")
+    light = FakeTracker("light.pt")
+    det.light_tracker = light
+    det.detect_interval = det.caution_interval = det.warn_interval = 1
+    det.cascade_hold_frames = 0
+    det._full_until = 0  # 첫 프레임은 전체 모델로 Track ID 확보
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    # 0: 전체 모델, 중앙 밖 사람 (id=5)
+    det.tracker.next = _batch(5, (84.0, 100.0, 136.0, 300.0))
+    det.detect(frame)
+
+    # 1: 경량 모델만 실행, 직전 Track ID 이어 붙임
+    light.next = _batch(-1, (85.0, 100.0, 137.0, 300.0))
+    res = det.detect(frame)
+    assert (det.tracker.calls, light.calls) == (1, 1)
+    assert res["objects"][0]["track_id"] == 5
+
+    # 2: 경량 모델이 중앙 영역 후보 발견 → 전체 모델 (새 ID 9) → 기존 ID 5로 연결
+    light.next = _batch(-1, (90.0, 100.0, 142.0, 300.0))
+    det.tracker.next = _batch(9, (90.0, 100.0, 142.0, 300.0))
+    res = det.detect(frame)
+    assert (det.tracker.calls, light.calls) == (2, 2)
+    assert res["objects"][0]["track_id"] == 5
+    assert det.cascade_stats == {"light": 1, "full": 2}
+
+
+def test_cascade_drops_aliases_of_vanished_tracks(monkeypatch):
+    monkeypatch.setattr(obstacle_dl, "YoloTrackerDetector", FakeTracker)
+    det = obstacle_dl.ObstacleDetector(model_path="full.pt")
+    light = FakeTracker("light.pt")
+    det.light_tracker = light
+    det.detect_interval = det.caution_interval = det.warn_interval = 1
+    det.cascade_hold_frames = 0
+    det._full_until = 0
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    det.tracker.next = _batch(5, (84.0, 100.0, 136.0, 300.0))
+    det.detect(frame)
+    light.next = _batch(-1, (85.0, 100.0, 137.0, 300.0))
+    det.detect(frame)
+    light.next = _batch(-1, (90.0, 100.0, 142.0, 300.0))
+    det.tracker.next = _batch(9, (90.0, 100.0, 142.0, 300.0))
+    det.detect(frame)
+    assert det._id_alias == {9: 5}
+
+    # 이후 전체 모델만 실행: 9가 빠져도 직전 Track(5)이 남아 있는 동안은 유지
+    det._full_until = 100
+    det.tracker.next = _batch(11, (400.0, 100.0, 450.0, 300.0))
+    det.detect(frame)
+    assert det._id_alias == {9: 5}
+
+    # 5도 예측 Track에서 사라지면 별칭 제거 (재사용된 9가 5로 바뀌지 않음)
+    det.detect(frame)
+    assert det._id_alias == {}
+    det.tracker.next = _batch(9, (400.0, 100.0, 450.0, 300.0))
+    res = det.detect(frame)
+    assert res["objects"][0]["track_id"] == 9
@@ -0,0 +1,121 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from detectors.postprocess import (
+    nms,
+    postprocess_detect,
+    postprocess_obb,
+    probiou,
+    results_match,
+    xywhr_to_corners,
+)
+
+
+def _raw(rows, nc):
+    """[(x, y, w, h, cls, score[, angle]), ...] -> (4 + nc [+ 1], A) 원시 출력"""
+    extra = len(rows[0]) - 6
+    raw = np.zeros((4 + nc + extra, len(rows)), dtype=np.float32)
+    for a, row in enumerate(rows):
+        x, y, w, h, cls, score = row[:6]
+        raw[:4, a] = (x, y, w, h)
+        raw[4 + cls, a] = score
+        raw[4 + nc :, a] = row[6:]
+    return raw
+
+
+def test_nms_matches_greedy_reference():
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0, 200, (60, 2))
+    boxes = np.concatenate([xy, xy + rng.uniform(10, 60, (60, 2))], axis=1)
+    scores = rng.uniform(0, 1, 60)
+
+    # 단순 O(N^2) greedy 구현과 비교
+    order = list(np.argsort(-scores, kind="stable"))
+    expected = []
+    while order:
+        i = order.pop(0)
+        expected.append(i)
+        order = [j for j in order if _iou(boxes[i], boxes[j]) <= 0.5]
+    assert nms(boxes, scores, 0.5).tolist() == expected
+
+
+def _iou(a, b):
+    w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    return inter / (
+        (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    )
+
+
+def test_detect_nms_is_class_aware():
+    raw = _raw(
+        [
+            (50, 50, 20, 20, 0, 0.9),
+            (51, 50, 20, 20, 0, 0.8),  # 같은 클래스 중복 → 제거
+            (50, 51, 20, 20, 1, 0.7),  # 다른 클래스 → 유지
+            (150, 150, 20, 20, 0, 0.2),  # 신뢰도 미달
+        ],
+        nc=2,
+    )
+    xyxy, conf, cls = postprocess_detect(raw, nc=2, conf_thres=0.25, iou_thres=0.5)
+    assert cls.tolist() == [0, 1]
+    assert np.allclose(conf, [0.9, 0.7])
+    assert xyxy[0].tolist() == [40.0, 40.0, 60.0, 60.0]
+
+
+def test_obb_rotated_nms_and_corners():
+    raw = _raw(
+        [
+            (50, 50, 40, 10, 0, 0.9, np.pi / 4),
+            (50, 50, 40, 10, 0, 0.8, np.pi / 4 + 0.05),  # 거의 같은 회전 박스
+            (50, 50, 40, 10, 0, 0.7, -np.pi / 4),  # 직교 방향 → 겹침 적음
+        ],
+        nc=1,
+    )
+    xywhr, conf, cls = postprocess_obb(raw, nc=1, conf_thres=0.25, iou_thres=0.7)
+    assert np.allclose(conf, [0.9, 0.7])
+
+    same = probiou(xywhr[:1], xywhr[:1])[0, 0]
+    assert same > 0.99
+
+    corners = xywhr_to_corners(np.array([[10.0, 10.0, 4.0, 2.0, 0.0]]))
+    assert corners[0].min(axis=0).tolist() == [8.0, 9.0]
+    assert corners[0].max(axis=0).tolist() == [12.0, 11.0]
+
+
+def test_results_match_requires_same_classes_and_close_boxes():
+    ref = (np.array([[10.0, 10.0, 50.0, 60.0]]), np.array([3]), np.array([0.91]))
+    assert results_match(ref, (ref[0] + 1e-4, np.array([3.0]), np.array([0.9104])))
+    assert not results_match(ref, (ref[0], np.array([2]), ref[2]))
+    assert not results_match(ref, (ref[0] + 0.5, ref[1], ref[2]))
+    empty = (np.zeros((0, 4)), np.zeros((0,), np.int64), np.zeros((0,)))
+    assert not results_match(ref, empty)
+    assert results_match(empty, empty)
+
+
+def test_raw_path_matches_predict_on_recorded_frames():
+    """
+    녹화 프레임에서 원시 출력 경로 == predict() 경로
+    (PARITY_FRAMES 또는 product_recognizer.parity_frames 디렉터리, 모델 가중치 필요)
+    """
+    pytest.importorskip("torch")
+    from common.config import config
+    from detectors.product_dl import ProductRecognizer, load_frames
+
+    frames_dir = os.environ.get("PARITY_FRAMES") or (
+        config and config.model.product_recognizer.parity_frames
+    )
+    if not frames_dir or not os.path.isdir(frames_dir):
+        pytest.skip("no recorded frames for the parity check")
+
+    recognizer = ProductRecognizer()
+    assert recognizer.check_raw_parity(load_frames(frames_dir)) == []
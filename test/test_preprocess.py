@@ -0,0 +1,32 @@
+import sys
+import os
+
+import numpy as np
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from detectors.preprocess import LetterboxBuffer, map_boxes
+
+
+def test_letterbox_writes_into_same_buffer():
+    lb = LetterboxBuffer(imgsz=640)
+    frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    buf1, params = lb(frame)
+    buf2, _ = lb(frame[::-1].copy())
+    assert buf1 is buf2 and buf1.shape == (640, 640, 3)
+    assert (params.scale, params.pad_x, params.pad_y) == (1.0, 0, 80)
+    assert (buf2[0] == 114).all() and (buf2[80:560] == frame[::-1]).all()
+
+
+def test_map_boxes_restores_source_coordinates():
+    lb = LetterboxBuffer(imgsz=640)
+    _, params = lb(np.zeros((720, 1280, 3), dtype=np.uint8))
+    assert params.scale == 0.5 and params.pad_y == 140
+
+    boxes = np.array([[0.0, 140.0, 640.0, 500.0], [100.0, 100.0, 200.0, 600.0]])
+    out = map_boxes(boxes, params)
+    assert out.tolist() == [[0.0, 0.0, 1280.0, 720.0], [200.0, 0.0, 400.0, 720.0]]
@@ -28,9 +28,26 @@ class FakeBox:
         self.conf = [conf]
 
 
+class FakeBoxes:
+    """Batched view like ultralytics Boxes (xyxy/cls/conf tensors for all boxes)"""
+
+    def __init__(self, boxes):
+        self._n = len(boxes)
+        self.xyxy = FakeTensor(
+            np.array([b.xyxy[0].numpy() for b in boxes], dtype=np.float32).reshape(
+                -1, 4
+            )
+        )
+        self.cls = FakeTensor(np.array([b.cls[0] for b in boxes], dtype=np.float32))
+        self.conf = FakeTensor(np.array([b.conf[0] for b in boxes], dtype=np.float32))
+
+    def __len__(self):
+        return self._n
+
+
 class FakeResult:
     def __init__(self, boxes):
-        self.boxes = boxes
+        self.boxes = FakeBoxes(boxes)
 
 
 class DummyModel:
@@ -39,7 +56,7 @@ class DummyModel:
         self._seq = results_sequence
         self._idx = 0
 
-    def predict(self, frame, conf=None, verbose=False):
+    def predict(self, frame, conf=None, iou=None, verbose=False):
         # Return a list-like where index 0 has .boxes attribute
         if self._idx >= len(self._seq):
             # return empty result
@@ -61,18 +78,18 @@ def test_recognize_with_trigger_added_after_duration():
 
     t0 = 1000.0
     r1 = pr.recognize_with_trigger(
-        np.zeros((100, 100, 3), dtype=np.uint8), current_time=t0
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=t0
     )
     assert r1["status"] in ("tracking", "none")
 
     r2 = pr.recognize_with_trigger(
-        np.zeros((100, 100, 3), dtype=np.uint8), current_time=t0 + 0.6
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=t0 + 0.6
     )
     assert r2["status"] == "tracking"
     assert r2["main_event"]["status"] == "tracking"
 
     r3 = pr.recognize_with_trigger(
-        np.zeros((100, 100, 3), dtype=np.uint8), current_time=t0 + 1.1
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=t0 + 1.1
     )
     assert r3["status"] == "added"
     assert r3["main_event"]["status"] == "added"
@@ -90,13 +107,13 @@ def test_cooldown_prevents_immediate_readd():
     t0 = 2000.0
     # call a few times and ensure one of the calls returns 'added'
     r1 = pr.recognize_with_trigger(
-        np.zeros((100, 100, 3), dtype=np.uint8), current_time=t0
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=t0
     )
     r2 = pr.recognize_with_trigger(
-        np.zeros((100, 100, 3), dtype=np.uint8), current_time=t0 + 0.6
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=t0 + 0.6
     )
     r3 = pr.recognize_with_trigger(
-        np.zeros((100, 100, 3), dtype=np.uint8), current_time=t0 + 0.7
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=t0 + 0.7
     )
 
     statuses = {r1.get("status"), r2.get("status"), r3.get("status")}
@@ -113,7 +130,7 @@ def test_cooldown_prevents_immediate_readd():
 
     # immediately show again within cooldown (0.5s after added)
     res2 = pr.recognize_with_trigger(
-        np.zeros((100, 100, 3), dtype=np.uint8), current_time=added_time + 0.5
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=added_time + 0.5
     )
     # status should either be 'none' or report cooldown for that product
     assert res2["status"] in ("none", "tracking") or any(
@@ -126,6 +143,141 @@ def test_no_detection_returns_none():
     pr.model = DummyModel([[]])
 
     res = pr.recognize_with_trigger(
-        np.zeros((100, 100, 3), dtype=np.uint8), current_time=3000.0
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=3000.0
     )
     assert res["status"] == "none"
+
+
+class FakeObb:
+    def __init__(self, corners, cls, conf):
+        self.xyxyxyxy = FakeTensor(np.array(corners, dtype=np.float32))
+        self.cls = FakeTensor(np.array(cls, dtype=np.float32))
+        self.conf = FakeTensor(np.array(conf, dtype=np.float32))
+
+    def __len__(self):
+        return len(self.cls.numpy())
+
+
+class FakeObbResult:
+    def __init__(self, obb):
+        self.obb = obb
+
+
+def test_obb_corners_converted_to_axis_aligned_boxes():
+    pr = ProductRecognizer(model_path=None)
+    pr.is_obb = True
+    corners = [
+        [[15, 10], [20, 15], [15, 20], [10, 15]],  # 45도 회전된 박스
+        [[30, 30], [40, 30], [40, 50], [30, 50]],
+    ]
+    obb = FakeObb(corners, cls=[2, 4], conf=[0.9, 0.8])
+
+    class ObbModel:
+        def predict(self, frame, conf=None, iou=None, verbose=False):
+            return [FakeObbResult(obb)]
+
+    pr.model = ObbModel()
+    res = pr.recognize_with_trigger(
+        np.zeros((640, 640, 3), dtype=np.uint8), current_time=4000.0
+    )
+    boxes = {d["product_id"]: d["bbox"] for d in res["all_detections"]}
+    assert boxes == {3: [10.0, 10.0, 20.0, 20.0], 5: [30.0, 30.0, 40.0, 50.0]}
+
+
+def test_same_product_instances_added_with_quantity():
+    pr = ProductRecognizer(model_path=None)
+    pr.required_duration = 0.5
+
+    # 같은 상품 2개를 동시에 넣는 경우 (떨어진 위치)
+    boxes = [
+        FakeBox([10, 10, 20, 20], cls=0, conf=0.9),
+        FakeBox([60, 60, 70, 70], cls=0, conf=0.8),
+    ]
+    pr.model = DummyModel([boxes, boxes, boxes])
+
+    frame = np.zeros((640, 640, 3), dtype=np.uint8)
+    r1 = pr.recognize_with_trigger(frame, current_time=5000.0)
+    assert len(pr.tracked_objects) == 2
+    assert r1["all_detections"][0]["instance_id"] != r1["all_detections"][1][
+        "instance_id"
+    ]
+
+    r2 = pr.recognize_with_trigger(frame, current_time=5000.6)
+    assert r2["status"] == "added"
+    assert r2["main_event"]["quantity"] == 2
+    assert len(r2["added_events"]) == 1
+
+    # 쿨다운 동안 두 물체 모두 다시 추가되지 않음
+    r3 = pr.recognize_with_trigger(frame, current_time=5001.0)
+    assert r3["status"] == "none"
+    assert [d["state"] for d in r3["all_detections"]] == ["cooldown", "cooldown"]
+
+
+def test_confident_stable_detection_commits_before_duration():
+    pr = ProductRecognizer(model_path=None)
+    pr.threshold = 0.6
+    pr.evidence_threshold = 2.0
+    pr.evidence_decay = 0.5
+    pr.required_duration = 1.5
+
+    confident = [FakeBox([10, 10, 40, 40], cls=0, conf=0.98)]
+    ambiguous = [FakeBox([60, 60, 90, 90], cls=1, conf=0.65)]
+    pr.model = DummyModel([confident + ambiguous] * 4)
+
+    frame = np.zeros((640, 640, 3), dtype=np.uint8)
+    statuses = [
+        pr.recognize_with_trigger(frame, current_time=6000.0 + 0.1 * i)
+        for i in range(4)
+    ]
+
+    # 10fps 기준 0.2~0.3초 안에 확실한 물체만 추가됨
+    added = [r for r in statuses if r["status"] == "added"]
+    assert len(added) == 1
+    assert added[0]["main_event"]["product_id"] == 1
+    assert added[0]["main_event"]["trigger"] == "evidence_reached"
+    assert all(
+        d["state"] == "tracking"
+        for r in statuses
+        for d in r["all_detections"]
+        if d["product_id"] == 2
+    )
+
+
+def test_static_frames_reuse_previous_result():
+    pr = ProductRecognizer(model_path=None)
+    pr.reuse_enabled = True
+    pr.max_reuse_frames = 2
+    boxes = [FakeBox([10, 10, 20, 20], cls=0, conf=0.9)]
+    model = DummyModel([boxes] * 10)
+    pr.model = model
+
+    still = np.zeros((640, 640, 3), dtype=np.uint8)
+    for i in range(4):
+        res = pr.recognize_with_trigger(still, current_time=7000.0 + 0.1 * i)
+        assert res["all_detections"][0]["product_id"] == 1
+
+    # 추론 → 재사용 2회 → 상한 도달로 강제 추론
+    assert model._idx == 2
+    stats = pr.get_reuse_stats()
+    assert stats["reused"] == 2 and stats["inferred"] == 2
+    assert stats["reuse_ratio"] == 0.5
+
+    # 장면이 바뀌면 바로 다시 추론
+    moved = np.full((640, 640, 3), 255, dtype=np.uint8)
+    pr.recognize_with_trigger(moved, current_time=7000.5)
+    assert model._idx == 3
+
+
+def test_input_buffer_follows_model_imgsz():
+    pr = ProductRecognizer(model_path=None)
+    pr.imgsz = None  # 설정값 없음 → 모델 학습 크기 사용
+    model = DummyModel([])
+    model.names = dict(pr.model.names)
+    model.task = "detect"
+    model.overrides = {"imgsz": 320}
+
+    pr.swap_model(model)
+    assert pr.preprocess.imgsz == 320
+    inp, letterbox = pr.preprocess(np.zeros((480, 640, 3), dtype=np.uint8))
+    assert inp.shape == (320, 320, 3)
+    assert letterbox.scale == 0.5
@@ -0,0 +1,114 @@
+import sys
+import os
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from detectors.obstacle_tracker import Detection
+from detectors.risk_engine import (
+    RISK_SAFE,
+    RISK_WARN,
+    RiskEngine,
+    RiskEngineConfig,
+)
+
+
+def _person(track_id, xyxy):
+    return Detection(
+        track_id=track_id, cls_id=0, cls_name="Person", conf=0.9, xyxy=xyxy
+    )
+
+
+def _approach(i):
+    # 화면 중앙에서 점점 커지는(다가오는) 사람
+    grow = 6.0 * i
+    return (300.0 - grow, 100.0, 340.0 + grow, 200.0 + 2 * grow)
+
+
+def test_approaching_person_escalates_to_warn():
+    engine = RiskEngine(RiskEngineConfig())
+    levels, approaching = [], []
+    for i in range(40):
+        metrics = engine.update([_person(1, _approach(i))], (480, 640), i, 30.0)
+        levels.append(metrics[0].risk_level)
+        approaching.append(metrics[0].approaching)
+
+    assert levels[0] == RISK_SAFE
+    assert levels[-1] == RISK_WARN
+    assert any(approaching)
+    assert metrics[0].in_center
+    assert metrics[0].pttc_s < 1e9
+
+
+def test_first_observation_metrics():
+    engine = RiskEngine(RiskEngineConfig())
+    m = engine.update([_person(3, (0.0, 0.0, 50.0, 100.0))], (480, 640), 0, 30.0)[0]
+
+    expected_dist = 0.60 / 100.0 + 0.25 / (5000.0**0.5) + 0.15 * (380.0 / 480.0)
+    assert m.dist_proxy == expected_dist
+    assert m.closing_rate == 0.0
+    assert m.pttc_s == 1e9
+    assert m.box_h == 100.0 and m.area == 5000.0
+    assert not m.in_center
+
+
+def test_duplicate_keys_are_applied_in_order():
+    # track_id=-1 이 한 프레임에 두 번 나오면 같은 상태를 순서대로 두 번 갱신
+    a = RiskEngine(RiskEngineConfig())
+    b = RiskEngine(RiskEngineConfig())
+    box1, box2 = (300.0, 100.0, 340.0, 200.0), (290.0, 90.0, 350.0, 230.0)
+
+    ma = a.update([_person(-1, box1), _person(-1, box2)], (480, 640), 0, 30.0)
+    b.update([_person(-1, box1)], (480, 640), 0, 30.0)
+    mb = b.update([_person(-1, box2)], (480, 640), 0, 30.0)
+
+    assert ma[1] == mb[0]
+    assert a.states == b.states
+
+
+def test_stale_tracks_are_removed():
+    engine = RiskEngine(RiskEngineConfig(stale_frames=2))
+    engine.update([_person(1, _approach(0))], (480, 640), 0, 30.0)
+    engine.update([_person(2, _approach(0))], (480, 640), 2, 30.0)
+    assert set(engine.states) == {("Person", 1), ("Person", 2)}
+
+    engine.update([_person(2, _approach(1))], (480, 640), 3, 30.0)
+    assert set(engine.states) == {("Person", 2)}
+
+
+def _approach_at(t):
+    # 시간 t(초)에 따라 일정하게 다가오는 사람
+    return _approach(10.0 * t)
+
+
+def test_closing_rate_uses_timestamps_not_fps():
+    rates = {}
+    for fps in (10, 30):
+        engine = RiskEngine(RiskEngineConfig())
+        for i in range(int(1.0 * fps) + 1):
+            t = i / fps
+            m = engine.update(
+                [_person(1, _approach_at(t))], (480, 640), i, 30.0, timestamp_s=t
+            )[0]
+        rates[fps] = m.closing_rate
+
+    # 같은 움직임이면 추론 FPS와 무관하게 비슷한 closing_rate
+    assert abs(rates[10] - rates[30]) / rates[30] < 0.05
+
+
+def test_hysteresis_in_seconds():
+    cfg = RiskEngineConfig(hysteresis_s=0.5, hysteresis_frames=1000)
+    engine = RiskEngine(cfg)
+    big = (100.0, 0.0, 540.0, 400.0)  # 초근접 → 즉시 WARN
+    far = (300.0, 100.0, 340.0, 140.0)
+
+    assert engine.update([_person(1, big)], (480, 640), 0, 0.0, 0.0)[0].risk_level
+    levels = [
+        engine.update([_person(1, far)], (480, 640), i, 0.0, 0.1 * i)[0].risk_level
+        for i in range(1, 9)
+    ]
+    # 0.5초 동안은 유지, 이후 하강 (프레임 기준 1000 프레임과 무관)
+    assert levels[:5] == [RISK_WARN] * 5
+    assert levels[-1] == RISK_SAFE
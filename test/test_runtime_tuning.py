@@ -0,0 +1,150 @@
+import sys
+import os
+
+import pytest
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from common.metrics import LoopStats
+from detectors.risk_engine import RiskEngineConfig
+
+
+def test_risk_config_update_converts_types():
+    cfg = RiskEngineConfig()
+    applied = cfg.update({"streak_warn": "6", "pttc_warn_s": 2.5, "hysteresis_s": None})
+    assert applied == {"streak_warn": 6, "pttc_warn_s": 2.5, "hysteresis_s": None}
+    assert cfg.streak_warn == 6 and isinstance(cfg.streak_warn, int)
+
+
+def test_risk_config_update_is_all_or_nothing():
+    cfg = RiskEngineConfig()
+    with pytest.raises(ValueError):
+        cfg.update({"pttc_warn_s": 1.0, "no_such_field": 1})
+    with pytest.raises(ValueError):
+        cfg.update({"pttc_warn_s": 1.0, "streak_warn": None})
+    assert cfg.pttc_warn_s == 2.0
+
+
+def test_loop_stats_counts_skipped_frames_and_percentiles():
+    stats = LoopStats()
+    for _ in range(3):
+        stats.frame_received()
+    stats.frame_taken()  # 3번째 프레임만 처리, 2개 덮어씀
+    stats.frame_received()
+
+    for i in range(11):
+        stats.record(latency_s=(i + 1) / 1000, now=i * 0.1)
+
+    snap = stats.snapshot()
+    assert snap["skipped"] == 2
+    assert snap["pending_frames"] == 1
+    assert snap["processed"] == 11
+    assert snap["latency_ms"]["p50"] == 6.0
+    assert snap["latency_ms"]["max"] == 11.0
+    assert snap["fps"] == 10.0
+
+
+class FakeTracker:
+    def __init__(self, weights, conf=0.35, iou=0.5, **kwargs):
+        self.weights = weights
+        self.conf = conf
+        self.iou = iou
+
+
+def test_obstacle_tuning_updates_tracker_and_risk(monkeypatch):
+    import detectors.obstacle_dl as obstacle_dl
+
+    monkeypatch.setattr(obstacle_dl, "YoloTrackerDetector", FakeTracker)
+    det = obstacle_dl.ObstacleDetector(model_path="full.pt")
+
+    applied = det.apply_tuning({"confidence": 0.5, "risk": {"pttc_warn_s": 1.5}})
+    assert applied == {"confidence": 0.5, "risk": {"pttc_warn_s": 1.5}}
+    assert det.tracker.conf == 0.5
+    assert det.get_tuning()["risk"]["pttc_warn_s"] == 1.5
+
+    with pytest.raises(ValueError):
+        det.apply_tuning({"confidence": 0.9, "risk": {"bogus": 1}})
+    assert det.tracker.conf == 0.5
+
+
+def test_risk_config_update_rejects_non_integral_and_non_dict_values():
+    cfg = RiskEngineConfig()
+    with pytest.raises(ValueError):
+        cfg.update({"streak_warn": 2.5})
+    with pytest.raises(ValueError):
+        cfg.update({"class_weights": [("Person", 1.0)]})
+    with pytest.raises(TypeError):
+        cfg.update([("streak_warn", 6)])
+    assert cfg.update({"streak_warn": 6.0}) == {"streak_warn": 6}
+    assert cfg.class_weights == {"Person": 1.0, "Cart": 0.8}
+
+
+class FakeCartModel:
+    def __init__(self, model_path=None):
+        self.model_path = model_path
+        self.tuned = []
+
+    def apply_tuning(self, params):
+        self.tuned.append(params)
+        return params
+
+
+def _tuning_server(cart_codes):
+    import threading
+
+    import ai_server
+
+    srv = ai_server.AIServer.__new__(ai_server.AIServer)
+    srv._control_lock = threading.Lock()
+    srv._weights = {"obstacle": "obstacle.pt", "product": "product.pt"}
+    srv._tuning = {target: {} for target in ai_server.MODEL_TARGETS}
+    srv.target_fps = {"obstacle": 20.0, "product": 10.0}
+    srv.carts = {}
+    for code in cart_codes:
+        cart = ai_server.CartPipeline(code)
+        cart.models = {"obstacle": FakeCartModel(), "product": FakeCartModel()}
+        srv.carts[code] = cart
+    return srv
+
+
+def test_server_tuning_is_validated_before_any_cart_and_merged(monkeypatch):
+    import ai_server
+
+    srv = _tuning_server([])
+    # 카트가 없어도 검증 (잘못된 값은 이후 배정되는 카트에 남지 않음)
+    with pytest.raises(ValueError):
+        srv.apply_tuning("obstacle", {"risk": {"bogus": 1}})
+    assert srv._tuning["obstacle"] == {}
+
+    srv = _tuning_server(["CART-001", "CART-002"])
+    applied = srv.apply_tuning(
+        "obstacle", {"confidence": 0.5, "risk": {"pttc_warn_s": 1.5}}
+    )
+    assert applied == {"confidence": 0.5, "risk": {"pttc_warn_s": 1.5}}
+    with pytest.raises(ValueError):
+        srv.apply_tuning("obstacle", {"confidence": 0.4, "risk": {"streak_warn": 2.5}})
+    srv.apply_tuning("obstacle", {"risk": {"streak_warn": 6}})
+    for cart in srv.carts.values():
+        assert len(cart.models["obstacle"].tuned) == 2
+    assert srv._tuning["obstacle"] == {
+        "confidence": 0.5,
+        "risk": {"pttc_warn_s": 1.5, "streak_warn": 6},
+    }
+
+    # 새로 배정된 카트: 합친 값을 한 번만 적용
+    class FakeObstacle(FakeCartModel):
+        parse_tuning = staticmethod(ai_server.ObstacleDetector.parse_tuning)
+
+    class FakeProduct(FakeCartModel):
+        parse_tuning = staticmethod(ai_server.ProductRecognizer.parse_tuning)
+
+    monkeypatch.setattr(
+        ai_server, "MODEL_CLASSES", {"obstacle": FakeObstacle, "product": FakeProduct}
+    )
+    cart = ai_server.CartPipeline("CART-003")
+    srv._load_cart_models(cart)
+    assert cart.models["obstacle"].tuned == [srv._tuning["obstacle"]]
+    assert cart.models["product"].tuned == []
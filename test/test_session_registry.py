@@ -0,0 +1,59 @@
+import sys
+import os
+import threading
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from core.session_registry import CartSession, SessionRegistry
+
+
+class _FakeEngine:
+    def __init__(self):
+        self.last_obstacle_level = 0
+
+
+def _registry():
+    created = []
+
+    def factory(cart_code):
+        created.append(cart_code)
+        return CartSession(cart_code, ui_client=None, engine=_FakeEngine())
+
+    registry = SessionRegistry(factory, ["CART-001", "CART-002"], "CART-001")
+    return registry, created
+
+
+def test_carts_are_created_once_with_their_own_state():
+    registry, created = _registry()
+
+    carts = []
+    threads = [
+        threading.Thread(target=lambda: carts.append(registry.get("CART-002")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert created == ["CART-002"]
+    assert all(cart is carts[0] for cart in carts)
+    assert registry.get() is registry.get("CART-001")  # cart_code 없음 → 기본 카트
+    assert registry.get("CART-001").engine is not carts[0].engine
+    assert registry.get("CART-999") is None
+
+
+def test_session_keys_and_active_sessions():
+    registry, _ = _registry()
+    first, second = registry.get("CART-001"), registry.get("CART-002")
+
+    first.session_id = 11
+    assert first.key == ("CART-001", 11)
+    assert registry.active_sessions() == {"CART-001": 11}
+
+    second.session_id = 12
+    first.session_id = None
+    assert registry.active_sessions() == {"CART-002": 12}
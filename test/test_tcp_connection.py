@@ -0,0 +1,251 @@
+import sys
+import os
+import json
+import socket
+import struct
+import threading
+import time
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from network.tcp_client import TCPClient
+from network.tcp_server import TCPServer
+
+
+def _start_server(**kwargs):
+    def handler(request):
+        time.sleep(request.get("sleep", 0.0))
+        return {"echo": request}
+
+    server = TCPServer("127.0.0.1", 0, handler, **kwargs)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert server.ready.wait(2.0)
+    return server
+
+
+def test_client_reuses_persistent_connection():
+    server = _start_server()
+    client = TCPClient("127.0.0.1", server.port)
+
+    responses = [client.send_request({"n": i}) for i in range(3)]
+    assert [r["echo"]["n"] for r in responses] == [0, 1, 2]
+    assert server.stats()["accepted"] == 1
+    client.close()
+
+
+def _frame(message):
+    payload = json.dumps(message).encode("utf-8")
+    return struct.pack(">I", len(payload)) + payload
+
+
+def _read_frame(sock):
+    size = struct.unpack(">I", sock.recv(4))[0]
+    data = b""
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return json.loads(data)
+
+
+def test_server_still_serves_one_shot_clients():
+    server = _start_server()
+    for i in range(2):
+        with socket.create_connection(("127.0.0.1", server.port), timeout=2) as s:
+            s.sendall(_frame({"n": i}))
+            assert _read_frame(s)["echo"] == {"n": i}
+
+
+def test_server_keeps_request_order_per_connection():
+    server = _start_server(max_workers=4)
+    with socket.create_connection(("127.0.0.1", server.port), timeout=2) as s:
+        # 앞 요청이 더 오래 걸려도 응답은 요청 순서대로
+        s.sendall(b"".join(_frame({"n": i, "sleep": 0.05 * (3 - i)}) for i in range(3)))
+        assert [_read_frame(s)["echo"]["n"] for _ in range(3)] == [0, 1, 2]
+
+
+def test_server_bounds_handler_concurrency():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def handler(request):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+        return {"ok": True}
+
+    server = TCPServer("127.0.0.1", 0, handler, max_workers=2, max_connections=5)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert server.ready.wait(2.0)
+
+    socks = [socket.create_connection(("127.0.0.1", server.port)) for _ in range(5)]
+    for s in socks:
+        s.sendall(_frame({}))
+    time.sleep(0.05)
+    assert server.stats()["queue_depth"] == 3  # 2개 처리 중, 3개 대기
+    for s in socks:
+        assert _read_frame(s) == {"ok": True}
+        s.close()
+    assert peak[0] == 2
+
+    stats = server.stats()
+    assert stats["requests"] == 5 and stats["max_queue_depth"] >= 3
+
+
+def test_client_reconnects_after_server_closes_idle_connection():
+    server = _start_server(idle_timeout=0.1)
+    client = TCPClient("127.0.0.1", server.port)
+
+    client.send_request({"n": 1})
+    time.sleep(0.3)  # 서버가 idle 연결을 닫음
+    assert client.send_request({"n": 2})["echo"] == {"n": 2}
+    assert server.stats()["accepted"] == 2
+
+
+def test_client_backs_off_when_server_is_down():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    client = TCPClient("127.0.0.1", port, backoff_initial=10.0)
+
+    assert client.send_request({"n": 1}) is None
+    t0 = time.monotonic()
+    assert client.send_request({"n": 2}) is None  # backoff 중에는 연결 시도 없이 실패
+    assert time.monotonic() - t0 < 0.1
+
+
+def test_pipelined_requests_match_by_request_id():
+    server = _start_server()
+    client = TCPClient("127.0.0.1", server.port)
+
+    futures = [client.request_async({"n": i}) for i in range(10)]
+    responses = [f.result(2.0) for f in futures]
+    assert [r["echo"]["n"] for r in responses] == list(range(10))
+    ids = [r["header"]["request_id"] for r in responses]
+    assert len(set(ids)) == 10
+    assert server.stats()["accepted"] == 1
+    client.close()
+
+
+def test_responses_matched_out_of_order():
+    # 응답을 역순으로 보내는 서버
+    listener = socket.create_server(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+
+    def reverse_server():
+        conn, _ = listener.accept()
+        requests = [_read_frame(conn) for _ in range(3)]
+        for req in reversed(requests):
+            conn.sendall(_frame({"header": req["header"], "n": req["n"]}))
+        time.sleep(0.2)
+        conn.close()
+
+    threading.Thread(target=reverse_server, daemon=True).start()
+    client = TCPClient("127.0.0.1", port)
+    futures = [client.request_async({"n": i}) for i in range(3)]
+    assert [f.result(2.0)["n"] for f in futures] == [0, 1, 2]
+    listener.close()
+
+
+def test_fire_and_forget_skips_response():
+    received = []
+
+    def handler(request):
+        received.append(request["n"])
+        return {"ok": True}
+
+    server = TCPServer("127.0.0.1", 0, handler)
+    threading.Thread(target=server.start, daemon=True).start()
+    assert server.ready.wait(2.0)
+    client = TCPClient("127.0.0.1", server.port)
+
+    message = {"n": 0}
+    assert client.send_nowait(message)
+    assert "header" not in message  # 원본 메시지는 변경하지 않음
+    for i in range(1, 5):
+        assert client.send_nowait({"n": i})
+
+    # 같은 연결이므로 앞선 fire-and-forget 요청이 모두 처리된 뒤 응답
+    last = client.request_async({"n": 5}).result(2.0)
+    assert last["header"]["request_id"] == 6
+    assert received == [0, 1, 2, 3, 4, 5]
+    assert server.stats()["no_reply"] == 5
+    client.close()
+
+
+def test_client_switches_to_binary_after_version_negotiation():
+    server = _start_server()
+    client = TCPClient("127.0.0.1", server.port)
+    message = {"header": {"version": 2}, "payload": {"n": 1}}
+
+    # 상대 버전을 모르면 JSON, 응답 header.version을 보고 바이너리로 전환
+    assert client.send_request(message)["echo"] == message
+    assert client.binary and server.stats()["binary"] == 0
+    assert client.send_request(message)["echo"] == message
+    assert server.stats()["binary"] == 1
+
+    # 버전 1 상대에게는 다시 JSON
+    client.set_peer_version(1)
+    client.send_request({"payload": {"n": 2}})
+    assert server.stats()["binary"] == 1
+    client.close()
+
+
+def test_send_oneshot_delivers_to_server_that_never_replies():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    received = []
+
+    def one_shot_server():
+        # UI 컨트롤러처럼 연결당 메시지 하나만 읽고 응답 없이 닫음
+        for _ in range(2):
+            conn, _ = listener.accept()
+            with conn:
+                received.append(_read_frame(conn)["n"])
+
+    thread = threading.Thread(target=one_shot_server, daemon=True)
+    thread.start()
+    client = TCPClient("127.0.0.1", listener.getsockname()[1])
+
+    t0 = time.monotonic()
+    assert client.send_oneshot({"n": 1}) and client.send_oneshot({"n": 2})
+    assert time.monotonic() - t0 < 0.5  # 응답을 기다리지 않음
+    thread.join(2.0)
+    assert received == [1, 2]
+    listener.close()
+
+
+def test_client_does_not_replay_request_after_connection_drops_mid_response():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    listener.settimeout(0.5)
+    received = []
+
+    def flaky_server():
+        # 첫 요청은 응답, 같은 연결의 두 번째 요청은 처리만 하고 응답 전에 닫음
+        conn, _ = listener.accept()
+        with conn:
+            received.append(_read_frame(conn)["n"])
+            conn.sendall(_frame({"ok": True}))
+            received.append(_read_frame(conn)["n"])
+        try:
+            conn, _ = listener.accept()  # 재전송된 요청이 있으면 기록
+            with conn:
+                received.append(_read_frame(conn)["n"])
+        except socket.timeout:
+            pass
+
+    thread = threading.Thread(target=flaky_server, daemon=True)
+    thread.start()
+    client = TCPClient("127.0.0.1", listener.getsockname()[1])
+
+    assert client.send_request({"n": 1}) == {"ok": True}
+    assert client.send_request({"n": 2}) is None
+    thread.join(2.0)
+    assert received == [1, 2]  # 두 번째 요청은 한 번만 전달
+    listener.close()
@@ -0,0 +1,45 @@
+import sys
+import os
+import threading
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from common.thread_budget import (
+    apply_thread_budget,
+    available_cpus,
+    format_thread_report,
+)
+
+
+def test_thread_budget_pins_only_calling_thread():
+    before = available_cpus()
+    target = before[:1]
+    result = {}
+
+    def worker():
+        result["entry"] = apply_thread_budget("worker", cpus=target + [10_000])
+
+    t = threading.Thread(target=worker, name="budget-worker")
+    t.start()
+    t.join()
+
+    entry = result["entry"]
+    assert entry["name"] == "worker"
+    assert entry["thread"] == "budget-worker"
+    if hasattr(os, "sched_setaffinity"):
+        # 존재하지 않는 CPU는 무시, 메인 스레드 mask는 그대로
+        assert entry["cpus"] == target
+    assert available_cpus() == before
+
+
+def test_format_thread_report_lists_each_thread():
+    process = {"cpus": [0, 1], "opencv_threads": 1, "torch_interop_threads": 1}
+    layout = [
+        {"name": "obstacle", "thread": "T1", "cpus": [0], "torch_threads": 2},
+        {"name": "product", "thread": "T2", "cpus": [1], "torch_threads": 1},
+    ]
+    report = format_thread_report(process, layout)
+    assert "obstacle" in report and "cpus=[1]" in report
@@ -0,0 +1,58 @@
+import sys
+import os
+
+# ensure src/ is on path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from detectors.obstacle_tracker import Detection, DetectionBatch, TrackPredictor
+
+
+def _batch(*dets):
+    return DetectionBatch.from_detections(
+        [
+            Detection(
+                track_id=track_id, cls_id=0, cls_name="Person", conf=0.9, xyxy=xyxy
+            )
+            for track_id, xyxy in dets
+        ]
+    )
+
+
+def test_predict_extrapolates_constant_velocity():
+    pred = TrackPredictor(velocity_alpha=1.0, max_age=5)
+    pred.observe(_batch((1, (100.0, 100.0, 200.0, 300.0))), frame_index=0)
+    pred.observe(_batch((1, (110.0, 100.0, 210.0, 310.0))), frame_index=2)
+
+    out = pred.predict(frame_index=4, frame_shape_hw=(480, 640))
+    assert len(out) == 1
+    assert out[0].track_id == 1
+    assert out[0].xyxy == (120.0, 100.0, 220.0, 320.0)
+    assert out[0].cls_name == "Person"
+
+
+def test_predict_drops_lost_and_untracked_tracks():
+    pred = TrackPredictor(max_age=2)
+    pred.observe(
+        _batch((1, (0.0, 0.0, 10.0, 10.0)), (-1, (5.0, 5.0, 15.0, 15.0))),
+        frame_index=0,
+    )
+    assert pred.predict(1, (480, 640)).track_id.tolist() == [1]
+    # max_age 초과
+    assert len(pred.predict(3, (480, 640))) == 0
+
+    # 다음 감지에서 빠진 Track은 제거
+    pred.observe(_batch((2, (0.0, 0.0, 10.0, 10.0))), frame_index=4)
+    assert pred.predict(5, (480, 640)).track_id.tolist() == [2]
+
+
+def test_detection_batch_row_view():
+    batch = _batch((7, (1.0, 2.0, 3.0, 4.0)), (8, (5.0, 6.0, 7.0, 8.0)))
+    assert len(batch) == 2
+    assert batch.xyxy.shape == (2, 4)
+    assert batch.cls_names == ["Person", "Person"]
+
+    row = batch[1]
+    assert row.track_id == 8 and row.xyxy == (5.0, 6.0, 7.0, 8.0)
+    assert not hasattr(row, "__dict__")
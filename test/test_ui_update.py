@@ -73,7 +73,7 @@ def main():
     )
 
     print(f"[Test] Message payload: {msg}")
-    ui_client.send_request(msg)
+    ui_client.send_oneshot(msg)
     print("[Test] UPDATE_CART sent successfully!")
 
     print("\n[Test] ✓ Test completed. Check UI window for cart update.")